@@ -0,0 +1,78 @@
+"""
+Compares the size and decoding time of cached audience schemas, pickled as plain
+objects (WAGTAILMAILCHIMP_CACHE_SERIALIZATION = "pickle") and with the compact
+serialization of wagtailmailchimp.serialization.
+
+    python benchmarks/cache_serialization.py [--choices 200] [--categories 10]
+"""
+import argparse
+import os
+import pickle
+import sys
+import timeit
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+settings.configure()
+django.setup()
+
+from wagtailmailchimp.api import CacheEntry, ListSchema  # noqa: E402
+
+
+def make_schema(merge_fields_count, choices_count, categories_count, interests_count):
+    merge_fields = [{
+        "merge_id": index,
+        "tag": f"FIELD{index}",
+        "name": f"Field {index}",
+        "type": "dropdown" if index % 2 else "text",
+        "required": False,
+        "public": True,
+        "display_order": index,
+        "options": {"choices": [f"Choice {choice}" for choice in range(choices_count)]} if index % 2 else {"size": 25},
+        "help_text": "Select the option that describes you best",
+    } for index in range(merge_fields_count)]
+
+    interest_categories = [{
+        "id": f"category{category}",
+        "title": f"Category {category}",
+        "type": "checkboxes",
+        "display_order": category,
+        "interests": [{"id": f"interest{category}-{interest}", "name": f"Interest {interest}",
+                       "display_order": interest} for interest in range(interests_count)],
+    } for category in range(categories_count)]
+
+    return ListSchema("list-id", merge_fields, interest_categories)
+
+
+def dump(entry, serialization):
+    settings.WAGTAILMAILCHIMP_CACHE_SERIALIZATION = serialization
+    return pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+
+
+def measure(label, payload, number):
+    seconds = timeit.timeit(lambda: pickle.loads(payload), number=number) / number
+    print(f"  {label:<10} {len(payload):>10} bytes {seconds * 1e6:>10.1f} µs per decode")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--merge-fields", type=int, default=15)
+    parser.add_argument("--choices", type=int, default=200)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--interests", type=int, default=30)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    schema = make_schema(args.merge_fields, args.choices, args.categories, args.interests)
+
+    for label, value in (("schema", schema), ("merge fields", list(schema.merge_fields))):
+        print(label)
+        for serialization in ("pickle", "compact"):
+            measure(serialization, dump(CacheEntry(value, 0), serialization), args.number)
+
+
+if __name__ == "__main__":
+    main()
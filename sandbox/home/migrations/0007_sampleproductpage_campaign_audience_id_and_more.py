@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_alter_mailinglistsubscribepage_thank_you_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sampleproductpage',
+            name='campaign_audience_id',
+            field=models.CharField(blank=True, help_text='Select MailChimp Audience to send the campaign to', max_length=50, null=True, verbose_name='MailChimp Campaign Audience'),
+        ),
+        migrations.AddField(
+            model_name='sampleproductpage',
+            name='campaign_from_name',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Campaign from name'),
+        ),
+        migrations.AddField(
+            model_name='sampleproductpage',
+            name='campaign_reply_to',
+            field=models.EmailField(blank=True, max_length=254, verbose_name='Campaign reply to email'),
+        ),
+        migrations.AddField(
+            model_name='sampleproductpage',
+            name='create_campaign_on_publish',
+            field=models.BooleanField(default=True, help_text='Create or update a Mailchimp campaign draft with the content of this page when it is published', verbose_name='Create campaign on publish'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:37
+
+from django.db import migrations, models
+
+from wagtailmailchimp.migration_operations import normalize_json_text_fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0007_sampleproductpage_campaign_audience_id_and_more'),
+    ]
+
+    operations = [
+        normalize_json_text_fields('home', 'sampleeventformpagewithmailinglistintegration'),
+        migrations.AlterField(
+            model_name='sampleeventformpagewithmailinglistintegration',
+            name='interest_categories',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='sampleeventformpagewithmailinglistintegration',
+            name='merge_fields_mapping',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0008_integration_form_json_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailinglistsubscribepage',
+            name='additional_audiences',
+            field=models.JSONField(blank=True, help_text='Other audiences to subscribe to, as a list of objects with a "list_id" and an optional "merge_fields_mapping" from their merge tags to the merge tags of the main audience, e.g. [{"list_id": "a1b2c3", "merge_fields_mapping": {"NAME": "FNAME"}}]. Without a mapping, the merge fields of the main audience are sent as they are.', null=True, verbose_name='Additional MailChimp audiences'),
+        ),
+        migrations.AddField(
+            model_name='sampleeventformpagewithmailinglistintegration',
+            name='additional_audiences',
+            field=models.JSONField(blank=True, help_text='Other audiences to add users to, as a list of objects with a "list_id" and an optional "merge_fields_mapping" from their merge tags to form field names, e.g. [{"list_id": "a1b2c3", "merge_fields_mapping": {"NAME": "full_name"}}]. Without a mapping, the merge fields mapped for the main audience are sent.', null=True, verbose_name='Additional MailChimp audiences'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0009_additional_audiences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailinglistsubscribepage',
+            name='subscriber_tags',
+            field=models.TextField(blank=True, help_text='Tags to add to subscribers, one per line. Tags are Django templates, with the page, the request and the subscriber data in their context, e.g. {{ page.slug }} or {{ request.GET.utm_campaign }}', verbose_name='Subscriber tags'),
+        ),
+        migrations.AddField(
+            model_name='sampleeventformpagewithmailinglistintegration',
+            name='subscriber_tags',
+            field=models.TextField(blank=True, help_text='Tags to add to users, one per line. Tags are Django templates, with the page, the request and the form submission in their context, e.g. {{ page.slug }} or {{ form_data.event_date }}', verbose_name='Subscriber tags'),
+        ),
+    ]
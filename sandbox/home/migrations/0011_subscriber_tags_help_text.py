@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0010_subscriber_tags'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mailinglistsubscribepage',
+            name='subscriber_tags',
+            field=models.TextField(blank=True, help_text='Tags to add to subscribers, one per line. Tags are Django templates, with the page, the UTM query parameters and the subscriber data in their context, e.g. {{ page.slug }} or {{ query.utm_campaign }}', verbose_name='Subscriber tags'),
+        ),
+        migrations.AlterField(
+            model_name='sampleeventformpagewithmailinglistintegration',
+            name='subscriber_tags',
+            field=models.TextField(blank=True, help_text='Tags to add to users, one per line. Tags are Django templates, with the page, the UTM query parameters and the form submission in their context, e.g. {{ page.slug }} or {{ form_data.event_date }}', verbose_name='Subscriber tags'),
+        ),
+    ]
@@ -1,111 +1,736 @@
+import hashlib
+import json
+import logging
+import time
+import uuid
+from contextvars import copy_context
+from bisect import bisect_left
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
+from django.conf import settings
 from django.core.cache import cache
+from django.utils.functional import cached_property
 from mailchimp3 import MailChimp
+from mailchimp3.mailchimpclient import MailChimpError
+
+from . import metrics
+from .audit import get_mailchimp_error_status, get_subscriber_hash
+from .budgets import SOFT, charge_call, ignore_soft_limits, uses_budget
+from .errors import MailchimpBudgetError
+from .lanes import lane_slot, uses_lane_slot
+from .serialization import dump_cache_entry, is_compact_serialization_enabled, load_cache_entry
+from .signals import audience_schema_changed
+from .timing import timed_phase
+from .transport import MailchimpTransport
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "wagtailmailchimp"
+
+# fields requested by default for the audience schema, the data kept in schema snapshots
+MERGE_FIELDS_FIELDS = "merge_fields.merge_id," \
+                      "merge_fields.tag," \
+                      "merge_fields.name," \
+                      "merge_fields.type," \
+                      "merge_fields.required," \
+                      "merge_fields.public," \
+                      "merge_fields.display_order," \
+                      "merge_fields.options," \
+                      "merge_fields.help_text"
+INTEREST_CATEGORIES_FIELDS = "categories.id,categories.title,categories.type,categories.display_order"
+INTERESTS_FIELDS = "interests.id,interests.name,interests.display_order"
+
+
+def get_cache_setting(name, default):
+    return getattr(settings, f"WAGTAILMAILCHIMP_CACHE_{name}", default)
+
+
+class CacheEntry:
+    """
+    Cached value with the time until which it is fresh. Entries are kept in the
+    cache for a while after that, so that they can be served while one process
+    fetches a fresh value.
+    """
+
+    def __init__(self, value, fresh_until):
+        self.value = value
+        self.fresh_until = fresh_until
+
+    def is_fresh(self):
+        return time.time() < self.fresh_until
+
+    def __reduce__(self):
+        if is_compact_serialization_enabled():
+            return load_cache_entry, (dump_cache_entry(self),)
+        return CacheEntry, (self.value, self.fresh_until)
+
+
+def get_tenant_id(api_key):
+    """
+    Returns the cache namespace of a Mailchimp account. Sites sharing an API key
+    share their cached data, sites with different API keys never do.
+    """
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+def get_tenant_version_key(tenant_id):
+    return f"{CACHE_KEY_PREFIX}:{tenant_id}:version"
+
+
+# (version, time until which it is used without reading it again) per tenant id
+_tenant_versions = {}
+
+
+def get_tenant_cache_version(tenant_id):
+    """
+    Returns the cache version of a Mailchimp account, read from the cache at most
+    every WAGTAILMAILCHIMP_CACHE_VERSION_TIMEOUT seconds by each process.
+    """
+    version, read_until = _tenant_versions.get(tenant_id, (None, 0))
+    if time.monotonic() < read_until:
+        return version
+
+    version_key = get_tenant_version_key(tenant_id)
+    version = cache.get(version_key)
+    if version is None:
+        version = 1 if cache.add(version_key, 1, None) else cache.get(version_key) or 1
+
+    _tenant_versions[tenant_id] = (version, time.monotonic() + get_cache_setting("VERSION_TIMEOUT", 5))
+    return version
+
+
+def invalidate_tenant_cache(api_key):
+    """
+    Invalidates all cached data of a Mailchimp account, by bumping its cache version.
+    """
+    tenant_id = get_tenant_id(api_key)
+    version_key = get_tenant_version_key(tenant_id)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, 2, None)
+    _tenant_versions.pop(tenant_id, None)
+
+
+def freeze_schema_data(value):
+    """
+    Returns a read-only copy of schema data, with dicts as MappingProxyTypes and
+    lists as tuples.
+    """
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze_schema_data(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_schema_data(item) for item in value)
+    return value
+
+
+def thaw_schema_data(value):
+    """
+    Returns a plain copy of schema data frozen by freeze_schema_data, that can be
+    changed, pickled and dumped to JSON.
+    """
+    if isinstance(value, Mapping):
+        return {key: thaw_schema_data(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw_schema_data(item) for item in value]
+    return value
+
+
+class ListSchema:
+    """
+    Merge fields and interest categories, with their interests, of an audience.
+
+    The merge fields and interest categories are frozen with freeze_schema_data and
+    attributes can't be set, so that a schema shared through the cache can't be
+    changed by its users. The version is a hash of the merge fields and interest
+    categories.
+    """
+    __slots__ = ("list_id", "merge_fields", "interest_categories", "version")
+
+    def __init__(self, list_id, merge_fields, interest_categories, version=None):
+        merge_fields = thaw_schema_data(merge_fields)
+        interest_categories = [{**category, "interests": category.get("interests", [])}
+                               for category in thaw_schema_data(interest_categories)]
+        if version is None:
+            data = json.dumps([merge_fields, interest_categories], sort_keys=True)
+            version = hashlib.md5(data.encode("utf-8")).hexdigest()
+
+        for name, value in (("list_id", list_id), ("merge_fields", freeze_schema_data(merge_fields)),
+                            ("interest_categories", freeze_schema_data(interest_categories)), ("version", version)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ListSchema is immutable")
+
+    def get_interest_groups(self):
+        """
+        Returns a new list of the interest categories, with their id, title, type and interests.
+        """
+        return [{
+            "id": category.get("id", ""),
+            "title": category.get("title", ""),
+            "type": category.get("type", ""),
+            "interests": thaw_schema_data(category["interests"]),
+        } for category in self.interest_categories]
+
+    def __reduce__(self):
+        return ListSchema, (self.list_id, thaw_schema_data(self.merge_fields),
+                            thaw_schema_data(self.interest_categories), self.version)
+
+
+class AudienceCatalog:
+    """
+    Audiences of an account, indexed by id and by lowercase name for searching.
+    """
+
+    def __init__(self, audiences):
+        self.audiences = sorted(audiences, key=lambda audience: (audience.get("name") or "").lower())
+        self.names = [(audience.get("name") or "").lower() for audience in self.audiences]
+        self.by_id = {audience.get("id"): audience for audience in self.audiences}
+
+    def __len__(self):
+        return len(self.audiences)
+
+    def get(self, list_id):
+        return self.by_id.get(list_id)
+
+    def search(self, query="", offset=0, limit=20):
+        """
+        Returns a page of audiences whose name contains the query, names starting
+        with the query first, and the total number of matches.
+        """
+        query = (query or "").strip().lower()
+
+        if not query:
+            return self.audiences[offset:offset + limit], len(self.audiences)
+
+        # names are sorted, so the names starting with the query are contiguous
+        start = bisect_left(self.names, query)
+        end = start
+        while end < len(self.names) and self.names[end].startswith(query):
+            end += 1
+
+        matches = self.audiences[start:end]
+        matches += [audience for index, audience in enumerate(self.audiences)
+                    if not start <= index < end and query in self.names[index]]
+
+        return matches[offset:offset + limit], len(matches)
 
 
 class MailchimpApi:
     def __init__(self, api_key):
-        self.client = MailChimp(mc_api=api_key)
+        self.api_key = api_key
+        self.tenant_id = get_tenant_id(api_key)
+        self._cache_version = None
+        # set when a getter served a last known good copy, or nothing, because Mailchimp failed
+        self.degraded = False
+        self._schema_snapshots = {}
 
-    def get_lists(self, fields='lists.id,lists.name'):
-        cache_key = f"get-lists-{fields}"
-        lists = cache.get(cache_key)
+    @cached_property
+    def client(self):
+        """
+        The mailchimp3 client, for endpoints not covered by the built-in transport.
+        """
+        return MailChimp(mc_api=self.api_key)
+
+    @cached_property
+    def transport(self):
+        """
+        The built-in HTTP transport used for the hot path endpoints, or None
+        if the mailchimp3 backend is configured.
+        """
+        if getattr(settings, "WAGTAILMAILCHIMP_HTTP_BACKEND", "builtin") == "mailchimp3":
+            return None
+        return MailchimpTransport(self.api_key)
+
+    def get_cache_version(self):
+        if self._cache_version is None:
+            self._cache_version = get_tenant_cache_version(self.tenant_id)
+        return self._cache_version
+
+    def make_cache_key(self, name, *parts):
+        """
+        Returns a short cache key, namespaced per Mailchimp account and cache version.
+        """
+        digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+        return f"{CACHE_KEY_PREFIX}:{self.tenant_id}:{self.get_cache_version()}:{name}:{digest}"
+
+    def invalidate_cache(self):
+        invalidate_tenant_cache(self.api_key)
+        self._cache_version = None
+
+    def get_cached_if_present(self, name, *parts):
+        """
+        Returns the cached value for the key built from name and parts, fresh or
+        stale, or None. Never calls Mailchimp.
+        """
+        entry = cache.get(self.make_cache_key(name, *parts))
+        return entry.value if entry is not None else None
+
+    def set_cached(self, cache_key, value):
+        timeout = get_cache_setting("TIMEOUT", 60 * 5)
+        stale_timeout = get_cache_setting("STALE_TIMEOUT", 60 * 60)
+        cache.set(cache_key, CacheEntry(value, time.time() + timeout), timeout + stale_timeout)
+
+    def set_last_known_good(self, name, parts, value):
+        cache.set(self.make_cache_key("last-known-good", name, *parts), value,
+                  get_cache_setting("LAST_KNOWN_GOOD_TIMEOUT", 60 * 60 * 24 * 7))
+
+    def update_cached_many(self, items):
+        """
+        Caches many values at once, and keeps them as last known good values.
+        Items are (name, parts, value) tuples.
+        """
+        timeout = get_cache_setting("TIMEOUT", 60 * 5)
+        fresh_until = time.time() + timeout
+
+        cache.set_many({self.make_cache_key(name, *parts): CacheEntry(value, fresh_until)
+                        for name, parts, value in items},
+                       timeout + get_cache_setting("STALE_TIMEOUT", 60 * 60))
+        cache.set_many({self.make_cache_key("last-known-good", name, *parts): value for name, parts, value in items},
+                       get_cache_setting("LAST_KNOWN_GOOD_TIMEOUT", 60 * 60 * 24 * 7))
+
+    def get_cached(self, name, parts, fetch, cold=None):
+        """
+        Returns the cached value for the key built from name and parts, calling fetch
+        and caching its result on a miss. Exceptions raised by fetch are not caught.
+
+        If nothing is cached, not even a stale value, the value returned by cold is
+        used instead of fetching, unless it is None.
+
+        Fetches are coalesced across processes: when an entry is missing or stale,
+        the process holding a short cache lease fetches it. Other processes serve the
+        stale value if there is one, or wait briefly for the fresh one.
+        """
+        cache_key = self.make_cache_key(name, *parts)
+        with timed_phase("cache"):
+            entry = cache.get(cache_key)
+
+        if entry is not None and entry.is_fresh():
+            return entry.value
+
+        if entry is None and cold is not None:
+            with timed_phase("snapshot"):
+                value = cold()
+            if value is not None:
+                self.set_cached(cache_key, value)
+                return value
 
-        if lists is None:
+        lock_key = f"{cache_key}:lock"
+        lock_token = uuid.uuid4().hex
+
+        if not cache.add(lock_key, lock_token, get_cache_setting("LOCK_LEASE", 10)):
+            if entry is not None:
+                return entry.value
+
+            deadline = time.monotonic() + get_cache_setting("LOCK_WAIT", 2)
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                entry = cache.get(cache_key)
+                if entry is not None:
+                    return entry.value
+
+            # the fetch by the lease holder is taking too long, fetch it ourselves
+            lock_token = None
+
+        try:
+            with timed_phase("mailchimp"):
+                value = fetch()
+            self.set_cached(cache_key, value)
+        finally:
+            if lock_token and cache.get(lock_key) == lock_token:
+                cache.delete(lock_key)
+
+        return value
+
+    def get_cached_or_fallback(self, name, parts, fetch, default, cold=None):
+        """
+        Returns get_cached(name, parts, fetch, cold), or, if fetch fails, the last known
+        good value, or default if there is none.
+
+        Failures are cached for a short time, during which Mailchimp is not called
+        again for the same data. Calls stopped by a budget limit are not failures, the
+        last known good value is served, or fetched over a soft limit if there is none.
+        """
+        failure_key = self.make_cache_key("failure", name, *parts)
+        last_known_good_key = self.make_cache_key("last-known-good", name, *parts)
+
+        def fetch_and_keep():
             try:
-                result = self.client.lists.all(fields=fields, get_all=True)
-                lists = result['lists']
-                cache.set(cache_key, lists)
-            except:
-                return []
-
-        return lists
-
-    def get_merge_fields_for_list(self, list_id,
-                                  fields="merge_fields.merge_id,"
-                                         "merge_fields.tag,"
-                                         "merge_fields.name,"
-                                         "merge_fields.type,"
-                                         "merge_fields.required,"
-                                         "merge_fields.public,"
-                                         "merge_fields.display_order,"
-                                         "merge_fields.options,"
-                                         "merge_fields.help_text",
-                                  ):
-        cache_key = f"get-merge-fields-{list_id}-{fields}"
-        merge_fields = cache.get(cache_key)
-
-        if merge_fields is None:
+                value = fetch()
+            except MailchimpBudgetError as e:
+                if e.level != SOFT or cache.get(last_known_good_key) is not None:
+                    raise
+                # nothing to serve instead, go over the soft limit
+                with ignore_soft_limits():
+                    value = fetch()
+            self.set_last_known_good(name, parts, value)
+            return value
+
+        if cache.get(failure_key):
+            metrics.increment("cache.failure_hit", data=name)
+        else:
             try:
-                result = self.client.lists.merge_fields.all(list_id=list_id, get_all=True, fields=fields)
-                merge_fields = result['merge_fields']
-                cache.set(cache_key, merge_fields)
-            except:
-                return []
+                return self.get_cached(name, parts, fetch_and_keep, cold=cold)
+            except MailchimpBudgetError:
+                # not a failure, the budget of the account or audience is used up for now
+                metrics.increment("budget.served_cached", data=name)
+            except Exception as e:
+                logger.warning("Could not fetch %s from Mailchimp: %r", name, e)
+                metrics.increment("api.failure", data=name)
+                cache.set(failure_key, True, get_cache_setting("FAILURE_TIMEOUT", 30))
 
-        return merge_fields
+        self.degraded = True
+        value = cache.get(last_known_good_key)
 
-    def get_interest_categories_for_list(self, list_id,
-                                         fields="categories.id,"
-                                                "categories.title,"
-                                                "categories.type,"
-                                                "categories.display_order"):
-        cache_key = f"get-categories-{list_id}-{fields}"
-        categories = cache.get(cache_key)
+        if value is None:
+            metrics.increment("cache.fallback_missing", data=name)
+            return default
 
-        if categories is None:
-            try:
-                result = self.client.lists.interest_categories.all(list_id=list_id, get_all=True, fields=fields)
-                categories = result['categories']
-                cache.set(cache_key, categories)
-            except:
-                return []
+        metrics.increment("cache.last_known_good", data=name)
+        return value
 
-        return categories
+    def check_audience_schema_change(self, list_id, kind, data):
+        """
+        Compares freshly fetched schema data of an audience with the previous fetch,
+        and sends the audience_schema_changed signal if it changed.
+        """
+        data_hash = hashlib.md5(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+        cache_key = self.make_cache_key("schema-hash", kind, list_id)
+        previous_hash = cache.get(cache_key)
 
-    def get_interests_for_interest_category(self, list_id, interest_category_id,
-                                            fields="interests.id,"
-                                                   "interests.name,"
-                                                   "interests.display_order"):
-        cache_key = f"get-interests-{list_id}-{interest_category_id}-{fields}"
-        interests = cache.get(cache_key)
+        if previous_hash != data_hash:
+            cache.set(cache_key, data_hash, None)
+            if previous_hash is not None:
+                # receivers must not make the fetch fail, the data fetched is good,
+                # send_robust logs their exceptions
+                audience_schema_changed.send_robust(sender=MailchimpApi, list_id=list_id)
 
-        if interests is None:
-            try:
-                result = self.client.lists.interest_categories.interests.all(list_id=list_id,
-                                                                             category_id=interest_category_id,
-                                                                             get_all=True,
-                                                                             fields=fields)
-                interests = result['interests']
-                cache.set(cache_key, interests)
-            except:
-                return []
+    @uses_budget("lists", serve_cached=True)
+    @uses_lane_slot
+    def fetch_lists(self, fields):
+        if self.transport:
+            return self.transport.get_all("lists", "lists", fields=fields)
+        return self.client.lists.all(fields=fields, get_all=True)['lists']
+
+    def get_lists(self, fields='lists.id,lists.name'):
+        return self.get_cached_or_fallback("lists", [fields], lambda: self.fetch_lists(fields), [])
+
+    def get_audience_catalog(self):
+        return self.get_cached_or_fallback("audience-catalog", [],
+                                           lambda: AudienceCatalog(self.fetch_lists("lists.id,lists.name")),
+                                           AudienceCatalog([]))
+
+    def get_audience(self, list_id, fields="id,name"):
+        """
+        Returns a single audience, without loading the whole audience catalog
+        if it is not cached yet.
+        """
+        if not list_id:
+            return None
+
+        catalog = self.get_cached_if_present("audience-catalog")
+        if catalog is not None and catalog.get(list_id):
+            return catalog.get(list_id)
+
+        def fetch():
+            charge_call(self.tenant_id, "audience", list_id, serve_cached=True)
+            with lane_slot(self.tenant_id):
+                if self.transport:
+                    return self.transport.get(f"lists/{list_id}", fields=fields)
+                return self.client.lists.get(list_id=list_id, fields=fields)
+
+        return self.get_cached_or_fallback("audience", [list_id, fields], fetch, None)
+
+    def get_schema_snapshot(self, list_id):
+        """
+        Returns the schema snapshot of the audience stored in the database, used when
+        nothing is cached yet, and queues a refresh of it from Mailchimp.
+        """
+        from .snapshots import enqueue_audience_schema_refresh, get_audience_schema_snapshot
+
+        if list_id not in self._schema_snapshots:
+            snapshot = get_audience_schema_snapshot(self.tenant_id, list_id)
+            if snapshot is not None:
+                metrics.increment("cache.schema_snapshot", data=list_id)
+                enqueue_audience_schema_refresh(self.tenant_id, list_id)
+            self._schema_snapshots[list_id] = snapshot
+
+        return self._schema_snapshots[list_id]
+
+    @uses_budget("merge_fields", serve_cached=True)
+    @uses_lane_slot
+    def fetch_merge_fields(self, list_id, fields=MERGE_FIELDS_FIELDS):
+        from .snapshots import update_snapshot_merge_fields
+
+        if self.transport:
+            merge_fields = self.transport.get_all(f"lists/{list_id}/merge-fields", "merge_fields", fields=fields)
+        else:
+            merge_fields = self.client.lists.merge_fields.all(list_id=list_id, get_all=True,
+                                                              fields=fields)['merge_fields']
+        self.check_audience_schema_change(list_id, f"merge-fields-{fields}", merge_fields)
+        if fields == MERGE_FIELDS_FIELDS:
+            update_snapshot_merge_fields(self.tenant_id, list_id, merge_fields)
+        return merge_fields
+
+    @uses_budget("interest_categories", serve_cached=True)
+    @uses_lane_slot
+    def fetch_interest_categories(self, list_id, fields=INTEREST_CATEGORIES_FIELDS):
+        from .snapshots import update_snapshot_interest_categories
+
+        if self.transport:
+            categories = self.transport.get_all(f"lists/{list_id}/interest-categories", "categories",
+                                                fields=fields)
+        else:
+            categories = self.client.lists.interest_categories.all(list_id=list_id, get_all=True,
+                                                                   fields=fields)['categories']
+        self.check_audience_schema_change(list_id, f"categories-{fields}", categories)
+        if fields == INTEREST_CATEGORIES_FIELDS:
+            update_snapshot_interest_categories(self.tenant_id, list_id, categories)
+        return categories
+
+    @uses_budget("interests", serve_cached=True)
+    @uses_lane_slot
+    def fetch_interests(self, list_id, interest_category_id, fields=INTERESTS_FIELDS):
+        from .snapshots import update_snapshot_interests
 
+        if self.transport:
+            interests = self.transport.get_all(
+                f"lists/{list_id}/interest-categories/{interest_category_id}/interests", "interests",
+                fields=fields)
+        else:
+            interests = self.client.lists.interest_categories.interests.all(list_id=list_id,
+                                                                            category_id=interest_category_id,
+                                                                            get_all=True,
+                                                                            fields=fields)['interests']
+        self.check_audience_schema_change(list_id, f"interests-{interest_category_id}-{fields}", interests)
+        if fields == INTERESTS_FIELDS:
+            update_snapshot_interests(self.tenant_id, list_id, interest_category_id, interests)
         return interests
 
+    def get_merge_fields_for_list(self, list_id, fields=MERGE_FIELDS_FIELDS):
+        def cold():
+            snapshot = self.get_schema_snapshot(list_id)
+            return snapshot.merge_fields if snapshot is not None else None
+
+        return self.get_cached_or_fallback("merge-fields", [list_id, fields],
+                                           lambda: self.fetch_merge_fields(list_id, fields), [],
+                                           cold=cold if fields == MERGE_FIELDS_FIELDS else None)
+
+    def get_interest_categories_for_list(self, list_id, fields=INTEREST_CATEGORIES_FIELDS):
+        def cold():
+            snapshot = self.get_schema_snapshot(list_id)
+            return snapshot.get_interest_categories() if snapshot is not None else None
+
+        return self.get_cached_or_fallback("categories", [list_id, fields],
+                                           lambda: self.fetch_interest_categories(list_id, fields), [],
+                                           cold=cold if fields == INTEREST_CATEGORIES_FIELDS else None)
+
+    def get_interests_for_interest_category(self, list_id, interest_category_id, fields=INTERESTS_FIELDS):
+        def cold():
+            snapshot = self.get_schema_snapshot(list_id)
+            return snapshot.get_interests(interest_category_id) if snapshot is not None else None
+
+        return self.get_cached_or_fallback("interests", [list_id, interest_category_id, fields],
+                                           lambda: self.fetch_interests(list_id, interest_category_id, fields), [],
+                                           cold=cold if fields == INTERESTS_FIELDS else None)
+
+    def refresh_audience_schema(self, list_id):
+        """
+        Fetches the merge fields and interest groups of an audience from Mailchimp,
+        replacing the cached data and the schema snapshot. Exceptions are not caught.
+        """
+        categories = self.fetch_interest_categories(list_id)
+
+        self.update_cached_many([
+            ("merge-fields", [list_id, MERGE_FIELDS_FIELDS], self.fetch_merge_fields(list_id)),
+            ("categories", [list_id, INTEREST_CATEGORIES_FIELDS], categories),
+        ] + [
+            ("interests", [list_id, category["id"], INTERESTS_FIELDS], self.fetch_interests(list_id, category["id"]))
+            for category in categories
+        ])
+
+        # the composite schema is rebuilt from the refreshed entries on next use
+        cache.delete(self.make_cache_key("list-schema", list_id))
+
+    def get_list_schema(self, list_id):
+        """
+        Returns the ListSchema of an audience. When it is cached, this is a single
+        cache read, whatever the number of interest categories.
+        """
+        cache_key = self.make_cache_key("list-schema", list_id)
+        with timed_phase("cache"):
+            entry = cache.get(cache_key)
+
+        if entry is not None and entry.is_fresh():
+            return entry.value
+
+        schema = self.build_list_schema(list_id)
+
+        # don't keep a schema built from fallback data for longer than the fallback
+        if not self.degraded:
+            self.set_cached(cache_key, schema)
+
+        return schema
+
+    def build_list_schema(self, list_id):
+        """
+        Builds the ListSchema of an audience from the cached entries of its parts,
+        read with one cache round trip for the merge fields and interest categories,
+        and one for the interests. Parts that are not cached and fresh
+        are fetched with their getter.
+        """
+        def get_fresh_values(keys):
+            with timed_phase("cache"):
+                entries = cache.get_many(keys.values())
+            return {name: entries[key].value for name, key in keys.items()
+                    if key in entries and entries[key].is_fresh()}
+
+        values = get_fresh_values({
+            "merge-fields": self.make_cache_key("merge-fields", list_id, MERGE_FIELDS_FIELDS),
+            "categories": self.make_cache_key("categories", list_id, INTEREST_CATEGORIES_FIELDS),
+        })
+
+        merge_fields = values["merge-fields"] if "merge-fields" in values \
+            else self.get_merge_fields_for_list(list_id)
+        categories = values["categories"] if "categories" in values \
+            else self.get_interest_categories_for_list(list_id)
+
+        interests = get_fresh_values({
+            category.get("id"): self.make_cache_key("interests", list_id, category.get("id"), INTERESTS_FIELDS)
+            for category in categories
+        })
+
+        interest_categories = []
+        for category in categories:
+            category_id = category.get("id")
+            if category_id not in interests:
+                interests[category_id] = self.get_interests_for_interest_category(list_id, category_id)
+            interest_categories.append({**category, "interests": interests[category_id]})
+
+        return ListSchema(list_id, merge_fields, interest_categories)
+
     def get_interests_for_list(self, list_id):
-        interest_categories = self.get_interest_categories_for_list(list_id=list_id)
+        return self.get_list_schema(list_id).get_interest_groups()
 
-        categories = []
+    @uses_budget("members")
+    @uses_lane_slot
+    def get_members_page(self, list_id, offset, count, **params):
+        if self.transport:
+            result = self.transport.get(f"lists/{list_id}/members", offset=offset, count=count, **params)
+        else:
+            result = self.client.lists.members.all(list_id=list_id, offset=offset, count=count, **params)
+        return result.get("members", [])
 
-        for category in interest_categories:
-            category_id = category.get('id', '')
+    def iter_members(self, list_id, since=None, fields=None, status=None, page_size=1000):
+        """
+        Yields the members of an audience, fetching them page by page.
 
-            interest_category = {
-                "id": category_id,
-                "title": category.get('title', ''),
-                'type': category.get('type', '')
-            }
+        The next page is fetched in a background thread while the caller processes
+        the current one, so at most two pages are held in memory.
 
-            interests = self.get_interests_for_interest_category(list_id=list_id, interest_category_id=category_id)
+        :param list_id: the audience id.
+        :param since: only return members changed after this datetime or ISO 8601 string.
+        :param fields: comma separated list of member fields to return, e.g. "members.id,members.status".
+        :param status: only return members with this status, e.g. "subscribed".
+        :param page_size: number of members per request, up to 1000.
+        """
+        params = {}
+        if since:
+            params["since_last_changed"] = since.isoformat() if hasattr(since, "isoformat") else since
+        if fields:
+            params["fields"] = fields
+        if status:
+            params["status"] = status
 
-            interest_category['interests'] = interests
+        # fetch in the caller's context, so that pages are fetched in its priority lane
+        context = copy_context()
 
-            categories.append(interest_category)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            offset = 0
+            next_page = executor.submit(context.run, self.get_members_page, list_id, offset, page_size, **params)
 
-        return categories
+            while next_page is not None:
+                members = next_page.result()
+                offset += len(members)
+
+                next_page = None
+                if len(members) == page_size:
+                    next_page = executor.submit(context.run, self.get_members_page, list_id, offset, page_size,
+                                                **params)
+
+                yield from members
+                del members
 
+    @uses_budget("members")
+    @uses_lane_slot
+    def get_member(self, list_id, subscriber_hash, fields="id,status"):
+        """
+        Returns a member of an audience, whatever its status, by subscriber hash,
+        or None if the address is not a member of the audience.
+        """
+        try:
+            if self.transport:
+                return self.transport.get(f"lists/{list_id}/members/{subscriber_hash}", fields=fields)
+            return self.client.lists.members.get(list_id=list_id, subscriber_hash=subscriber_hash, fields=fields)
+        except MailChimpError as e:
+            if get_mailchimp_error_status(e) == 404:
+                return None
+            raise
+
+    @uses_budget("subscribe")
+    @uses_lane_slot
     def add_user_to_list(self, list_id, data):
+        if self.transport:
+            return self.transport.post(f"lists/{list_id}/members", data)
         return self.client.lists.members.create(list_id=list_id, data=data)
 
+    @uses_budget("tags")
+    @uses_lane_slot
+    def add_member_tags(self, list_id, email, tags):
+        """
+        Adds tags to an existing member of an audience.
+        """
+        data = {"tags": [{"name": tag, "status": "active"} for tag in tags]}
+        subscriber_hash = get_subscriber_hash(email)
+        if self.transport:
+            return self.transport.post(f"lists/{list_id}/members/{subscriber_hash}/tags", data)
+        return self.client.lists.members.tags.update(list_id=list_id, subscriber_hash=subscriber_hash, data=data)
+
+    @uses_budget("batch_subscribe")
+    @uses_lane_slot
+    def batch_add_users_to_list(self, list_id, members, update_existing=False):
+        data = {
+            "members": members,
+            "update_existing": update_existing,
+        }
+        if self.transport:
+            return self.transport.post(f"lists/{list_id}", data)
+        return self.client.lists.update_members(list_id=list_id, data=data)
+
+    @uses_budget("campaigns")
+    @uses_lane_slot
+    def create_campaign(self, data):
+        return self.client.campaigns.create(data=data)
+
+    @uses_budget("campaigns")
+    @uses_lane_slot
+    def get_campaign_status(self, campaign_id):
+        return self.client.campaigns.get(campaign_id=campaign_id, fields="status").get("status")
+
+    @uses_budget("campaigns")
+    @uses_lane_slot
+    def update_campaign(self, campaign_id, data):
+        return self.client.campaigns.update(campaign_id=campaign_id, data=data)
+
+    @uses_budget("campaigns")
+    @uses_lane_slot
+    def set_campaign_content(self, campaign_id, data):
+        return self.client.campaigns.content.update(campaign_id=campaign_id, data=data)
+
+    @uses_budget("ping")
+    @uses_lane_slot
     def ping(self):
         return self.client.ping.get()
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class Wagtailmailchimpconfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'wagtailmailchimp'
+
+    def ready(self):
+        from .signal_handlers import register_signal_handlers
+
+        register_signal_handlers()
@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from mailchimp3.mailchimpclient import MailChimpError
+
+logger = logging.getLogger(__name__)
+
+
+def get_subscriber_hash(email):
+    """
+    Returns the Mailchimp subscriber hash, the MD5 hash of the lowercase email address.
+    """
+    return hashlib.md5((email or "").strip().lower().encode("utf-8")).hexdigest()
+
+
+def get_mailchimp_error_title(error):
+    if error.args and isinstance(error.args[0], dict):
+        return error.args[0].get("title") or ""
+    return ""
+
+
+def get_mailchimp_error_status(error):
+    if error.args and isinstance(error.args[0], dict):
+        return error.args[0].get("status")
+    return None
+
+
+def audit_log_enabled():
+    return getattr(settings, "WAGTAILMAILCHIMP_AUDIT_LOG_ENABLED", True)
+
+
+def get_daily_rollups(attempts):
+    """
+    Returns the counts and latencies of the given attempts per (day, page id), to
+    add to the daily rollups of the report.
+    """
+    from .models import MailchimpSubscriptionAttempt
+
+    outcome_fields = {
+        MailchimpSubscriptionAttempt.OUTCOME_SUBSCRIBED: "subscribed",
+        MailchimpSubscriptionAttempt.OUTCOME_DUPLICATE: "duplicate",
+        MailchimpSubscriptionAttempt.OUTCOME_FAILED: "failed",
+    }
+    rollups = {}
+
+    for attempt in attempts:
+        key = (timezone.localdate(attempt.created_at), attempt.page_id)
+        rollup = rollups.setdefault(key, {"total": 0, "subscribed": 0, "duplicate": 0, "failed": 0,
+                                          "latency_total_ms": 0, "max_latency_ms": 0})
+        rollup["total"] += 1
+        rollup[outcome_fields[attempt.outcome]] += 1
+        rollup["latency_total_ms"] += attempt.latency_ms
+        rollup["max_latency_ms"] = max(rollup["max_latency_ms"], attempt.latency_ms)
+
+    return rollups
+
+
+def add_to_daily_rollup(day, page_id, counts):
+    from .models import MailchimpSubscriptionDailyRollup
+
+    rollups = MailchimpSubscriptionDailyRollup.objects.filter(day=day, page_id=page_id)
+    increments = {name: F(name) + value for name, value in counts.items() if name != "max_latency_ms"}
+    increments["max_latency_ms"] = Greatest("max_latency_ms", Value(counts["max_latency_ms"]))
+
+    if rollups.update(**increments):
+        return
+
+    try:
+        with transaction.atomic():
+            MailchimpSubscriptionDailyRollup.objects.create(day=day, page_id=page_id, **counts)
+    except IntegrityError:
+        # another process created the rollup of the day first
+        rollups.update(**increments)
+
+
+def write_subscription_attempts(attempts):
+    from .models import MailchimpSubscriptionAttempt
+
+    try:
+        with transaction.atomic():
+            MailchimpSubscriptionAttempt.objects.bulk_create(attempts, batch_size=500)
+            for (day, page_id), counts in get_daily_rollups(attempts).items():
+                add_to_daily_rollup(day, page_id, counts)
+    except Exception:
+        logger.exception("Could not write %s Mailchimp subscription attempts to the audit log", len(attempts))
+
+
+def record_subscription_attempt(page, list_id, email, outcome, latency_ms, error_title=""):
+    """
+    Writes the attempt to the audit log once the current transaction is committed, or
+    straight away outside of a transaction, so that no attempt is held in memory.
+    """
+    from .models import MailchimpSubscriptionAttempt
+
+    if not audit_log_enabled():
+        return
+
+    attempt = MailchimpSubscriptionAttempt(
+        created_at=timezone.now(),
+        page_id=getattr(page, "pk", None),
+        list_id=list_id or "",
+        subscriber_hash=get_subscriber_hash(email),
+        outcome=outcome,
+        error_title=(error_title or "")[:100],
+        latency_ms=max(int(latency_ms), 0),
+    )
+    transaction.on_commit(partial(write_subscription_attempts, [attempt]))
+
+
+@contextmanager
+def track_subscription_attempt(page, list_id, email):
+    """
+    Times the Mailchimp call made inside the block and records its outcome in
+    the audit log. Exceptions are re-raised.
+    """
+    from .models import MailchimpSubscriptionAttempt
+
+    outcome = MailchimpSubscriptionAttempt.OUTCOME_SUBSCRIBED
+    error_title = ""
+    start = time.perf_counter()
+
+    try:
+        yield
+    except MailChimpError as e:
+        error_title = get_mailchimp_error_title(e)
+        if error_title == "Member Exists":
+            outcome = MailchimpSubscriptionAttempt.OUTCOME_DUPLICATE
+        else:
+            outcome = MailchimpSubscriptionAttempt.OUTCOME_FAILED
+        raise
+    except Exception as e:
+        outcome = MailchimpSubscriptionAttempt.OUTCOME_FAILED
+        error_title = e.__class__.__name__
+        raise
+    finally:
+        latency_ms = (time.perf_counter() - start) * 1000
+        record_subscription_attempt(page, list_id, email, outcome, latency_ms, error_title=error_title)
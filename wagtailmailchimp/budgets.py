@@ -0,0 +1,352 @@
+"""
+Budgets of Mailchimp API calls.
+
+When budgets are enabled, every Mailchimp call is counted in the shared cache, per
+account and audience, in minute and UTC day windows, and per operation for the usage
+report, every few seconds. Once the calls of an
+account or an audience reach a soft limit, reads are served from the cache and
+sign-ups are queued until the window is over. Once they reach a hard limit, calls
+raise MailchimpBudgetError.
+
+Budgets are per account, that is per API key, so sites sharing an API key share them.
+"""
+import inspect
+import logging
+import threading
+import time
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .errors import MailchimpBudgetError
+
+logger = logging.getLogger(__name__)
+
+SOFT = "soft"
+HARD = "hard"
+
+WINDOWS = {
+    "minute": 60,
+    "day": 60 * 60 * 24,
+}
+
+# seconds between two additions of the in-process counts per operation to the cache
+OPERATION_COUNTS_FLUSH_INTERVAL = 5
+
+# the operations calls are counted in, in the order of the usage report
+OPERATIONS = (
+    "lists",
+    "audience",
+    "merge_fields",
+    "interest_categories",
+    "interests",
+    "members",
+    "subscribe",
+    "tags",
+    "batch_subscribe",
+    "campaigns",
+    "ping",
+)
+
+DEFAULT_BUDGET_SETTINGS = {
+    "enabled": False,
+    # {window: (soft limit, hard limit)} of the number of calls per Mailchimp account,
+    # windows are "minute" and "day", None for no limit
+    "account_limits": {},
+    # {window: (soft limit, hard limit)} of the number of calls per audience
+    "audience_limits": {},
+}
+
+BudgetStatus = namedtuple("BudgetStatus", ["level", "scope", "window", "retry_after"])
+
+WITHIN_BUDGET = BudgetStatus(None, None, None, None)
+
+_soft_limits_ignored = ContextVar("wagtailmailchimp_soft_limits_ignored", default=False)
+
+
+def get_budget_settings():
+    return {**DEFAULT_BUDGET_SETTINGS, **getattr(settings, "WAGTAILMAILCHIMP_BUDGETS", {})}
+
+
+@contextmanager
+def ignore_soft_limits():
+    """
+    Makes the Mailchimp calls of the block only stop at hard limits, for reads with
+    nothing cached to serve instead, and queued sign-ups.
+    """
+    token = _soft_limits_ignored.set(True)
+    try:
+        yield
+    finally:
+        _soft_limits_ignored.reset(token)
+
+
+def soft_limits_ignored():
+    return _soft_limits_ignored.get()
+
+
+def get_account_scope():
+    return "account"
+
+
+def get_audience_scope(list_id):
+    return f"audience-{list_id}"
+
+
+def get_operation_scope(operation):
+    return f"operation-{operation}"
+
+
+def get_counter_key(tenant_id, scope, window, now=None):
+    bucket = int((now or time.time()) // WINDOWS[window])
+    return f"wagtailmailchimp-budget-{tenant_id}-{scope}-{window}-{bucket}"
+
+
+def get_seconds_left(window, now=None):
+    return WINDOWS[window] - (now or time.time()) % WINDOWS[window]
+
+
+def get_usage(tenant_id, scopes, now=None):
+    """
+    Returns the number of calls of the account in the current windows, as a dict
+    of (scope, window) to count, for the given scopes. Never calls Mailchimp.
+    """
+    now = now or time.time()
+    keys = {get_counter_key(tenant_id, scope, window, now): (scope, window)
+            for scope in scopes for window in WINDOWS}
+    counts = cache.get_many(keys)
+    return {scope_window: counts.get(key, 0) for key, scope_window in keys.items()}
+
+
+def get_limits(budget_settings, list_id=None):
+    """
+    Yields the (scope, window, soft limit, hard limit) of the limits that apply
+    to a call to the given audience.
+    """
+    scoped_limits = [(get_account_scope(), budget_settings["account_limits"])]
+    if list_id:
+        scoped_limits.append((get_audience_scope(list_id), budget_settings["audience_limits"]))
+
+    for scope, limits in scoped_limits:
+        for window, (soft_limit, hard_limit) in limits.items():
+            if soft_limit is not None or hard_limit is not None:
+                yield scope, window, soft_limit, hard_limit
+
+
+def get_budget_status(tenant_id, list_id=None, budget_settings=None):
+    """
+    Returns the BudgetStatus of a call to the given audience: the level, SOFT or
+    HARD, of the most restrictive limit the calls reached, with the scope and window
+    of that limit, and the number of seconds until the window is over. Its level is
+    None if no limit was reached.
+    """
+    budget_settings = budget_settings or get_budget_settings()
+    limits = list(get_limits(budget_settings, list_id)) if budget_settings["enabled"] else []
+    if not limits:
+        return WITHIN_BUDGET
+
+    now = time.time()
+    usage = get_usage(tenant_id, {scope for scope, _, _, _ in limits}, now)
+    return get_limits_status(limits, usage, now)
+
+
+def get_limits_status(limits, usage, now):
+    status = WITHIN_BUDGET
+
+    for scope, window, soft_limit, hard_limit in limits:
+        used = usage[(scope, window)]
+        if hard_limit is not None and used >= hard_limit:
+            level = HARD
+        elif soft_limit is not None and used >= soft_limit:
+            level = SOFT
+        else:
+            continue
+
+        retry_after = get_seconds_left(window, now)
+        # a hard limit wins over a soft one, then the limit that lasts the longest
+        if status.level is None or (level == HARD, retry_after) > (status.level == HARD, status.retry_after):
+            status = BudgetStatus(level, scope, window, retry_after)
+
+    return status
+
+
+def hit_counter(key, timeout, delta=1):
+    """
+    Adds delta to the counter and returns its new value, in a single round trip once
+    the counter of the window exists.
+    """
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, delta, timeout):
+            return delta
+        return cache.incr(key, delta)
+
+
+def release_counter(key):
+    try:
+        cache.decr(key)
+    except ValueError:
+        # the window is over
+        pass
+
+
+class OperationCounts:
+    """
+    In-process counts of the calls per operation, only shown by the usage report,
+    added to the counters of the cache at most every OPERATION_COUNTS_FLUSH_INTERVAL
+    seconds rather than on every call.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.flushed_at = time.monotonic()
+
+    def add(self, tenant_id, operation, now):
+        scope = get_operation_scope(operation)
+
+        with self.lock:
+            for window, seconds in WINDOWS.items():
+                # counted in the window of the call, even if added to the cache in the next one
+                self.counts[(get_counter_key(tenant_id, scope, window, now), seconds * 2)] += 1
+
+            if time.monotonic() - self.flushed_at < OPERATION_COUNTS_FLUSH_INTERVAL:
+                return
+            counts, self.counts = self.counts, Counter()
+            self.flushed_at = time.monotonic()
+
+        for (key, timeout), count in counts.items():
+            hit_counter(key, timeout, count)
+
+
+operation_counts = OperationCounts()
+
+
+def charge_call(tenant_id, operation, list_id=None, serve_cached=False):
+    """
+    Counts a Mailchimp call of the account against its budgets, and those of the
+    audience, if any. Raises MailchimpBudgetError, without counting the call, if the
+    calls reached a hard limit, or a soft limit when serve_cached is set, for reads
+    whose callers fall back to cached data.
+    """
+    budget_settings = get_budget_settings()
+    if not budget_settings["enabled"]:
+        return
+
+    now = time.time()
+    scopes = [get_account_scope()]
+    if list_id:
+        scopes.append(get_audience_scope(list_id))
+    keys = {(scope, window): get_counter_key(tenant_id, scope, window, now) for scope in scopes for window in WINDOWS}
+
+    # the call is counted before the limits are checked, against the counts returned by the cache, so that
+    # concurrent calls can't all pass the check before any of them is counted
+    usage = {
+        scope_window: hit_counter(key, WINDOWS[scope_window[1]] * 2) - 1
+        for scope_window, key in keys.items()
+    }
+    status = get_limits_status(get_limits(budget_settings, list_id), usage, now)
+
+    if status.level == HARD or (status.level == SOFT and serve_cached and not soft_limits_ignored()):
+        # the call is not made
+        for key in keys.values():
+            release_counter(key)
+
+        metrics.increment(f"budget.{status.level}_limit", operation=operation, window=status.window)
+
+        # log the limit once per window, not once per call
+        warned_key = f"{get_counter_key(tenant_id, status.scope, status.window)}-{status.level}-warned"
+        if cache.add(warned_key, True, int(status.retry_after) + 1):
+            logger.warning("Mailchimp calls of account %s reached the %s limit of %s per %s",
+                           tenant_id, status.level, status.scope, status.window)
+
+        raise MailchimpBudgetError(
+            f"The {status.level} limit of Mailchimp calls per {status.window} of the {status.scope} was reached",
+            level=status.level, retry_after=status.retry_after)
+
+    operation_counts.add(tenant_id, operation, now)
+
+
+def uses_budget(operation, serve_cached=False):
+    """
+    Makes the decorated MailchimpApi method charge its calls to the budgets of its
+    account, and of the audience given as its list_id argument, if it has one.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+        takes_list_id = "list_id" in signature.parameters
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            list_id = signature.bind(self, *args, **kwargs).arguments.get("list_id") if takes_list_id else None
+            charge_call(self.tenant_id, operation, list_id, serve_cached=serve_cached)
+            return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def get_known_audience_ids():
+    """
+    Returns the ids of the audiences set on sign-up pages, integration form pages and
+    the Mailchimp settings of the sites.
+    """
+    from .frontend_cache import get_mailchimp_page_models
+    from .models import MailchimpSettings, get_additional_audiences
+    from .sync import get_integration_form_page_models
+
+    list_ids = set(MailchimpSettings.objects.values_list("default_audience_id", flat=True))
+
+    for models, field in ((get_mailchimp_page_models(), "list_id"),
+                          (get_integration_form_page_models(), "audience_list_id")):
+        for model in models:
+            for list_id, additional_audiences in model.objects.values_list(field, "additional_audiences"):
+                list_ids.add(list_id)
+                list_ids.update(audience["list_id"] for audience in get_additional_audiences(additional_audiences))
+
+    return sorted(list_id for list_id in list_ids if list_id)
+
+
+def get_usage_report(tenant_id, list_ids=()):
+    """
+    Returns the rows of the usage report of an account: the calls of the account, of
+    each of the given audiences that made any, and of each operation, in the current
+    windows, with their limits. Never calls Mailchimp.
+    """
+    budget_settings = get_budget_settings()
+
+    scopes = [(get_account_scope(), "account", None)]
+    scopes += [(get_audience_scope(list_id), "audience", list_id) for list_id in list_ids]
+    scopes += [(get_operation_scope(operation), "operation", operation) for operation in OPERATIONS]
+
+    usage = get_usage(tenant_id, [scope for scope, _, _ in scopes])
+    rows = []
+
+    for scope, kind, name in scopes:
+        limits = budget_settings.get(f"{kind}_limits", {})
+        windows = []
+        level = None
+
+        for window in WINDOWS:
+            used = usage[(scope, window)]
+            soft_limit, hard_limit = limits.get(window, (None, None))
+            windows.append({"used": used, "soft_limit": soft_limit, "hard_limit": hard_limit})
+
+            if hard_limit is not None and used >= hard_limit:
+                level = HARD
+            elif soft_limit is not None and used >= soft_limit and level is None:
+                level = SOFT
+
+        if kind != "account" and not any(window["used"] for window in windows):
+            continue
+
+        rows.append({"kind": kind, "name": name, "windows": windows, "level": level})
+
+    return rows
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from mailchimp3.mailchimpclient import MailChimpError
+
+from .api import MailchimpApi
+from .audit import get_mailchimp_error_status
+
+logger = logging.getLogger(__name__)
+
+# statuses of campaigns that can't be changed anymore, a new campaign is created instead
+SENT_CAMPAIGN_STATUSES = ("sending", "sent", "canceling", "canceled")
+
+
+def get_campaign_sync_pending_key(page_id):
+    return f"wagtailmailchimp-campaign-sync-pending-{page_id}"
+
+
+def get_campaign_sync_pending_timeout():
+    return getattr(settings, "WAGTAILMAILCHIMP_CAMPAIGN_SYNC_PENDING_TIMEOUT", 60 * 10)
+
+
+_warned_sync_in_request = False
+
+
+def enqueue_page_campaign_sync(page_id):
+    """
+    Queues a campaign sync for the page, unless one is already queued.
+
+    Repeated publishes of a page before the worker picks up the task are
+    coalesced into a single sync, which uses the latest published content.
+    """
+    from .tasks import sync_page_campaign_task
+
+    if not cache.add(get_campaign_sync_pending_key(page_id), True, get_campaign_sync_pending_timeout()):
+        return False
+
+    global _warned_sync_in_request
+    if not _warned_sync_in_request and not sync_page_campaign_task.get_backend().supports_defer:
+        # a backend that can't run tasks later, like the ImmediateBackend, has no worker either
+        logger.warning("Mailchimp campaigns are synced in the publish request, configure a task backend with a "
+                       "worker to sync them in the background")
+        _warned_sync_in_request = True
+
+    try:
+        sync_page_campaign_task.enqueue(page_id)
+    except Exception:
+        cache.delete(get_campaign_sync_pending_key(page_id))
+        raise
+
+    return True
+
+
+def get_data_hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode("utf-8")).hexdigest()
+
+
+def get_api_for_page(page):
+    from .models import MailchimpSettings
+
+    site = page.get_site()
+    if site is None:
+        return None
+
+    mc_settings = MailchimpSettings.for_site(site)
+    if not mc_settings.api_key:
+        return None
+
+    return MailchimpApi(api_key=mc_settings.api_key)
+
+
+def create_page_campaign(api, page, campaign_data):
+    from .models import MailchimpPageCampaign
+
+    campaign = api.create_campaign(campaign_data)
+    page_campaign, created = MailchimpPageCampaign.objects.update_or_create(
+        page_id=page.pk, defaults={"campaign_id": campaign.get("id"), "content_hash": ""}
+    )
+    return page_campaign
+
+
+def is_campaign_sent(api, campaign_id, error):
+    """
+    Returns whether an update of the campaign failed because the campaign was already
+    sent, or is being sent, so that it can't be changed anymore.
+    """
+    if get_mailchimp_error_status(error) != 400:
+        return False
+
+    try:
+        status = api.get_campaign_status(campaign_id)
+    except MailChimpError:
+        return False
+
+    return status in SENT_CAMPAIGN_STATUSES
+
+
+def should_replace_campaign(api, page, campaign_id, error):
+    """
+    Returns whether a failed change of the campaign of the page should be made to a
+    new campaign instead, because the campaign was deleted on Mailchimp or sent.
+    """
+    if get_mailchimp_error_status(error) == 404:
+        logger.info("Mailchimp campaign %s of page %s was deleted, creating a new one", campaign_id, page.pk)
+        return True
+
+    if is_campaign_sent(api, campaign_id, error):
+        logger.info("Mailchimp campaign %s of page %s was sent, creating a new one", campaign_id, page.pk)
+        return True
+
+    return False
+
+
+def sync_page_campaign(page):
+    """
+    Creates the Mailchimp campaign of the page, or updates it if it already exists.
+    A new campaign is created if the previous one was deleted on Mailchimp or sent.
+
+    Hashes of the campaign settings and content from the last sync are kept, so
+    that unchanged settings or content are not sent to Mailchimp again.
+    """
+    from .models import MailchimpPageCampaign
+
+    api = get_api_for_page(page)
+    if api is None:
+        logger.warning("Mailchimp API key is not set, not syncing campaign for page %s", page.pk)
+        return None
+
+    campaign_data = page.get_campaign_data()
+    update_data = {
+        "recipients": campaign_data["recipients"],
+        "settings": campaign_data["settings"],
+    }
+    settings_hash = get_data_hash(update_data)
+
+    page_campaign = MailchimpPageCampaign.objects.filter(page_id=page.pk).first()
+
+    if page_campaign and page_campaign.settings_hash != settings_hash:
+        try:
+            api.update_campaign(page_campaign.campaign_id, update_data)
+        except MailChimpError as e:
+            if not should_replace_campaign(api, page, page_campaign.campaign_id, e):
+                raise
+            page_campaign = None
+
+    if page_campaign is None:
+        page_campaign = create_page_campaign(api, page, campaign_data)
+
+    page_campaign.settings_hash = settings_hash
+
+    content = page.get_campaign_content()
+    content_hash = get_data_hash(content)
+
+    if page_campaign.content_hash != content_hash:
+        try:
+            api.set_campaign_content(page_campaign.campaign_id, content)
+        except MailChimpError as e:
+            # only the content changed since the campaign was deleted or sent
+            if not should_replace_campaign(api, page, page_campaign.campaign_id, e):
+                raise
+            page_campaign = create_page_campaign(api, page, campaign_data)
+            page_campaign.settings_hash = settings_hash
+            api.set_campaign_content(page_campaign.campaign_id, content)
+        page_campaign.content_hash = content_hash
+
+    page_campaign.save()
+
+    return page_campaign
@@ -6,3 +6,34 @@ class Error(Exception):
 
 class MailchimpApiError(Error):
     pass
+
+
+class MailchimpPayloadError(Error):
+    """
+    A member payload that Mailchimp would reject, found before sending it.
+    errors maps merge tags, EMAIL or INTERESTS to the list of reasons.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"{field}: {' '.join(reasons)}" for field, reasons in errors.items()))
+
+
+class MailchimpCapacityError(MailchimpApiError):
+    """
+    No Mailchimp capacity was left for a bulk call before its wait time was over.
+    """
+    pass
+
+
+class MailchimpBudgetError(MailchimpApiError):
+    """
+    A Mailchimp call was not made because the calls of its account or audience
+    reached a limit. level is "soft" or "hard", retry_after the number of seconds
+    until the window of the limit is over.
+    """
+
+    def __init__(self, message, level="hard", retry_after=None):
+        self.level = level
+        self.retry_after = retry_after
+        super().__init__(message)
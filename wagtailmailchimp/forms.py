@@ -4,6 +4,7 @@ from django import forms
 from django.utils.translation import gettext_lazy as _
 from django_countries.fields import CountryField
 
+from wagtailmailchimp.throttling import get_throttle_settings
 from wagtailmailchimp.widgets import CustomSelect
 
 
@@ -25,18 +26,19 @@ class MailChimpForm(forms.Form):
         # Initialize the form instance.
         super(MailChimpForm, self).__init__(*args, **kwargs)
 
-        # append compulsory email field
-        merge_fields.insert(0, ({
+        # prepend compulsory email field, without changing the given merge fields,
+        # which may be shared through the cache
+        self.merge_fields = [{
             "tag": "EMAIL",
             "name": "Email Address",
             "help_text": "Your Email Address",
             "type": "email",
             "required": "true",
             "options": {"size": 100}
-        }))
+        }] + list(merge_fields)
 
         # Add merge variable fields.
-        for merge_field in merge_fields:
+        for merge_field in self.merge_fields:
             for data in self.mailchimp_field_factory(merge_field).items():
                 name, field = data
                 self.fields.update({name: field})
@@ -49,6 +51,16 @@ class MailChimpForm(forms.Form):
 
                 self.fields.update({name: field})
 
+        # Add the field that bots fill in and people don't see, checked by the view.
+        honeypot_field = get_throttle_settings()["honeypot_field"]
+        if honeypot_field:
+            self.fields[honeypot_field] = forms.CharField(
+                label=_("Leave this field empty"),
+                required=False,
+                widget=forms.TextInput(attrs={"autocomplete": "off", "tabindex": "-1"}),
+                template_name="wagtailmailchimp/forms/honeypot_field.html",
+            )
+
     def mailchimp_field_factory(self, merge_field):
         """
         Returns a form field instance for specified MailChimp merge Field.
@@ -205,18 +217,59 @@ class MailChimpForm(forms.Form):
             return forms.ChoiceField(**kwargs)
 
 
+class SubscriptionReportFilterForm(forms.Form):
+    date_from = forms.DateField(label=_("From"), required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    date_to = forms.DateField(label=_("To"), required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    page_id = forms.IntegerField(label=_("Page ID"), required=False)
+
+
+class CachedFormFragment:
+    """
+    Stands in for an unbound MailChimpForm in templates.
+
+    Rendering it with {{ form }} outputs the cached form HTML. Any other use,
+    like iterating over its fields, builds the actual form.
+    """
+
+    def __init__(self, html, get_form):
+        self.html = html
+        self.get_form = get_form
+        self._form = None
+
+    @property
+    def form(self):
+        if self._form is None:
+            self._form = self.get_form()
+        return self._form
+
+    def __str__(self):
+        return self.html
+
+    def __html__(self):
+        return self.html
+
+    def __iter__(self):
+        return iter(self.form)
+
+    def __getitem__(self, name):
+        return self.form[name]
+
+    def __getattr__(self, name):
+        return getattr(self.form, name)
+
+
 class MailchimpIntegrationForm(forms.Form):
     def __init__(self, merge_fields=None, form_fields=None, *args, **kwargs):
         # Initialize the form instance.
         super(MailchimpIntegrationForm, self).__init__(*args, **kwargs)
 
         if merge_fields and form_fields:
-            merge_fields.insert(0, ({
+            merge_fields = [{
                 "tag": "EMAIL",
                 "name": "Email Address",
                 "type": "email",
                 "required": "true",
-            }))
+            }] + list(merge_fields)
 
             for field in merge_fields:
                 choices = [("", "-- Select field to merge--")]
@@ -0,0 +1,41 @@
+from django.apps import apps
+
+
+def get_page_surrogate_key(page_id):
+    return f"wagtailmailchimp-page-{page_id}"
+
+
+def get_audience_surrogate_key(list_id):
+    return f"wagtailmailchimp-audience-{list_id}"
+
+
+def get_mailchimp_page_models():
+    from .models import AbstractMailChimpPage
+
+    return [model for model in apps.get_models()
+            if issubclass(model, AbstractMailChimpPage) and not model._meta.abstract]
+
+
+def purge_audience_pages_from_cache(list_id):
+    """
+    Purges the live sign-up and integration form pages of the given audience from the
+    frontend cache, using the backends configured for wagtail.contrib.frontend_cache.
+    """
+    if not apps.is_installed("wagtail.contrib.frontend_cache"):
+        return
+
+    from wagtail.contrib.frontend_cache.utils import PurgeBatch
+
+    from wagtail.models import Page
+
+    from .models import MailchimpMergeFieldIndex
+
+    batch = PurgeBatch()
+    for model in get_mailchimp_page_models():
+        batch.add_pages(model.objects.live().filter(list_id=list_id))
+
+    # integration form pages subscribing to the audience
+    page_ids = MailchimpMergeFieldIndex.objects.filter(list_id=list_id).values("page_id")
+    batch.add_pages(Page.objects.live().filter(pk__in=page_ids).specific())
+
+    batch.purge()
@@ -0,0 +1,144 @@
+"""
+Priority lanes for Mailchimp API calls.
+
+Mailchimp limits the number of simultaneous connections per API key. When lanes are
+enabled, every call takes one of WAGTAILMAILCHIMP_LANES["capacity"] slots of its
+account, each a key of the shared cache, so the limit is shared by all processes.
+Interactive calls, the default, can use any slot. Bulk calls, made inside
+priority(BULK) blocks by imports, backfills and background tasks, can't use the
+slots reserved for interactive calls, so they only get the capacity sign-ups leave.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .errors import MailchimpCapacityError
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+DEFAULT_LANE_SETTINGS = {
+    "enabled": False,
+    # number of simultaneous Mailchimp calls per account, Mailchimp allows 10
+    "capacity": 10,
+    # number of those calls bulk work can't make
+    "interactive_reserved": 4,
+    # seconds after which the slot of a call is freed, even if the call never released it
+    "lease_timeout": 120,
+    # seconds to wait for a slot, interactive calls go ahead without one after that,
+    # bulk calls raise MailchimpCapacityError
+    "interactive_wait": 2,
+    "bulk_wait": 600,
+}
+
+_priority = ContextVar("wagtailmailchimp_priority", default=INTERACTIVE)
+_holding_slot = ContextVar("wagtailmailchimp_holding_slot", default=False)
+
+
+def get_lane_settings():
+    return {**DEFAULT_LANE_SETTINGS, **getattr(settings, "WAGTAILMAILCHIMP_LANES", {})}
+
+
+def get_priority():
+    return _priority.get()
+
+
+@contextmanager
+def priority(lane):
+    """
+    Makes the Mailchimp calls of the block in the given lane, INTERACTIVE or BULK.
+    """
+    token = _priority.set(lane)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def get_slot_key(tenant_id, index):
+    return f"wagtailmailchimp-lane-{tenant_id}-{index}"
+
+
+def try_acquire_slot(tenant_id, slots, lease_timeout):
+    """
+    Takes one of the first given number of slots of the account. Each slot is a cache
+    key holding the token of its holder, which expires after lease_timeout seconds,
+    so the slot of a process that died during a call is freed on its own. Returns the
+    (index, token) of the slot, or None if they were all taken.
+    """
+    slot_keys = [get_slot_key(tenant_id, index) for index in range(slots)]
+    taken = cache.get_many(slot_keys)
+    token = uuid.uuid4().hex
+
+    # the last slots are the ones reserved for interactive calls, take them first to
+    # leave the others to bulk calls
+    for slot_key in reversed(slot_keys):
+        if slot_key not in taken and cache.add(slot_key, token, lease_timeout):
+            return slot_keys.index(slot_key), token
+    return None
+
+
+def release_slot(tenant_id, slot):
+    index, token = slot
+    slot_key = get_slot_key(tenant_id, index)
+    # the lease expired during a call longer than the lease timeout, the slot may be someone else's
+    if cache.get(slot_key) == token:
+        cache.delete(slot_key)
+
+
+@contextmanager
+def lane_slot(tenant_id):
+    """
+    Holds a slot of the account for the Mailchimp call made in the block, in the lane
+    of the current priority, waiting for one if they are all taken.
+    """
+    lane_settings = get_lane_settings()
+    if not lane_settings["enabled"] or _holding_slot.get():
+        yield
+        return
+
+    lane = get_priority()
+    capacity = lane_settings["capacity"]
+    slots = capacity if lane == INTERACTIVE else max(capacity - lane_settings["interactive_reserved"], 1)
+    deadline = time.monotonic() + lane_settings[f"{lane}_wait"]
+    start = time.monotonic()
+
+    slot = try_acquire_slot(tenant_id, slots, lane_settings["lease_timeout"])
+    while slot is None and time.monotonic() < deadline:
+        time.sleep(0.05 if lane == INTERACTIVE else 0.25)
+        slot = try_acquire_slot(tenant_id, slots, lane_settings["lease_timeout"])
+
+    metrics.report("timing", "lane.wait_ms", round((time.monotonic() - start) * 1000, 2), lane=lane)
+
+    if slot is None:
+        if lane != INTERACTIVE:
+            metrics.increment("lane.timeout", lane=lane)
+            raise MailchimpCapacityError(f"No Mailchimp capacity left for {lane} calls")
+        # don't fail a sign-up because of the scheduler, go ahead over capacity
+        metrics.increment("lane.overflow", lane=lane)
+
+    metrics.increment("lane.calls", lane=lane)
+    holding = _holding_slot.set(True)
+    try:
+        yield
+    finally:
+        _holding_slot.reset(holding)
+        if slot is not None:
+            release_slot(tenant_id, slot)
+
+
+def uses_lane_slot(method):
+    """
+    Makes the decorated MailchimpApi method hold a lane slot of its account.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with lane_slot(self.tenant_id):
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,127 @@
+from django.core.management.base import BaseCommand
+
+from wagtailmailchimp.lanes import BULK, priority
+from wagtailmailchimp.models import MailchimpSyncCheckpoint
+from wagtailmailchimp.sync import (
+    MAX_BATCH_SIZE,
+    MemberBatchPusher,
+    get_api_key_for_page,
+    get_integration_form_pages,
+    iter_form_submissions,
+)
+
+
+class Command(BaseCommand):
+    help = "Push stored form submissions of Mailchimp integration form pages to their Mailchimp audiences. " \
+           "Progress is checkpointed, so an interrupted run resumes where it stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page", type=int, action="append", dest="page_ids",
+                            help="Only backfill submissions of this page id. Can be repeated.")
+        parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE,
+                            help="Number of members to push per Mailchimp request (max 500).")
+        parser.add_argument("--chunk-size", type=int, default=2000,
+                            help="Number of submissions to fetch per database round trip.")
+        parser.add_argument("--checkpoint", default="form-submissions-backfill",
+                            help="Prefix of the names of the checkpoints used to record the progress of each page.")
+        parser.add_argument("--reset", action="store_true",
+                            help="Ignore any saved progress and start from the first submission.")
+        parser.add_argument("--update-existing", action="store_true",
+                            help="Update the merge fields of members that already exist in the audience.")
+        parser.add_argument("--assume-opted-in", action="store_true",
+                            help="Push the submissions made before the opt-in was recorded, as if their "
+                                 "submitters opted in.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Build the member payloads without calling Mailchimp or saving progress.")
+
+    def handle(self, *args, **options):
+        # don't use the Mailchimp capacity reserved for sign-ups while the backfill runs
+        with priority(BULK):
+            pages = get_integration_form_pages(options["page_ids"])
+
+            if not pages:
+                self.stdout.write("No Mailchimp integration form pages with an audience found.")
+                return
+
+            pusher = MemberBatchPusher(batch_size=options["batch_size"], update_existing=options["update_existing"],
+                                       dry_run=options["dry_run"])
+
+            for page in sorted(pages, key=lambda page: page.pk):
+                api_key = get_api_key_for_page(page)
+                if not api_key:
+                    # its progress is kept, so that a later run pushes its submissions once the key is set
+                    self.stderr.write(f"Page {page.pk} has no Mailchimp API key, its submissions are skipped")
+                    pusher.stats["no_api_key"] += 1
+                    continue
+
+                self.backfill(page, api_key, pusher, options)
+
+            stats = pusher.stats
+            self.stdout.write(self.style.SUCCESS(
+                f"Done. Pushed {stats['pushed']} members: {stats['created']} created, {stats['updated']} updated, "
+                f"{stats['existing']} already subscribed, {stats['failed']} failed. "
+                f"Skipped {stats['not_opted_in']} submissions without opt-in, {stats['invalid']} invalid emails "
+                f"and {stats['no_api_key']} pages without a Mailchimp API key."
+            ))
+
+    def get_checkpoint(self, page, options):
+        """
+        Returns the checkpoint of the progress of the page, each page has its own so that
+        pages that can't be pushed yet don't hold back the others.
+        """
+        checkpoint_name = f"{options['checkpoint']}:page-{page.pk}"
+        checkpoint = MailchimpSyncCheckpoint.objects.filter(name=checkpoint_name).first() \
+            or MailchimpSyncCheckpoint(name=checkpoint_name)
+
+        if options["reset"]:
+            checkpoint.last_processed_id = 0
+            checkpoint.processed_count = 0
+
+        if checkpoint.last_processed_id:
+            self.stdout.write(f"Resuming page {page.pk} after submission {checkpoint.last_processed_id}")
+
+        return checkpoint
+
+    def backfill(self, page, api_key, pusher, options):
+        dry_run = options["dry_run"]
+        checkpoint = self.get_checkpoint(page, options)
+        last_id = checkpoint.last_processed_id
+        pushed = pusher.stats["pushed"]
+
+        for submission in iter_form_submissions(page.get_submission_class(), [page.pk], after_id=last_id,
+                                                chunk_size=options["chunk_size"]):
+            try:
+                member = page.get_mc_submission_member_data(submission, assume_opted_in=options["assume_opted_in"])
+            except Exception as e:
+                self.stderr.write(f"Could not build Mailchimp member data for submission {submission.pk}: {e}")
+                pusher.stats["failed"] += 1
+            else:
+                if member is None:
+                    pusher.stats["not_opted_in"] += 1
+                else:
+                    pusher.add(api_key, page.audience_list_id, member)
+
+            last_id = submission.pk
+
+            # only move the checkpoint once everything before it has been pushed
+            if pusher.pending_count >= pusher.batch_size:
+                pusher.flush()
+                pushed = self.save_checkpoint(checkpoint, last_id, pusher, pushed, dry_run)
+
+        pusher.flush()
+        self.save_checkpoint(checkpoint, last_id, pusher, pushed, dry_run)
+
+    def save_checkpoint(self, checkpoint, last_id, pusher, pushed, dry_run):
+        """
+        Saves the progress up to last_id, counting the members pushed since the previous save,
+        when the pusher had pushed `pushed` members. Returns the number of members pushed so far.
+        """
+        if dry_run:
+            return pusher.stats["pushed"]
+
+        checkpoint.last_processed_id = last_id
+        checkpoint.processed_count += pusher.stats["pushed"] - pushed
+        checkpoint.save()
+
+        self.stdout.write(f"{checkpoint.name}: {checkpoint.processed_count} members pushed")
+        return pusher.stats["pushed"]
@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from wagtailmailchimp.models import MailchimpAudienceSchema
+
+
+class Command(BaseCommand):
+    help = "Write the schema snapshots of Mailchimp audiences to a JSON file, to be loaded with " \
+           "mailchimp_load_schemas, for example when building a container image."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", help="File to write to. Defaults to the standard output.")
+        parser.add_argument("--list", action="append", dest="list_ids",
+                            help="Only dump the snapshot of this audience id. Can be repeated.")
+
+    def handle(self, *args, **options):
+        snapshots = MailchimpAudienceSchema.objects.order_by("tenant_id", "list_id")
+        if options["list_ids"]:
+            snapshots = snapshots.filter(list_id__in=options["list_ids"])
+
+        data = [{
+            "tenant_id": snapshot.tenant_id,
+            "list_id": snapshot.list_id,
+            "version": snapshot.version,
+            "fetched_at": snapshot.fetched_at,
+            "merge_fields": snapshot.merge_fields,
+            "interest_categories": snapshot.interest_categories,
+        } for snapshot in snapshots]
+
+        output = json.dumps(data, cls=DjangoJSONEncoder, indent=2)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                f.write(output)
+            self.stderr.write(f"Dumped {len(data)} schema snapshots to {options['output']}")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from wagtailmailchimp.models import MailchimpAudienceSchema
+
+
+class Command(BaseCommand):
+    help = "Load schema snapshots of Mailchimp audiences written by mailchimp_dump_schemas. " \
+           "Snapshots fetched more recently than the loaded ones are kept, unless --overwrite is given."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSON file written by mailchimp_dump_schemas.")
+        parser.add_argument("--overwrite", action="store_true",
+                            help="Replace existing snapshots even if they are more recent.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        loaded = skipped = 0
+
+        with transaction.atomic():
+            for item in data:
+                fetched_at = parse_datetime(item["fetched_at"])
+                snapshot = MailchimpAudienceSchema.objects.filter(tenant_id=item["tenant_id"],
+                                                                  list_id=item["list_id"]).first()
+
+                if snapshot is None:
+                    snapshot = MailchimpAudienceSchema(tenant_id=item["tenant_id"], list_id=item["list_id"])
+                elif snapshot.fetched_at > fetched_at and not options["overwrite"]:
+                    skipped += 1
+                    continue
+
+                snapshot.version = item["version"]
+                snapshot.fetched_at = fetched_at
+                snapshot.merge_fields = item["merge_fields"]
+                snapshot.interest_categories = item["interest_categories"]
+                snapshot.save()
+                loaded += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} schema snapshots, kept {skipped} more recent ones."))
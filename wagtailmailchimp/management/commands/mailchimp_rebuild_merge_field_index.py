@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from wagtailmailchimp.models import MailchimpMergeFieldIndex
+from wagtailmailchimp.sync import get_integration_form_pages
+
+
+class Command(BaseCommand):
+    help = "Rebuild the index of the Mailchimp merge tags mapped by integration form pages, " \
+           "for example after upgrading, or after pages were changed without saving them."
+
+    def handle(self, *args, **options):
+        rows = [
+            MailchimpMergeFieldIndex(list_id=page.audience_list_id, merge_tag=tag, page_id=page.pk)
+            for page in get_integration_form_pages()
+            for tag in page.get_mc_merge_field_index_tags()
+        ]
+
+        with transaction.atomic():
+            MailchimpMergeFieldIndex.objects.all().delete()
+            MailchimpMergeFieldIndex.objects.bulk_create(rows, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {len(rows)} merge tags."))
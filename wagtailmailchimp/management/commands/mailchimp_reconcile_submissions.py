@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from wagtailmailchimp.api import MailchimpApi
+from wagtailmailchimp.audit import get_subscriber_hash
+from wagtailmailchimp.lanes import BULK, priority
+from wagtailmailchimp.sync import (
+    MAX_BATCH_SIZE,
+    get_integration_form_pages,
+    group_pages_by_audience,
+    group_pages_by_submission_class,
+    iter_form_submissions,
+    remove_existing_members,
+)
+from wagtailmailchimp.tasks import resubscribe_submissions_task
+
+
+class Command(BaseCommand):
+    help = "Find the recent opted-in form submissions of Mailchimp integration form pages whose submitter is not " \
+           "a member of the page audiences, and queue them to be pushed to Mailchimp again. Run it on a schedule."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7,
+                            help="Check the submissions of the last number of days.")
+        parser.add_argument("--page", type=int, action="append", dest="page_ids",
+                            help="Only check submissions of this page id. Can be repeated.")
+        parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE,
+                            help="Number of submissions to push per queued task (max 500).")
+        parser.add_argument("--chunk-size", type=int, default=2000,
+                            help="Number of submissions to fetch per database round trip.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Report the missing members without queuing them.")
+
+    def handle(self, *args, **options):
+        # don't use the Mailchimp capacity reserved for sign-ups while the reconciliation runs
+        with priority(BULK):
+            pages = get_integration_form_pages(options["page_ids"])
+
+            if not pages:
+                self.stdout.write("No Mailchimp integration form pages with an audience found.")
+                return
+
+            since = timezone.now() - timedelta(days=options["days"])
+            batch_size = min(options["batch_size"], MAX_BATCH_SIZE)
+            total_checked = total_missing = 0
+
+            for (api_key, list_id), audience_pages in group_pages_by_audience(pages).items():
+                pending, checked = self.get_submission_hashes(audience_pages, since, options["chunk_size"])
+                missing = remove_existing_members(MailchimpApi(api_key=api_key), list_id, pending)
+
+                total_checked += checked
+                total_missing += len(missing)
+                self.stdout.write(f"Audience {list_id}: {len(missing)} of {checked} opted-in submissions "
+                                  f"are not members")
+
+                if not options["dry_run"]:
+                    self.queue(list_id, missing, batch_size)
+
+            action = "Found" if options["dry_run"] else "Queued"
+            self.stdout.write(self.style.SUCCESS(
+                f"Done. {action} {total_missing} missing members out of {total_checked} opted-in submissions."
+            ))
+
+    def get_submission_hashes(self, pages, since, chunk_size):
+        """
+        Returns a dict of the subscriber hashes of the opted-in submissions of the pages
+        to (page id, submission id), keeping the latest submission per email address,
+        and the number of opted-in submissions.
+        """
+        pending = {}
+        checked = 0
+
+        for submission_class, class_pages in group_pages_by_submission_class(pages).items():
+            pages_by_id = {page.pk: page for page in class_pages}
+
+            for submission in iter_form_submissions(submission_class, list(pages_by_id), chunk_size=chunk_size,
+                                                    since=since):
+                try:
+                    email = pages_by_id[submission.page_id].get_mc_submission_email(submission)
+                except Exception as e:
+                    self.stderr.write(f"Could not read the email of submission {submission.pk}: {e}")
+                    continue
+
+                if email:
+                    checked += 1
+                    pending[get_subscriber_hash(email)] = (submission.page_id, submission.pk)
+
+        return pending, checked
+
+    def queue(self, list_id, missing, batch_size):
+        submission_ids_by_page = {}
+        for page_id, submission_id in missing.values():
+            submission_ids_by_page.setdefault(page_id, []).append(submission_id)
+
+        for page_id, submission_ids in submission_ids_by_page.items():
+            submission_ids.sort()
+            for start in range(0, len(submission_ids), batch_size):
+                resubscribe_submissions_task.enqueue(page_id, submission_ids[start:start + batch_size], list_id)
@@ -0,0 +1,18 @@
+import logging
+
+from .signals import mailchimp_metric
+
+logger = logging.getLogger(__name__)
+
+
+def report(metric_type, name, value, **tags):
+    """
+    Reports a metric, by logging it and sending the mailchimp_metric signal.
+    Connect a receiver to the signal to forward metrics to a monitoring system.
+    """
+    logger.debug("%s %s=%s %s", metric_type, name, value, tags)
+    mailchimp_metric.send(sender=None, name=name, value=value, metric_type=metric_type, tags=tags)
+
+
+def increment(name, value=1, **tags):
+    report("counter", name, value, **tags)
@@ -0,0 +1,43 @@
+import json
+
+from django.db import migrations
+
+
+def normalize_json_text_fields(app_label, model_name, field_names=("merge_fields_mapping", "interest_categories")):
+    """
+    Returns a migration operation that replaces text that isn't valid JSON with null in
+    the given fields, so that they can then be altered to JSONField. Pages saved before
+    merge_fields_mapping and interest_categories were JSONFields may hold such text.
+
+    Add it to the migration of your integration form page model, before the AlterField
+    operations generated by makemigrations:
+
+        operations = [
+            normalize_json_text_fields("home", "eventformpage"),
+            migrations.AlterField(...),
+        ]
+    """
+
+    def normalize(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+
+        for values in model._base_manager.values("pk", *field_names).iterator():
+            changes = {}
+
+            for field_name in field_names:
+                value = values[field_name]
+                if value is None:
+                    continue
+
+                try:
+                    normalized = json.dumps(json.loads(value))
+                except ValueError:
+                    normalized = None
+
+                if normalized != value:
+                    changes[field_name] = normalized
+
+            if changes:
+                model._base_manager.filter(pk=values["pk"]).update(**changes)
+
+    return migrations.RunPython(normalize, migrations.RunPython.noop)
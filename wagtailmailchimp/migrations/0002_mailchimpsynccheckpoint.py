@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailmailchimp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailchimpSyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('last_processed_id', models.BigIntegerField(default=0)),
+                ('processed_count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0094_alter_page_locale'),
+        ('wagtailmailchimp', '0002_mailchimpsynccheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailchimpSubscriptionAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('list_id', models.CharField(max_length=50)),
+                ('subscriber_hash', models.CharField(max_length=32)),
+                ('outcome', models.PositiveSmallIntegerField(choices=[(1, 'Subscribed'), (2, 'Already subscribed'), (3, 'Failed')])),
+                ('error_title', models.CharField(blank=True, max_length=100)),
+                ('latency_ms', models.PositiveIntegerField()),
+                ('page', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailcore.page')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailmailchimp', '0004_mailchimppagecampaign'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailchimppagecampaign',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='mailchimppagecampaign',
+            name='settings_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
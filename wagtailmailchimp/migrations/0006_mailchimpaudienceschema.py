@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailmailchimp', '0005_mailchimppagecampaign_hashes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailchimpAudienceSchema',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(max_length=16)),
+                ('list_id', models.CharField(max_length=50)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('merge_fields', models.JSONField(default=list)),
+                ('interest_categories', models.JSONField(default=list)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tenant_id', 'list_id'), name='wagtailmc_schema_audience_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0094_alter_page_locale'),
+        ('wagtailmailchimp', '0006_mailchimpaudienceschema'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailchimpMergeFieldIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('list_id', models.CharField(max_length=50)),
+                ('merge_tag', models.CharField(max_length=100)),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.page')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('list_id', 'merge_tag', 'page'), name='wagtailmc_merge_field_unique')],
+            },
+        ),
+    ]
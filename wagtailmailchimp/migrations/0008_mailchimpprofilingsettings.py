@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailmailchimp', '0007_mailchimpmergefieldindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailchimpProfilingSettings',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enabled', models.BooleanField(default=False, verbose_name='Profile Mailchimp views')),
+                ('sample_rate', models.PositiveIntegerField(default=100, help_text='Profile 1 in this number of requests. 0 to only profile slow requests.', verbose_name='Sample rate')),
+                ('latency_threshold', models.PositiveIntegerField(default=0, help_text='Also profile requests slower than this number of milliseconds. 0 to disable.', verbose_name='Latency threshold (ms)')),
+            ],
+            options={
+                'verbose_name': 'Mailchimp profiling',
+            },
+        ),
+    ]
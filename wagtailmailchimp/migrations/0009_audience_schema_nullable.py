@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:17
+
+from django.db import migrations, models
+
+
+def forget_empty_schemas(apps, schema_editor):
+    # empty lists were the default of parts never fetched, they are fetched again
+    MailchimpAudienceSchema = apps.get_model("wagtailmailchimp", "MailchimpAudienceSchema")
+    for snapshot in MailchimpAudienceSchema.objects.all():
+        if not snapshot.merge_fields or not snapshot.interest_categories:
+            snapshot.merge_fields = snapshot.merge_fields or None
+            snapshot.interest_categories = snapshot.interest_categories or None
+            snapshot.save(update_fields=["merge_fields", "interest_categories"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailmailchimp', '0008_mailchimpprofilingsettings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mailchimpaudienceschema',
+            name='interest_categories',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='mailchimpaudienceschema',
+            name='merge_fields',
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(forget_empty_schemas, migrations.RunPython.noop),
+    ]
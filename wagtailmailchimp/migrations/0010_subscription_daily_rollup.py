@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def rollup_subscription_attempts(apps, schema_editor):
+    MailchimpSubscriptionAttempt = apps.get_model("wagtailmailchimp", "MailchimpSubscriptionAttempt")
+    MailchimpSubscriptionDailyRollup = apps.get_model("wagtailmailchimp", "MailchimpSubscriptionDailyRollup")
+
+    rows = MailchimpSubscriptionAttempt.objects.annotate(day=TruncDate("created_at")).values("day", "page_id").annotate(
+        total=Count("pk"),
+        subscribed=Count("pk", filter=Q(outcome=1)),
+        duplicate=Count("pk", filter=Q(outcome=2)),
+        failed=Count("pk", filter=Q(outcome=3)),
+        latency_total_ms=Sum("latency_ms"),
+        max_latency_ms=Max("latency_ms"),
+    ).order_by()
+
+    MailchimpSubscriptionDailyRollup.objects.bulk_create(
+        (MailchimpSubscriptionDailyRollup(**row) for row in rows.iterator()), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0094_alter_page_locale'),
+        ('wagtailmailchimp', '0009_audience_schema_nullable'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mailchimpsubscriptionattempt',
+            name='page',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailcore.page'),
+        ),
+        migrations.CreateModel(
+            name='MailchimpSubscriptionDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('subscribed', models.PositiveIntegerField(default=0)),
+                ('duplicate', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('latency_total_ms', models.BigIntegerField(default=0)),
+                ('max_latency_ms', models.PositiveIntegerField(default=0)),
+                ('page', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='wagtailcore.page')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'page'), name='wagtailmc_rollup_day_page_uniq'), models.UniqueConstraint(condition=models.Q(('page__isnull', True)), fields=('day',), name='wagtailmc_rollup_day_no_page_uniq')],
+            },
+        ),
+        migrations.RunPython(rollup_subscription_attempts, migrations.RunPython.noop),
+    ]
@@ -1,20 +1,33 @@
 import json
+import logging
+import re
+from functools import lru_cache
 
+from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from django.forms import BooleanField
-from django.template import Context, Template
+from django.template import Context, Template, TemplateSyntaxError
+from django.template.loader import render_to_string
 from django.utils.translation import gettext_lazy as _
 from mailchimp3.mailchimpclient import MailChimpError
 from wagtail.admin.panels import FieldPanel, FieldRowPanel, MultiFieldPanel
 from wagtail.contrib.forms.models import AbstractForm
-from wagtail.contrib.settings.models import BaseSiteSetting
+from wagtail.contrib.settings.models import BaseGenericSetting, BaseSiteSetting
 from wagtail.contrib.settings.registry import register_setting
 
-from .api import MailchimpApi
+from .api import MailchimpApi, invalidate_tenant_cache
+from .errors import MailchimpPayloadError
+from .frontend_cache import get_audience_surrogate_key, get_page_surrogate_key
+from .profiling import invalidate_profiling_settings, profile_request
+from .subscriptions import subscribe_to_audiences
+from .timing import timed_phase, timed_response
 from .widgets import MailchimpSubscriberOptinWidget, MailchimpAudienceSelectWidget
 
+logger = logging.getLogger(__name__)
+
 
 @register_setting
 class MailchimpSettings(BaseSiteSetting):
@@ -29,6 +42,15 @@ class MailchimpSettings(BaseSiteSetting):
         FieldPanel("default_audience_id"),
     ]
 
+    def save(self, *args, **kwargs):
+        if self.pk:
+            previous_api_key = MailchimpSettings.objects.filter(pk=self.pk).values_list("api_key", flat=True).first()
+            if previous_api_key and previous_api_key != self.api_key:
+                # the API key was changed, drop the data cached for the previous key
+                invalidate_tenant_cache(previous_api_key)
+
+        super().save(*args, **kwargs)
+
     def clean_fields(self, exclude=None):
         super().clean()
 
@@ -43,6 +65,269 @@ class MailchimpSettings(BaseSiteSetting):
             raise ValidationError({'api_key': str(e)})
 
 
+@register_setting
+class MailchimpProfilingSettings(BaseGenericSetting):
+    """
+    Runtime switch of the sampling profiler of the Mailchimp views, see profiling.py.
+    """
+    enabled = models.BooleanField(verbose_name=_("Profile Mailchimp views"), default=False)
+    sample_rate = models.PositiveIntegerField(
+        verbose_name=_("Sample rate"), default=100,
+        help_text=_("Profile 1 in this number of requests. 0 to only profile slow requests."))
+    latency_threshold = models.PositiveIntegerField(
+        verbose_name=_("Latency threshold (ms)"), default=0,
+        help_text=_("Also profile requests slower than this number of milliseconds. 0 to disable."))
+
+    panels = [
+        FieldPanel("enabled"),
+        FieldRowPanel([
+            FieldPanel("sample_rate"),
+            FieldPanel("latency_threshold"),
+        ]),
+    ]
+
+    class Meta:
+        verbose_name = _("Mailchimp profiling")
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_profiling_settings()
+
+
+class MailchimpSyncCheckpoint(models.Model):
+    """
+    Progress of a resumable sync job, such as the form submissions backfill.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    last_processed_id = models.BigIntegerField(default=0)
+    processed_count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class MailchimpSubscriptionAttempt(models.Model):
+    """
+    Append-only log of attempts to add a subscriber to a Mailchimp audience.
+    """
+    OUTCOME_SUBSCRIBED = 1
+    OUTCOME_DUPLICATE = 2
+    OUTCOME_FAILED = 3
+
+    OUTCOME_CHOICES = (
+        (OUTCOME_SUBSCRIBED, _("Subscribed")),
+        (OUTCOME_DUPLICATE, _("Already subscribed")),
+        (OUTCOME_FAILED, _("Failed")),
+    )
+
+    created_at = models.DateTimeField(default=timezone.now)
+    # attempts are only read through the daily rollups, so the page is not indexed
+    page = models.ForeignKey("wagtailcore.Page", null=True, blank=True, on_delete=models.SET_NULL, related_name="+",
+                             db_index=False)
+    list_id = models.CharField(max_length=50)
+    subscriber_hash = models.CharField(max_length=32)
+    outcome = models.PositiveSmallIntegerField(choices=OUTCOME_CHOICES)
+    error_title = models.CharField(max_length=100, blank=True)
+    latency_ms = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.subscriber_hash} - {self.get_outcome_display()}"
+
+
+class MailchimpSubscriptionDailyRollup(models.Model):
+    """
+    Counts of the subscription attempts of a page in a day, updated as the attempts
+    are written, for the subscription report.
+    """
+    day = models.DateField()
+    # kept when the page is deleted, so that its attempts are not merged with those of other deleted pages
+    page = models.ForeignKey("wagtailcore.Page", null=True, blank=True, on_delete=models.DO_NOTHING, related_name="+",
+                             db_constraint=False, db_index=False)
+    total = models.PositiveIntegerField(default=0)
+    subscribed = models.PositiveIntegerField(default=0)
+    duplicate = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    latency_total_ms = models.BigIntegerField(default=0)
+    max_latency_ms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "page"], name="wagtailmc_rollup_day_page_uniq"),
+            # NULL pages are distinct in the constraint above
+            models.UniqueConstraint(fields=["day"], condition=models.Q(page__isnull=True),
+                                    name="wagtailmc_rollup_day_no_page_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.page_id}"
+
+    @property
+    def avg_latency_ms(self):
+        return self.latency_total_ms / self.total if self.total else None
+
+
+class MailchimpPageCampaign(models.Model):
+    """
+    Mailchimp campaign created for a page built on AbstractMailchimpCampaignPage.
+    """
+    page = models.OneToOneField("wagtailcore.Page", on_delete=models.CASCADE, related_name="+")
+    campaign_id = models.CharField(max_length=50)
+    settings_hash = models.CharField(max_length=64, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.campaign_id
+
+
+class MailchimpMergeFieldIndex(models.Model):
+    """
+    Merge tags of an audience mapped to form fields by Mailchimp integration form pages,
+    kept up to date when the pages are saved, to find the pages using an audience or
+    merge tag without loading every page.
+    """
+    list_id = models.CharField(max_length=50)
+    merge_tag = models.CharField(max_length=100)
+    page = models.ForeignKey("wagtailcore.Page", on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["list_id", "merge_tag", "page"], name="wagtailmc_merge_field_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.list_id} {self.merge_tag}"
+
+
+def load_json_field(value, default=None):
+    """
+    Returns the data of a JSON field, also accepting JSON text stored before
+    the field was a JSONField, or default if there is no valid data.
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return default
+    return default if value is None else value
+
+
+def get_additional_audiences(value):
+    """
+    Returns the additional audiences of a page, a list of dicts with a list_id and
+    an optional merge_fields_mapping, skipping the entries without a list_id.
+    """
+    audiences = load_json_field(value, [])
+    return [audience for audience in audiences if isinstance(audience, dict) and audience.get("list_id")]
+
+
+@lru_cache(maxsize=128)
+def get_subscriber_tags_template(text):
+    return Template(text)
+
+
+def validate_subscriber_tags(text):
+    try:
+        get_subscriber_tags_template(text)
+    except TemplateSyntaxError as e:
+        raise ValidationError({"subscriber_tags": str(e)})
+
+
+def get_subscriber_tags_query(request):
+    """
+    Returns the query parameters of the request that subscriber tags can use, those
+    listed in WAGTAILMAILCHIMP_SUBSCRIBER_TAGS_QUERY_PARAMETERS, with their values
+    restricted to short strings of letters, digits, dashes, dots and underscores.
+    """
+    if request is None:
+        return {}
+
+    names = getattr(settings, "WAGTAILMAILCHIMP_SUBSCRIBER_TAGS_QUERY_PARAMETERS",
+                    ("utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content"))
+    query = {}
+    for name in names:
+        value = re.sub(r"[^\w.-]", "", request.GET.get(name, ""))[:50]
+        if value:
+            query[name] = value
+    return query
+
+
+def render_subscriber_tags(text, context):
+    """
+    Returns the tags of a subscriber_tags field, one per line, rendered as Django
+    templates with context. Empty and duplicate tags are left out, and only the first
+    WAGTAILMAILCHIMP_MAX_SUBSCRIBER_TAGS tags are kept.
+
+    The context is authored by the page editors, only pass it what they may send to Mailchimp.
+    """
+    if not text or not text.strip():
+        return []
+
+    try:
+        rendered = get_subscriber_tags_template(text).render(Context(context, autoescape=False))
+    except TemplateSyntaxError:
+        # pages saved before the tags were validated, don't let them fail subscriptions
+        logger.warning("Invalid subscriber tags template: %r", text, exc_info=True)
+        return []
+
+    max_tags = getattr(settings, "WAGTAILMAILCHIMP_MAX_SUBSCRIBER_TAGS", 10)
+    tags = []
+    for line in rendered.splitlines():
+        # Mailchimp tag names are at most 100 characters long
+        tag = line.strip()[:100]
+        if tag and tag not in tags:
+            tags.append(tag)
+            if len(tags) >= max_tags:
+                break
+    return tags
+
+
+class MailchimpAudienceSchema(models.Model):
+    """
+    Snapshot of the merge fields and interest groups of an audience, written when they
+    are fetched from Mailchimp, and read when nothing is cached yet.
+
+    The version is incremented each time the snapshot changes. merge_fields and
+    interest_categories are None until they were fetched, and categories have no
+    interests key until their interests were fetched.
+    """
+    tenant_id = models.CharField(max_length=16)
+    list_id = models.CharField(max_length=50)
+    version = models.PositiveIntegerField(default=0)
+    merge_fields = models.JSONField(null=True)
+    interest_categories = models.JSONField(null=True)
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tenant_id", "list_id"], name="wagtailmc_schema_audience_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.list_id} v{self.version}"
+
+    def get_interest_categories(self):
+        """
+        Returns the interest categories, without their interests, or None if they were never fetched.
+        """
+        if self.interest_categories is None:
+            return None
+        return [{key: value for key, value in category.items() if key != "interests"}
+                for category in self.interest_categories]
+
+    def get_interests(self, interest_category_id):
+        """
+        Returns the interests of an interest category, or None if the category is
+        unknown or its interests were never fetched.
+        """
+        for category in self.interest_categories or []:
+            if category.get("id") == interest_category_id:
+                return category.get("interests")
+        return None
+
+
 class AbstractMailChimpPage(models.Model):
     """
     Abstract MailChimp page definition.
@@ -59,10 +344,72 @@ class AbstractMailChimpPage(models.Model):
                                       default="You have been successfully added to our mailing list. Thank you!",
                                       help_text=_("Message to show on successful submission"),
                                       verbose_name=_("Thank you text"))
+    additional_audiences = models.JSONField(
+        blank=True, null=True, verbose_name=_("Additional MailChimp audiences"),
+        help_text=_('Other audiences to subscribe to, as a list of objects with a "list_id" and an optional '
+                    '"merge_fields_mapping" from their merge tags to the merge tags of the main audience, e.g. '
+                    '[{"list_id": "a1b2c3", "merge_fields_mapping": {"NAME": "FNAME"}}]. Without a mapping, '
+                    'the merge fields of the main audience are sent as they are.'))
+
+    subscriber_tags = models.TextField(
+        blank=True, verbose_name=_("Subscriber tags"),
+        help_text=_("Tags to add to subscribers, one per line. Tags are Django templates, with the page, the "
+                    "UTM query parameters and the subscriber data in their context, e.g. {{ page.slug }} or "
+                    "{{ query.utm_campaign }}"))
+
+    # set to True or False to override the WAGTAILMAILCHIMP_CDN_CACHEABLE setting for a page type
+    cdn_cacheable = None
 
     class Meta(object):
         abstract = True
 
+    def is_cdn_cacheable(self):
+        """
+        Returns True if GET responses of the page hold no per-user data and can be cached publicly.
+        """
+        if self.cdn_cacheable is None:
+            return getattr(settings, "WAGTAILMAILCHIMP_CDN_CACHEABLE", False)
+        return self.cdn_cacheable
+
+    def get_surrogate_keys(self):
+        return [get_page_surrogate_key(self.pk), get_audience_surrogate_key(self.list_id)]
+
+    def clean(self):
+        super().clean()
+        validate_subscriber_tags(self.subscriber_tags)
+
+    def get_subscriber_tags(self, request, data):
+        """
+        Returns the tags to add to the subscriber with the given member data.
+        """
+        return render_subscriber_tags(self.subscriber_tags,
+                                      {"page": self, "query": get_subscriber_tags_query(request), "data": data})
+
+    def get_additional_audiences_member_data(self, data):
+        """
+        Returns the (list_id, data) tuples to subscribe to the additional audiences,
+        from the member data of the main audience.
+        """
+        subscriptions = []
+
+        for audience in get_additional_audiences(self.additional_audiences):
+            mapping = audience.get("merge_fields_mapping")
+            merge_fields = data.get("merge_fields", {})
+            if mapping:
+                merge_fields = {tag: merge_fields[source] for tag, source in mapping.items()
+                                if source in merge_fields}
+            # interests are specific to an audience, they are not sent to the others
+            member_data = {
+                "email_address": data["email_address"],
+                "merge_fields": merge_fields,
+                "status": data["status"],
+            }
+            if data.get("tags"):
+                member_data["tags"] = data["tags"]
+            subscriptions.append((audience["list_id"], member_data))
+
+        return subscriptions
+
     def serve(self, request):
         """
         Serves the page as a MailChimpView.
@@ -74,7 +421,8 @@ class AbstractMailChimpPage(models.Model):
         from .views import MailChimpView
 
         view = MailChimpView.as_view(page_instance=self)
-        return view(request)
+        with profile_request(request, f"page-{self.pk}"):
+            return timed_response(request, self, lambda: view(request))
 
     content_panels = [
         MultiFieldPanel([
@@ -83,7 +431,9 @@ class AbstractMailChimpPage(models.Model):
                 FieldPanel('double_optin'),
             ], classname='label-above'),
         ], (_('MailChimp Settings'))),
-        FieldPanel('thank_you_text')
+        FieldPanel('thank_you_text'),
+        FieldPanel('subscriber_tags'),
+        FieldPanel('additional_audiences'),
     ]
 
 
@@ -97,18 +447,64 @@ class AbstractMailchimpIntegrationForm(AbstractForm):
 
     audience_list_id = models.CharField(max_length=50, blank=True, null=True, verbose_name=_('MailChimp Audience'),
                                         help_text=_('Select MailChimp Audience to add users to'))
-    merge_fields_mapping = models.TextField(blank=True, null=True)
-    interest_categories = models.TextField(blank=True, null=True)
+    merge_fields_mapping = models.JSONField(blank=True, null=True)
+    interest_categories = models.JSONField(blank=True, null=True)
+    additional_audiences = models.JSONField(
+        blank=True, null=True, verbose_name=_("Additional MailChimp audiences"),
+        help_text=_('Other audiences to add users to, as a list of objects with a "list_id" and an optional '
+                    '"merge_fields_mapping" from their merge tags to form field names, e.g. '
+                    '[{"list_id": "a1b2c3", "merge_fields_mapping": {"NAME": "full_name"}}]. Without a mapping, '
+                    'the merge fields mapped for the main audience are sent.'))
+    subscriber_tags = models.TextField(
+        blank=True, verbose_name=_("Subscriber tags"),
+        help_text=_("Tags to add to users, one per line. Tags are Django templates, with the page, the UTM query "
+                    "parameters and the form submission in their context, e.g. {{ page.slug }} or "
+                    "{{ form_data.event_date }}"))
 
     mailing_list_checkbox_label = models.CharField(max_length=200, blank=True,
                                                    verbose_name=_("Mailing list checkbox label"))
 
     integration_panels = [
         FieldPanel("audience_list_id", widget=MailchimpAudienceSelectWidget),
+        FieldPanel("subscriber_tags"),
+        FieldPanel("additional_audiences"),
     ]
 
     is_mailchimp_integration = True
 
+    def save(self, *args, **kwargs):
+        result = super(AbstractMailchimpIntegrationForm, self).save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        index_fields = {"audience_list_id", "merge_fields_mapping", "additional_audiences"}
+        if update_fields is None or index_fields & set(update_fields):
+            self.update_mc_merge_field_index()
+
+        return result
+
+    def get_mc_merge_field_index_tags(self):
+        """
+        Returns the merge tags, including EMAIL, mapped to a form field.
+        """
+        merge_fields_mapping = load_json_field(self.merge_fields_mapping, {})
+        return sorted(tag for tag, field_name in merge_fields_mapping.items() if field_name)
+
+    def update_mc_merge_field_index(self):
+        MailchimpMergeFieldIndex.objects.filter(page_id=self.pk).delete()
+
+        if self.audience_list_id:
+            tags = self.get_mc_merge_field_index_tags()
+            index = {(self.audience_list_id, tag) for tag in tags}
+            for audience in get_additional_audiences(self.additional_audiences):
+                mapping = audience.get("merge_fields_mapping")
+                audience_tags = [tag for tag, field_name in mapping.items() if field_name] if mapping else tags
+                index.update((audience["list_id"], tag) for tag in audience_tags)
+
+            MailchimpMergeFieldIndex.objects.bulk_create([
+                MailchimpMergeFieldIndex(list_id=list_id, merge_tag=tag, page_id=self.pk)
+                for list_id, tag in sorted(index)
+            ])
+
     def remove_mailchimp_field(self, form):
         form.fields.pop(self.mailchimp_field_name, None)
         return form.cleaned_data.pop(self.mailchimp_field_name, None)
@@ -117,7 +513,9 @@ class AbstractMailchimpIntegrationForm(AbstractForm):
         # We need to access the request later on in integration operation
         self.request = request
 
-        return super(AbstractMailchimpIntegrationForm, self).serve(request, *args, **kwargs)
+        return timed_response(
+            request, self, lambda: super(AbstractMailchimpIntegrationForm, self).serve(request, *args, **kwargs)
+        )
 
     def should_perform_mailchimp_integration_operation(self, request, form):
         # override this method to add custom logic to determine if the
@@ -132,14 +530,20 @@ class AbstractMailchimpIntegrationForm(AbstractForm):
     def process_form_submission(self, form):
         self.remove_mailchimp_field(form)
 
-        form_submission = super(AbstractMailchimpIntegrationForm, self).process_form_submission(form)
+        form_data = dict(form.data)
+        user_checked_sub = bool(form_data.get(self.mailchimp_field_name, False))
+        user_selected_interests = form_data.get(self.mailchimp_interests_field_name, None)
+
+        # keep a record of the subscriber's consent on the submission, so that
+        # submissions can later be pushed to Mailchimp by the backfill command
+        form.cleaned_data[self.mailchimp_field_name] = user_checked_sub
+        form.cleaned_data[self.mailchimp_interests_field_name] = user_selected_interests or []
+
+        with timed_phase("save"):
+            form_submission = super(AbstractMailchimpIntegrationForm, self).process_form_submission(form)
 
         if self.request:
             try:
-                form_data = dict(form.data)
-                user_checked_sub = bool(form_data.get(self.mailchimp_field_name, False))
-                user_selected_interests = form_data.get(self.mailchimp_interests_field_name, None)
-
                 if user_checked_sub and self.should_perform_mailchimp_integration_operation(self.request, form):
                     self.mailchimp_integration_operation(self, form=form, request=self.request,
                                                          user_selected_interests=user_selected_interests)
@@ -167,24 +571,37 @@ class AbstractMailchimpIntegrationForm(AbstractForm):
     def mailchimp_integration_operation(self, instance, **kwargs):
         request = kwargs.get('request', None)
 
-        mc_settings = MailchimpSettings.for_request(request)
+        with timed_phase("settings"):
+            mc_settings = MailchimpSettings.for_request(request)
 
         mailchimp = MailchimpApi(api_key=mc_settings.api_key)
 
         user_selected_interests = kwargs.get('user_selected_interests', None)
 
-        rendered_dictionary = self.render_mc_dictionary(
-            self.format_mc_form_submission(kwargs['form']),
-            user_selected_interests=user_selected_interests
-        )
-
         try:
-            dict_data = json.loads(rendered_dictionary)
-            list_id = self.audience_list_id
-            mailchimp.add_user_to_list(list_id=list_id, data=dict_data)
+            form_submission = self.format_mc_form_submission(kwargs['form'])
+            dict_data = self.get_mc_member_data(
+                form_submission,
+                user_selected_interests=user_selected_interests
+            )
+            tags = self.get_mc_subscriber_tags(request, form_submission)
+            if tags:
+                dict_data["tags"] = tags
+            subscriptions = [(self.audience_list_id, dict_data)]
+            subscriptions += self.get_mc_additional_audiences_member_data(form_submission, dict_data)
+            with timed_phase("subscribe"):
+                results = subscribe_to_audiences(mailchimp, self, subscriptions)
+            # the messages are about the main audience, failures of the others are logged
+            results[0].raise_error()
             if request:
                 messages.add_message(request, messages.INFO,
                                      'You have been successfully added to our mailing list!')
+        except MailchimpPayloadError as e:
+            if request:
+                messages.add_message(
+                    request, messages.ERROR,
+                    "You have successfully registered this event, but we could not add you to our mailing list: "
+                    + e.message)
         except MailChimpError as e:
             if request:
                 if e.args and e.args[0]:
@@ -205,12 +622,120 @@ class AbstractMailchimpIntegrationForm(AbstractForm):
                     "We are having issues adding you to our mailing list. We will try to add you later")
 
     def format_mc_form_submission(self, form):
+        return self.format_mc_submission_data(form.cleaned_data)
+
+    def format_mc_submission_data(self, submission_data):
         formatted_form_data = {}
 
-        for k, v in form.cleaned_data.items():
+        for k, v in submission_data.items():
             formatted_form_data[k.replace('-', '_')] = v
         return formatted_form_data
 
+    def get_mc_member_data(self, form_submission, user_selected_interests=None):
+        rendered_dictionary = self.render_mc_dictionary(form_submission,
+                                                        user_selected_interests=user_selected_interests)
+        return json.loads(rendered_dictionary)
+
+    def clean(self):
+        super().clean()
+        validate_subscriber_tags(self.subscriber_tags)
+
+    def get_mc_subscriber_tags(self, request, form_submission):
+        """
+        Returns the tags to add to the user who made the form submission.
+        """
+        return render_subscriber_tags(self.subscriber_tags,
+                                      {"page": self, "query": get_subscriber_tags_query(request),
+                                       "form_data": form_submission})
+
+    def get_mc_additional_audiences_member_data(self, form_submission, member_data):
+        """
+        Returns the (list_id, data) tuples to subscribe to the additional audiences,
+        from the form submission and the member data of the main audience.
+        """
+        subscriptions = []
+
+        for audience in get_additional_audiences(self.additional_audiences):
+            mapping = audience.get("merge_fields_mapping")
+            if mapping:
+                merge_fields_template = json.dumps({
+                    tag: "{}{}{}".format("{{", field_name, "}}") for tag, field_name in mapping.items() if field_name
+                })
+                merge_fields = json.loads(Template(merge_fields_template).render(Context(form_submission)))
+            else:
+                merge_fields = member_data.get("merge_fields", {})
+            # interests are specific to an audience, they are not sent to the others
+            data = {
+                "email_address": member_data.get("email_address"),
+                "merge_fields": merge_fields,
+                "status": member_data.get("status", "subscribed"),
+            }
+            if member_data.get("tags"):
+                data["tags"] = member_data["tags"]
+            subscriptions.append((audience["list_id"], data))
+
+        return subscriptions
+
+    def get_mc_submission_form_data(self, submission, assume_opted_in=False):
+        """
+        Returns the form data of a stored form submission, or None if the
+        submitter did not opt in to the mailing list. With assume_opted_in,
+        submissions made before the opt-in was recorded count as opted in.
+        """
+        form_data = submission.form_data
+        if isinstance(form_data, str):
+            form_data = json.loads(form_data)
+
+        if assume_opted_in and self.mailchimp_field_name not in form_data:
+            return form_data
+
+        if not form_data.get(self.mailchimp_field_name):
+            return None
+
+        return form_data
+
+    def get_mc_submission_email(self, submission):
+        """
+        Returns the email address of a stored form submission, without rendering
+        the whole member payload, or None if the submitter did not opt in.
+        """
+        form_data = self.get_mc_submission_form_data(submission)
+        email_field = self.get_mc_email_address()
+        if form_data is None or not email_field:
+            return None
+
+        return self.format_mc_submission_data(form_data).get(email_field) or None
+
+    def get_mc_submission_member_data(self, submission, assume_opted_in=False):
+        """
+        Returns the Mailchimp member payload for a stored form submission,
+        or None if the submitter did not opt in to the mailing list.
+        """
+        form_data = self.get_mc_submission_form_data(submission, assume_opted_in=assume_opted_in)
+        if form_data is None:
+            return None
+
+        user_selected_interests = form_data.get(self.mailchimp_interests_field_name) or None
+        return self.get_mc_member_data(self.format_mc_submission_data(form_data),
+                                       user_selected_interests=user_selected_interests)
+
+    def get_mc_submission_audience_member_data(self, submission, list_id):
+        """
+        Returns the Mailchimp member payload for a stored form submission, for the main
+        audience or one of the additional audiences of the page, or None if the
+        submitter did not opt in to the mailing list.
+        """
+        member_data = self.get_mc_submission_member_data(submission)
+        if member_data is None or list_id == self.audience_list_id:
+            return member_data
+
+        form_submission = self.format_mc_submission_data(self.get_mc_submission_form_data(submission))
+        for audience_list_id, data in self.get_mc_additional_audiences_member_data(form_submission, member_data):
+            if audience_list_id == list_id:
+                return data
+
+        return None
+
     def get_mc_data(self):
         data = {
             "email_field": None,
@@ -218,19 +743,8 @@ class AbstractMailchimpIntegrationForm(AbstractForm):
             "interest_categories": {}
         }
 
-        merge_fields_mapping = {}
-        if self.merge_fields_mapping:
-            try:
-                merge_fields_mapping = json.loads(self.merge_fields_mapping)
-            except Exception:
-                pass
-
-        interest_categories = {}
-        if self.interest_categories:
-            try:
-                interest_categories = json.loads(self.interest_categories)
-            except Exception:
-                pass
+        merge_fields_mapping = load_json_field(self.merge_fields_mapping, {})
+        interest_categories = load_json_field(self.interest_categories, {})
 
         for key, value in merge_fields_mapping.items():
             if key == "EMAIL":
@@ -278,7 +792,7 @@ class AbstractMailchimpIntegrationForm(AbstractForm):
 
     def render_mc_dictionary(self, form_submission, user_selected_interests=None):
 
-        interests = self.combine_mc_interest_categories(),
+        interests = self.combine_mc_interest_categories()
 
         if user_selected_interests:
             interests = {}
@@ -294,3 +808,70 @@ class AbstractMailchimpIntegrationForm(AbstractForm):
 
         rendered_dictionary = Template(rendered_dictionary_template).render(Context(form_submission))
         return rendered_dictionary
+
+
+class AbstractMailchimpCampaignPage(models.Model):
+    """
+    Abstract page mixin that creates a Mailchimp campaign from the page when it is published,
+    and updates the campaign when the page is published again.
+
+    The campaign is created in a background task, see the README for how to configure a task worker.
+    """
+    email_template = None
+
+    campaign_audience_id = models.CharField(max_length=50, blank=True, null=True,
+                                            verbose_name=_('MailChimp Campaign Audience'),
+                                            help_text=_('Select MailChimp Audience to send the campaign to'))
+    campaign_from_name = models.CharField(max_length=100, blank=True, verbose_name=_("Campaign from name"))
+    campaign_reply_to = models.EmailField(blank=True, verbose_name=_("Campaign reply to email"))
+    create_campaign_on_publish = models.BooleanField(default=True, verbose_name=_("Create campaign on publish"),
+                                                     help_text=_("Create or update a Mailchimp campaign draft "
+                                                                 "with the content of this page when it is published"))
+
+    class Meta:
+        abstract = True
+
+    campaign_panels = [
+        MultiFieldPanel([
+            FieldPanel('create_campaign_on_publish'),
+            FieldPanel('campaign_audience_id', widget=MailchimpAudienceSelectWidget),
+            FieldRowPanel([
+                FieldPanel('campaign_from_name'),
+                FieldPanel('campaign_reply_to'),
+            ]),
+        ], (_('MailChimp Campaign'))),
+    ]
+
+    def should_sync_mailchimp_campaign(self):
+        # override this method to add custom logic to determine if a
+        # campaign should be created or updated when the page is published
+        return bool(self.create_campaign_on_publish and self.email_template and self.campaign_audience_id
+                    and self.campaign_from_name and self.campaign_reply_to)
+
+    def get_campaign_email_context(self):
+        return {"page": self, "self": self}
+
+    def get_campaign_email_html(self):
+        return render_to_string(self.email_template, context=self.get_campaign_email_context())
+
+    def get_campaign_settings(self):
+        return {
+            "subject_line": self.title,
+            "title": self.title,
+            "from_name": self.campaign_from_name,
+            "reply_to": self.campaign_reply_to,
+        }
+
+    def get_campaign_content(self):
+        return {
+            "html": self.get_campaign_email_html(),
+        }
+
+    def get_campaign_data(self):
+        return {
+            "type": "regular",
+            "recipients": {
+                "list_id": self.campaign_audience_id,
+            },
+            "settings": self.get_campaign_settings(),
+        }
@@ -0,0 +1,238 @@
+"""
+Sampling profiler for the Mailchimp views.
+
+While profiling is switched on, in the Mailchimp profiling settings of the admin, a
+background thread samples the stack of the threads serving the profiled views every
+WAGTAILMAILCHIMP_PROFILE_INTERVAL seconds. 1 in N requests are sampled from their
+start, and the other requests once they have taken half of the latency threshold.
+The samples of the picked requests, and of requests slower than the threshold, are
+written to WAGTAILMAILCHIMP_PROFILE_DIR in the collapsed stacks format read by flame
+graph tools, such as speedscope or flamegraph.pl.
+
+The settings are kept in the cache, and the thread only runs while requests are
+sampled, so profiling costs nothing while it is switched off.
+"""
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def get_profile_dir():
+    return getattr(settings, "WAGTAILMAILCHIMP_PROFILE_DIR",
+                   os.path.join(tempfile.gettempdir(), "wagtailmailchimp-profiles"))
+
+
+class StackSampler:
+    """
+    Collects the stacks of the registered threads, from a daemon thread that only
+    runs while threads are registered.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        # (samples, time to start sampling at) per registered thread id
+        self.samples = {}
+
+    def register(self, thread_id, delay=0):
+        with self.lock:
+            self.samples[thread_id] = (Counter(), time.monotonic() + delay)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="wagtailmailchimp-profiler", daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+
+    def unregister(self, thread_id):
+        with self.lock:
+            samples, _ = self.samples.pop(thread_id, (Counter(), None))
+            return samples
+
+    def run(self):
+        timeout = 0
+        while True:
+            self.wakeup.wait(timeout)
+            self.wakeup.clear()
+
+            with self.lock:
+                if not self.samples:
+                    # stopped until a thread is registered again
+                    self.thread = None
+                    return
+
+                now = time.monotonic()
+                frames = None
+                next_start = None
+                for thread_id, (samples, start) in self.samples.items():
+                    if start > now:
+                        next_start = min(next_start or start, start)
+                        continue
+                    frames = frames if frames is not None else sys._current_frames()
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[self.get_stack(frame)] += 1
+
+            # sleep until the next thread to sample is due, if none is yet
+            timeout = self.interval if frames is not None else next_start - now
+
+    def get_stack(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = StackSampler(getattr(settings, "WAGTAILMAILCHIMP_PROFILE_INTERVAL", 0.005))
+
+    return _sampler
+
+
+PROFILING_SETTINGS_CACHE_KEY = "wagtailmailchimp-profiling-settings"
+
+
+def get_profiling_settings():
+    """
+    Returns the Mailchimp profiling settings of the admin as a dict, kept in the
+    cache until they are saved, so requests do not query them.
+    """
+    from .models import MailchimpProfilingSettings
+
+    profiling_settings = cache.get(PROFILING_SETTINGS_CACHE_KEY)
+    if profiling_settings is not None:
+        return profiling_settings
+
+    try:
+        instance = MailchimpProfilingSettings.load()
+    except Exception:
+        # profiling must never break the page, e.g. before the settings table is migrated
+        logger.warning("Could not load the Mailchimp profiling settings", exc_info=True)
+        return None
+
+    profiling_settings = {
+        "enabled": instance.enabled,
+        "sample_rate": instance.sample_rate,
+        "latency_threshold": instance.latency_threshold,
+    }
+    cache.set(PROFILING_SETTINGS_CACHE_KEY, profiling_settings, None)
+    return profiling_settings
+
+
+def invalidate_profiling_settings():
+    cache.delete(PROFILING_SETTINGS_CACHE_KEY)
+
+
+def rotate_profiles(profile_dir):
+    """
+    Deletes the oldest profiles, until there are at most WAGTAILMAILCHIMP_PROFILE_MAX_FILES
+    profiles and they take at most WAGTAILMAILCHIMP_PROFILE_MAX_BYTES.
+    """
+    max_files = getattr(settings, "WAGTAILMAILCHIMP_PROFILE_MAX_FILES", 100)
+    max_bytes = getattr(settings, "WAGTAILMAILCHIMP_PROFILE_MAX_BYTES", 50 * 1024 * 1024)
+
+    profiles = []
+    with os.scandir(profile_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".folded"):
+                stat = entry.stat()
+                profiles.append((stat.st_mtime, entry.path, stat.st_size))
+
+    profiles.sort()
+    total_size = sum(size for _, _, size in profiles)
+
+    while profiles and (len(profiles) > max_files or total_size > max_bytes):
+        _, path, size = profiles.pop(0)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+
+
+def write_profile(name, samples, elapsed):
+    profile_dir = get_profile_dir()
+    os.makedirs(profile_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = os.path.join(profile_dir, f"{timestamp}-{name}-{round(elapsed * 1000)}ms.folded")
+    with open(path, "w") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+    rotate_profiles(profile_dir)
+    return path
+
+
+@contextmanager
+def profile_request(request, name):
+    """
+    Samples the stack of the current thread during the block, if profiling is switched
+    on, and writes the samples if the request is picked or slow.
+    """
+    profiling_settings = get_profiling_settings()
+    if profiling_settings is None or not profiling_settings["enabled"]:
+        yield
+        return
+
+    sample_rate = profiling_settings["sample_rate"]
+    threshold = profiling_settings["latency_threshold"]
+    picked = bool(sample_rate) and random.randrange(sample_rate) == 0
+    if not picked and not threshold:
+        yield
+        return
+
+    sampler = get_sampler()
+    thread_id = threading.get_ident()
+    # requests that were not picked are only sampled once they get close to the threshold
+    sampler.register(thread_id, delay=0 if picked else threshold / 2000)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        samples = sampler.unregister(thread_id)
+        if samples and (picked or (threshold and elapsed * 1000 >= threshold)):
+            try:
+                path = write_profile(name, samples, elapsed)
+                logger.info("Profiled %s request to %s in %.0fms: %s", request.method, request.path,
+                            elapsed * 1000, path)
+            except OSError:
+                logger.warning("Could not write the profile of %s", request.path, exc_info=True)
+
+
+def profiled_view(name):
+    """
+    Profiles the decorated view with profile_request.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with profile_request(request, name):
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
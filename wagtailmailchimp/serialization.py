@@ -0,0 +1,92 @@
+"""
+Compact serialization of the entries MailchimpApi stores in the cache.
+
+An entry is pickled as a call to load_cache_entry with a bytes payload, instead of
+the pickled objects. The payload starts with a header holding a magic number, the
+format version and flags, followed by the pickled entry data, zlib compressed if
+it is larger than WAGTAILMAILCHIMP_CACHE_COMPRESS_THRESHOLD bytes.
+
+Schemas and audience catalogs are stored as tuples of their data, without the
+indexes and hashes derived from it, which are rebuilt when loading, except for
+the schema version, cheaper to store than to compute. Mailchimp data compresses
+well: the merge fields of an audience, with their choices and help texts, are
+typically 10 times smaller once compressed.
+"""
+import logging
+import pickle
+import struct
+import zlib
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MC"
+FORMAT_VERSION = 1
+FLAG_COMPRESSED = 1
+
+HEADER = struct.Struct(">2sBB")
+
+
+def is_compact_serialization_enabled():
+    return getattr(settings, "WAGTAILMAILCHIMP_CACHE_SERIALIZATION", "compact") == "compact"
+
+
+def encode_value(value):
+    from .api import AudienceCatalog, ListSchema, thaw_schema_data
+
+    if isinstance(value, ListSchema):
+        return "schema", (value.list_id, value.version, thaw_schema_data(value.merge_fields),
+                          thaw_schema_data(value.interest_categories))
+    if isinstance(value, AudienceCatalog):
+        return "catalog", value.audiences
+    return "value", value
+
+
+def decode_value(kind, data):
+    from .api import AudienceCatalog, ListSchema
+
+    if kind == "schema":
+        list_id, version, merge_fields, interest_categories = data
+        return ListSchema(list_id, merge_fields, interest_categories, version=version)
+    if kind == "catalog":
+        return AudienceCatalog(data)
+    return data
+
+
+def dump_cache_entry(entry):
+    """
+    Returns the compact payload of a CacheEntry.
+    """
+    data = pickle.dumps((entry.fresh_until, encode_value(entry.value)), pickle.HIGHEST_PROTOCOL)
+
+    flags = 0
+    if len(data) > getattr(settings, "WAGTAILMAILCHIMP_CACHE_COMPRESS_THRESHOLD", 1024):
+        data = zlib.compress(data, getattr(settings, "WAGTAILMAILCHIMP_CACHE_COMPRESS_LEVEL", 6))
+        flags |= FLAG_COMPRESSED
+
+    return HEADER.pack(MAGIC, FORMAT_VERSION, flags) + data
+
+
+def load_cache_entry(payload):
+    """
+    Returns the CacheEntry of a payload written by dump_cache_entry, or None, read as a
+    cache miss, if the payload is of an unknown version or can't be decoded.
+    """
+    from .api import CacheEntry
+
+    try:
+        magic, version, flags = HEADER.unpack_from(payload)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            # written by another version of this module, fetch the data again
+            return None
+
+        data = payload[HEADER.size:]
+        if flags & FLAG_COMPRESSED:
+            data = zlib.decompress(data)
+
+        fresh_until, (kind, value) = pickle.loads(data)
+        return CacheEntry(decode_value(kind, value), fresh_until)
+    except (struct.error, zlib.error, pickle.UnpicklingError, ValueError, TypeError):
+        logger.warning("Could not decode a cached Mailchimp entry", exc_info=True)
+        return None
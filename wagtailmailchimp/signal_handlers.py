@@ -0,0 +1,34 @@
+import logging
+from functools import partial
+
+from django.db import transaction
+from wagtail.signals import page_published
+
+from .campaigns import enqueue_page_campaign_sync
+from .signals import audience_schema_changed
+
+logger = logging.getLogger(__name__)
+
+
+def page_published_campaign_handler(instance, **kwargs):
+    from .models import AbstractMailchimpCampaignPage
+
+    if isinstance(instance, AbstractMailchimpCampaignPage) and instance.should_sync_mailchimp_campaign():
+        transaction.on_commit(partial(enqueue_page_campaign_sync, instance.pk))
+
+
+def audience_schema_changed_handler(list_id, **kwargs):
+    from .tasks import purge_audience_pages_task
+
+    # the sign-up forms of the audience changed, purge its pages from the frontend cache,
+    # outside of the request that fetched the new schema
+    try:
+        purge_audience_pages_task.enqueue(list_id)
+    except Exception:
+        logger.exception("Could not queue a frontend cache purge of the pages of Mailchimp audience %s", list_id)
+
+
+def register_signal_handlers():
+    page_published.connect(page_published_campaign_handler, dispatch_uid="wagtailmailchimp_campaign_on_publish")
+    audience_schema_changed.connect(audience_schema_changed_handler,
+                                    dispatch_uid="wagtailmailchimp_purge_audience_pages")
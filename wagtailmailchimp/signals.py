@@ -0,0 +1,9 @@
+from django.dispatch import Signal
+
+# Sent when the merge fields or interest categories fetched from Mailchimp for an
+# audience differ from the ones fetched before. Arguments: list_id
+audience_schema_changed = Signal()
+
+# Sent for each metric reported by wagtailmailchimp, see wagtailmailchimp.metrics.
+# Arguments: name, value, metric_type, tags
+mailchimp_metric = Signal()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def get_audience_schema_snapshot(tenant_id, list_id):
+    from .models import MailchimpAudienceSchema
+
+    try:
+        return MailchimpAudienceSchema.objects.filter(tenant_id=tenant_id, list_id=list_id).first()
+    except DatabaseError:
+        logger.exception("Could not read the schema snapshot of Mailchimp audience %s", list_id)
+        return None
+
+
+def update_audience_schema_snapshot(tenant_id, list_id, kind, data, update):
+    """
+    Applies update to the schema snapshot of the audience, creating it if needed, and
+    saves it with a new version if its merge fields or interest categories changed.
+
+    The hash of the data of each kind last written is kept in the cache, so that
+    fetches returning the same data don't write to the database. update returns
+    False if the data could not be applied to the snapshot yet.
+    """
+    from .models import MailchimpAudienceSchema
+
+    data_hash = hashlib.md5(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+    hash_key = f"wagtailmailchimp-snapshot-hash-{tenant_id}-{list_id}-{kind}"
+    if cache.get(hash_key) == data_hash:
+        return
+
+    try:
+        with transaction.atomic():
+            snapshot, created = MailchimpAudienceSchema.objects.select_for_update().get_or_create(
+                tenant_id=tenant_id, list_id=list_id)
+            previous = (snapshot.merge_fields, snapshot.interest_categories)
+
+            applied = update(snapshot) is not False
+
+            snapshot.fetched_at = timezone.now()
+            if created or (snapshot.merge_fields, snapshot.interest_categories) != previous:
+                snapshot.version += 1
+            snapshot.save()
+    except DatabaseError:
+        logger.exception("Could not save the schema snapshot of Mailchimp audience %s", list_id)
+        return
+
+    if applied:
+        # expires, so that a snapshot changed by other means is written again eventually
+        cache.set(hash_key, data_hash, 60 * 60 * 24)
+
+
+def update_snapshot_merge_fields(tenant_id, list_id, merge_fields):
+    def update(snapshot):
+        snapshot.merge_fields = merge_fields
+
+    update_audience_schema_snapshot(tenant_id, list_id, "merge-fields", merge_fields, update)
+
+
+def update_snapshot_interest_categories(tenant_id, list_id, categories):
+    def update(snapshot):
+        # keep the interests of categories still present, they are fetched separately
+        interests = {category.get("id"): category["interests"] for category in snapshot.interest_categories or []
+                     if "interests" in category}
+        snapshot.interest_categories = [
+            {**category, "interests": interests[category.get("id")]} if category.get("id") in interests
+            else {key: value for key, value in category.items() if key != "interests"}
+            for category in categories
+        ]
+
+    update_audience_schema_snapshot(tenant_id, list_id, "categories", categories, update)
+
+
+def update_snapshot_interests(tenant_id, list_id, interest_category_id, interests):
+    def update(snapshot):
+        # the category was never fetched, there is nowhere to keep the interests yet
+        if not any(category.get("id") == interest_category_id for category in snapshot.interest_categories or []):
+            return False
+        snapshot.interest_categories = [
+            {**category, "interests": interests} if category.get("id") == interest_category_id else category
+            for category in snapshot.interest_categories
+        ]
+
+    update_audience_schema_snapshot(tenant_id, list_id, f"interests-{interest_category_id}", interests, update)
+
+
+def get_schema_refresh_pending_key(tenant_id, list_id):
+    return f"wagtailmailchimp-schema-refresh-pending-{tenant_id}-{list_id}"
+
+
+def enqueue_audience_schema_refresh(tenant_id, list_id):
+    """
+    Queues a refresh of the audience schema from Mailchimp, unless one is already queued.
+    """
+    from .tasks import refresh_audience_schema_task
+
+    pending_key = get_schema_refresh_pending_key(tenant_id, list_id)
+    timeout = getattr(settings, "WAGTAILMAILCHIMP_SCHEMA_REFRESH_PENDING_TIMEOUT", 60 * 10)
+
+    if not cache.add(pending_key, True, timeout):
+        return False
+
+    try:
+        refresh_audience_schema_task.enqueue(tenant_id, list_id)
+    except Exception:
+        cache.delete(pending_key)
+        logger.exception("Could not queue a schema refresh of Mailchimp audience %s", list_id)
+        return False
+
+    return True
+
+
+def get_api_key_for_tenant(tenant_id):
+    from .api import get_tenant_id
+    from .models import MailchimpSettings
+
+    for api_key in MailchimpSettings.objects.exclude(api_key="").exclude(api_key=None) \
+            .values_list("api_key", flat=True).distinct():
+        if get_tenant_id(api_key) == tenant_id:
+            return api_key
+    return None
@@ -0,0 +1,223 @@
+"""
+Subscribing a member to several audiences at once.
+
+The main audience is subscribed in the request thread. The additional audiences
+are subscribed concurrently, in a thread pool shared by the process, and the
+response waits at most WAGTAILMAILCHIMP_SUBSCRIBE_DEADLINE seconds for them, so
+that adding audiences to a page doesn't add up their latencies.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import close_old_connections
+from mailchimp3.mailchimpclient import MailChimpError
+
+from . import metrics
+from .api import MailchimpApi
+from .audit import get_mailchimp_error_title, track_subscription_attempt
+from .budgets import SOFT, get_budget_status, soft_limits_ignored
+from .errors import MailchimpBudgetError
+from .validation import validate_member_payload
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "WAGTAILMAILCHIMP_SUBSCRIBE_WORKERS", 8),
+                    thread_name_prefix="wagtailmailchimp-subscribe")
+
+    return _executor
+
+
+class SubscriptionResult:
+    """
+    Outcome of subscribing a member to an audience. error is the exception raised
+    by the subscription, if it failed. queued is set when the subscription was queued
+    to be made later, because the Mailchimp calls were over a budget limit.
+    unknown is set when the subscription was still running at the deadline, its
+    outcome is only recorded in the audit log.
+    """
+
+    def __init__(self, list_id, response=None, error=None, queued=False, unknown=False):
+        self.list_id = list_id
+        self.response = response
+        self.error = error
+        self.queued = queued
+        self.unknown = unknown
+
+    @property
+    def succeeded(self):
+        return self.error is None and not self.unknown
+
+    @property
+    def already_subscribed(self):
+        return get_mailchimp_error_title(self.error) == "Member Exists" if self.error else False
+
+    def raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+
+def subscribe_member(api, page, list_id, data, before_send=None):
+    """
+    Validates and subscribes a member to an audience, recording the attempt in the
+    audit log, and returns a SubscriptionResult.
+
+    before_send is called once the member data is validated, before it is sent or
+    queued, so that it is not called when the audience would reject it.
+    """
+    try:
+        if queue_if_over_budget(api, page, list_id, data, before_send):
+            return SubscriptionResult(list_id, queued=True)
+
+        with track_subscription_attempt(page, list_id, data.get("email_address")):
+            schema = api.get_list_schema(list_id)
+            validate_member_payload(schema, data, degraded=api.degraded)
+            if before_send is not None:
+                before_send()
+            try:
+                response = api.add_user_to_list(list_id=list_id, data=data)
+            except MailChimpError as e:
+                # the tags of the payload are only applied to new members
+                if data.get("tags") and get_mailchimp_error_title(e) == "Member Exists":
+                    add_member_tags(api, list_id, data["email_address"], data["tags"])
+                raise
+        return SubscriptionResult(list_id, response=response)
+    except MailchimpBudgetError as e:
+        if queue_over_hard_limit(page, list_id, data, e):
+            return SubscriptionResult(list_id, queued=True)
+        return SubscriptionResult(list_id, error=e)
+    except Exception as e:
+        return SubscriptionResult(list_id, error=e)
+
+
+def queue_if_over_budget(api, page, list_id, data, before_send=None):
+    """
+    Queues the subscription, if the calls of the account or audience reached a soft
+    budget limit, to be made once the window of the limit is over. Returns whether
+    it was queued. Raises MailchimpPayloadError if the member data would be rejected.
+    """
+    from .tasks import enqueue_subscribe_member
+
+    if soft_limits_ignored() or getattr(page, "pk", None) is None:
+        return False
+
+    status = get_budget_status(api.tenant_id, list_id)
+    if status.level != SOFT:
+        return False
+
+    # the member must not find out later that the subscription was rejected
+    schema = api.get_list_schema(list_id)
+    validate_member_payload(schema, data, degraded=api.degraded)
+    if before_send is not None:
+        before_send()
+
+    try:
+        if not enqueue_subscribe_member(page.pk, list_id, data, status.retry_after):
+            return False
+    except Exception:
+        logger.exception("Could not queue a subscription to Mailchimp audience %s, subscribing now", list_id)
+        return False
+
+    metrics.increment("budget.queued", list_id=list_id, level=status.level, window=status.window)
+    return True
+
+
+def queue_over_hard_limit(page, list_id, data, error):
+    """
+    Queues the subscription, stopped by a hard budget limit, to be made once the window
+    of the limit is over. Returns whether it was queued.
+    """
+    from .tasks import enqueue_subscribe_member
+
+    if getattr(page, "pk", None) is None:
+        return False
+
+    try:
+        if not enqueue_subscribe_member(page.pk, list_id, data, error.retry_after):
+            return False
+    except Exception:
+        logger.exception("Could not queue a subscription to Mailchimp audience %s", list_id)
+        return False
+
+    metrics.increment("budget.queued", list_id=list_id, level=error.level)
+    return True
+
+
+def add_member_tags(api, list_id, email, tags):
+    try:
+        api.add_member_tags(list_id, email, tags)
+    except Exception as e:
+        logger.warning("Could not tag a member of audience %s: %r", list_id, e)
+        metrics.increment("subscribe.tags_failed", list_id=list_id)
+
+
+def subscribe_member_in_thread(api_key, page, list_id, data):
+    try:
+        # an API instance per thread, its degraded flag and snapshots are per sign-up
+        return subscribe_member(MailchimpApi(api_key), page, list_id, data)
+    finally:
+        # the pool threads live outside of the request cycle, which closes connections
+        close_old_connections()
+
+
+def subscribe_to_audiences(api, page, subscriptions):
+    """
+    Subscribes a member to several audiences, given as a list of (list_id, data)
+    tuples, the first one being the main audience of the page. Returns the
+    SubscriptionResult of each audience, in the same order, or only the result of
+    the main audience if it would reject the member data, in which case nothing is
+    sent to the other audiences.
+    """
+    list_id, data = subscriptions[0]
+    additional = subscriptions[1:]
+    futures = []
+    deadline = []
+
+    def send_additional():
+        # may be called twice if queuing the main subscription failed
+        if futures or not additional:
+            return
+        executor = get_executor()
+        deadline.append(time.monotonic() + getattr(settings, "WAGTAILMAILCHIMP_SUBSCRIBE_DEADLINE", 10))
+        futures.extend((additional_list_id, executor.submit(subscribe_member_in_thread, api.api_key, page,
+                                                            additional_list_id, additional_data))
+                       for additional_list_id, additional_data in additional)
+
+    main_result = subscribe_member(api, page, list_id, data, before_send=send_additional)
+
+    if not futures:
+        return [main_result]
+
+    done, _ = wait([future for _, future in futures], timeout=max(deadline[0] - time.monotonic(), 0))
+
+    results = [main_result]
+    for additional_list_id, future in futures:
+        if future in done:
+            results.append(future.result())
+        else:
+            # the call can't be stopped, it may still subscribe the member
+            results.append(SubscriptionResult(additional_list_id, unknown=True))
+
+    for result in results[1:]:
+        if result.unknown:
+            logger.info("Subscribing a member to additional audience %s did not finish before the deadline",
+                        result.list_id)
+            metrics.increment("subscribe.additional_unknown", list_id=result.list_id)
+        elif not result.succeeded and not result.already_subscribed:
+            logger.warning("Could not subscribe a member to additional audience %s: %r", result.list_id, result.error)
+            metrics.increment("subscribe.additional_failed", list_id=result.list_id)
+
+    return results
@@ -0,0 +1,183 @@
+import logging
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from django.apps import apps
+from mailchimp3.helpers import check_email
+
+from .api import MailchimpApi
+
+logger = logging.getLogger(__name__)
+
+# Mailchimp accepts at most 500 members per batch subscribe request
+MAX_BATCH_SIZE = 500
+
+
+def get_integration_form_page_models():
+    """
+    Returns all concrete page models built on AbstractMailchimpIntegrationForm.
+    """
+    from .models import AbstractMailchimpIntegrationForm
+
+    return [model for model in apps.get_models()
+            if issubclass(model, AbstractMailchimpIntegrationForm) and not model._meta.abstract]
+
+
+def get_integration_form_pages(page_ids=None):
+    """
+    Returns the integration form pages that have a Mailchimp audience set,
+    optionally restricted to the given page ids.
+    """
+    pages = {}
+
+    for model in get_integration_form_page_models():
+        queryset = model.objects.exclude(audience_list_id__isnull=True).exclude(audience_list_id="")
+        if page_ids:
+            queryset = queryset.filter(pk__in=page_ids)
+
+        for page in queryset:
+            # with multi-table inheritance a page can be returned by more than one model,
+            # keep the most specific instance
+            if page.pk not in pages or isinstance(page, type(pages[page.pk])):
+                pages[page.pk] = page
+
+    return list(pages.values())
+
+
+def group_pages_by_submission_class(pages):
+    pages_by_class = defaultdict(list)
+    for page in pages:
+        pages_by_class[page.get_submission_class()].append(page)
+    return pages_by_class
+
+
+def iter_form_submissions(submission_class, page_ids, after_id=0, chunk_size=2000, since=None):
+    """
+    Streams form submissions of the given pages in primary key order, without
+    loading the whole result set in memory, optionally only those submitted since
+    the given datetime.
+    """
+    queryset = submission_class.objects.filter(page_id__in=page_ids, pk__gt=after_id) \
+        .only("pk", "page_id", "form_data") \
+        .order_by("pk")
+    if since is not None:
+        queryset = queryset.filter(submit_time__gte=since)
+
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def get_api_key_for_page(page):
+    from .models import MailchimpSettings
+
+    site = page.get_site()
+    if site is None:
+        return None
+
+    return MailchimpSettings.for_site(site).api_key
+
+
+def group_pages_by_audience(pages):
+    """
+    Returns the pages grouped by (api_key, list_id) of their main and additional
+    audiences, skipping the pages of sites without a Mailchimp API key.
+    """
+    from .models import get_additional_audiences
+
+    pages_by_audience = defaultdict(list)
+    for page in pages:
+        api_key = get_api_key_for_page(page)
+        if not api_key:
+            continue
+        pages_by_audience[(api_key, page.audience_list_id)].append(page)
+        for audience in get_additional_audiences(page.additional_audiences):
+            if audience["list_id"] != page.audience_list_id:
+                pages_by_audience[(api_key, audience["list_id"])].append(page)
+    return pages_by_audience
+
+
+def remove_existing_members(api, list_id, pending, workers=4):
+    """
+    Removes from pending, a dict keyed by subscriber hash, the members of the audience,
+    whatever their status, so that people who unsubscribed are not subscribed again.
+
+    Each pending subscriber hash is looked up on Mailchimp, workers at a time, so the
+    cost depends on the number of submissions checked, not on the size of the audience.
+    Hashes whose lookup failed are removed too, they are checked again on the next run.
+    """
+    if not pending:
+        return pending
+
+    def is_member(subscriber_hash):
+        try:
+            # an API instance per lookup, they run in several threads
+            return MailchimpApi(api.api_key).get_member(list_id, subscriber_hash, fields="id") is not None
+        except Exception as e:
+            logger.warning("Could not look up a member of Mailchimp audience %s: %r", list_id, e)
+            return True
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # each lookup runs in a copy of the caller's context, so in its priority lane
+        futures = [(subscriber_hash, executor.submit(copy_context().run, is_member, subscriber_hash))
+                   for subscriber_hash in pending]
+
+        for subscriber_hash, future in futures:
+            if future.result():
+                del pending[subscriber_hash]
+
+    return pending
+
+
+class MemberBatchPusher:
+    """
+    Buffers member payloads per audience and pushes them to Mailchimp using
+    the batch subscribe endpoint.
+    """
+
+    def __init__(self, batch_size=MAX_BATCH_SIZE, update_existing=False, dry_run=False):
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.update_existing = update_existing
+        self.dry_run = dry_run
+        self.buffers = defaultdict(list)
+        self.stats = Counter()
+
+    @property
+    def pending_count(self):
+        return sum(len(members) for members in self.buffers.values())
+
+    def add(self, api_key, list_id, member):
+        try:
+            check_email(member.get("email_address", ""))
+        except ValueError:
+            self.stats["invalid"] += 1
+            return
+
+        self.buffers[(api_key, list_id)].append(member)
+
+    def flush(self):
+        for (api_key, list_id), members in self.buffers.items():
+            for start in range(0, len(members), self.batch_size):
+                self.push(api_key, list_id, members[start:start + self.batch_size])
+
+        self.buffers.clear()
+
+    def push(self, api_key, list_id, members):
+        if self.dry_run:
+            self.stats["pushed"] += len(members)
+            return
+
+        api = MailchimpApi(api_key=api_key)
+        result = api.batch_add_users_to_list(list_id=list_id, members=members,
+                                             update_existing=self.update_existing)
+
+        self.stats["pushed"] += len(members)
+        self.stats["created"] += result.get("total_created", 0)
+        self.stats["updated"] += result.get("total_updated", 0)
+
+        for error in result.get("errors", []):
+            if error.get("error_code") == "ERROR_CONTACT_EXISTS":
+                self.stats["existing"] += 1
+            else:
+                self.stats["failed"] += 1
+                logger.warning("Could not add %s to Mailchimp audience %s: %s",
+                               error.get("email_address"), list_id, error.get("error"))
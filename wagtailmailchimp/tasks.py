@@ -0,0 +1,133 @@
+import logging
+from datetime import timedelta
+
+from django.core.cache import cache
+from django_tasks import task
+from wagtail.models import Page
+
+from .api import MailchimpApi
+from .budgets import ignore_soft_limits
+from .campaigns import get_campaign_sync_pending_key, sync_page_campaign
+from .frontend_cache import purge_audience_pages_from_cache
+from .lanes import BULK, priority
+from .snapshots import get_api_key_for_tenant, get_schema_refresh_pending_key
+from .sync import MemberBatchPusher, get_api_key_for_page
+
+logger = logging.getLogger(__name__)
+
+
+@task()
+def sync_page_campaign_task(page_id):
+    # clear the pending flag before reading the page, so that a publish
+    # happening while we sync queues another sync with its content
+    cache.delete(get_campaign_sync_pending_key(page_id))
+
+    page = Page.objects.filter(pk=page_id).first()
+    if page is None:
+        return
+
+    page = page.specific
+    if not page.live or not page.should_sync_mailchimp_campaign():
+        return
+
+    with priority(BULK):
+        sync_page_campaign(page)
+
+
+@task()
+def refresh_audience_schema_task(tenant_id, list_id):
+    cache.delete(get_schema_refresh_pending_key(tenant_id, list_id))
+
+    # the task gets the account id rather than its API key, so that keys aren't stored in the queue
+    api_key = get_api_key_for_tenant(tenant_id)
+    if api_key is None:
+        logger.warning("No Mailchimp API key found to refresh the schema of audience %s", list_id)
+        return
+
+    # left in the interactive lane, the schema is served to sign-up pages
+    MailchimpApi(api_key).refresh_audience_schema(list_id)
+
+
+@task()
+def purge_audience_pages_task(list_id):
+    purge_audience_pages_from_cache(list_id)
+
+
+@task()
+def resubscribe_submissions_task(page_id, submission_ids, list_id=None):
+    """
+    Pushes the given form submissions of an integration form page to one of its
+    audiences, the main one by default, queued by the mailchimp_reconcile_submissions
+    command for missing members.
+    """
+    with priority(BULK):
+        page = Page.objects.filter(pk=page_id).first()
+        if page is None:
+            return
+
+        page = page.specific
+        api_key = get_api_key_for_page(page)
+        if not api_key or not page.audience_list_id:
+            logger.warning("Page %s has no Mailchimp API key or audience, its submissions were not pushed", page_id)
+            return
+
+        list_id = list_id or page.audience_list_id
+
+        pusher = MemberBatchPusher()
+        submissions = page.get_submission_class().objects.filter(page_id=page_id, pk__in=submission_ids)
+
+        for submission in submissions.only("pk", "page_id", "form_data"):
+            try:
+                member = page.get_mc_submission_audience_member_data(submission, list_id)
+            except Exception:
+                logger.warning("Could not build Mailchimp member data for submission %s", submission.pk, exc_info=True)
+                continue
+            if member is not None:
+                pusher.add(api_key, list_id, member)
+
+        pusher.flush()
+
+        stats = pusher.stats
+        logger.info("Pushed %s members of page %s to Mailchimp audience %s: %s created, %s already subscribed, "
+                    "%s failed", stats["pushed"], page_id, list_id, stats["created"], stats["existing"],
+                    stats["failed"])
+
+
+@task()
+def subscribe_member_task(page_id, list_id, data):
+    """
+    Subscribes a member to an audience, queued by a sign-up on the page while the
+    Mailchimp calls of its account or audience were over a budget limit.
+    """
+    from .subscriptions import subscribe_member
+
+    page = Page.objects.filter(pk=page_id).first()
+    if page is None:
+        return
+
+    page = page.specific
+    api_key = get_api_key_for_page(page)
+    if not api_key:
+        logger.warning("Page %s has no Mailchimp API key, a queued subscription to audience %s was dropped",
+                       page_id, list_id)
+        return
+
+    with priority(BULK), ignore_soft_limits():
+        result = subscribe_member(MailchimpApi(api_key), page, list_id, data)
+
+    # over a hard limit, subscribe_member queued it again for once the window is over
+    if not result.succeeded and not result.already_subscribed:
+        logger.warning("Could not make a queued subscription to audience %s of page %s: %r",
+                       list_id, page_id, result.error)
+
+
+def enqueue_subscribe_member(page_id, list_id, data, delay):
+    """
+    Queues subscribe_member_task to run in delay seconds. Returns False, without
+    queuing it, if the task backend can't run tasks later, like the ImmediateBackend.
+    """
+    if not subscribe_member_task.get_backend().supports_defer:
+        return False
+
+    subscribe_member_task.using(run_after=timedelta(seconds=delay)).enqueue(page_id, list_id, data)
+    return True
@@ -0,0 +1,50 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+from django.template.loader import render_to_string
+
+register = template.Library()
+
+
+def get_fragment_key_part(value):
+    if isinstance(value, Model):
+        # include the latest revision of pages and other revisable models,
+        # so that edited objects don't reuse a stale fragment
+        return f"{value._meta.label_lower}:{value.pk}:{getattr(value, 'latest_revision_id', '')}"
+    return str(value)
+
+
+@register.simple_tag
+def mailchimp_email_fragment(template_name, **kwargs):
+    """
+    Renders a template shared by campaign emails, such as a header or footer, and caches the result.
+
+    The fragment is rendered with the given keyword arguments as its only context, and cached
+    per template name and arguments. Usage:
+
+        {% load wagtailmailchimp_tags %}
+        {% mailchimp_email_fragment "emails/footer.html" site=page.get_site %}
+    """
+    key_parts = [template_name] + [f"{k}={get_fragment_key_part(v)}" for k, v in sorted(kwargs.items())]
+    cache_key = "wagtailmailchimp-email-fragment-" + hashlib.md5("|".join(key_parts).encode("utf-8")).hexdigest()
+
+    fragment = cache.get(cache_key)
+
+    if fragment is None:
+        fragment = render_to_string(template_name, context=kwargs)
+        cache.set(cache_key, fragment, getattr(settings, "WAGTAILMAILCHIMP_EMAIL_FRAGMENT_CACHE_TIMEOUT", 60 * 5))
+
+    return fragment
+
+
+@register.inclusion_tag("wagtailmailchimp/csrf_token_script.html")
+def mailchimp_csrf_token_script():
+    """
+    Outputs a script that fetches a CSRF token and adds it to the POST forms of the page.
+
+    Use it on sign-up pages that are served without a CSRF token, so that they can be cached by a CDN.
+    """
+    return {}
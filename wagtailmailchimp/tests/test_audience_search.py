@@ -0,0 +1,48 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from wagtail.models import Site
+
+from ..api import AudienceCatalog
+from ..transport import MailchimpTransport
+from ..widgets import MailchimpAudienceSelectWidget
+from .utils import MailchimpTestCase
+
+
+class AudienceSearchTestCase(MailchimpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+
+    def test_catalog_search(self):
+        catalog = AudienceCatalog([{"id": "L1", "name": "Newsletter"}, {"id": "L2", "name": "Weekly news"},
+                                   {"id": "L3", "name": "Events"}])
+        audiences, count = catalog.search("news")
+        self.assertEqual([audience["id"] for audience in audiences], ["L1", "L2"])
+        self.assertEqual(catalog.search("", offset=1, limit=1), ([{"id": "L1", "name": "Newsletter"}], 3))
+        self.assertEqual(catalog.search("nothing"), ([], 0))
+
+    def test_search_view(self):
+        lists = [{"id": f"L{i}", "name": f"Audience {i:02d}"} for i in range(25)]
+        with mock.patch.object(MailchimpTransport, "get_all", return_value=lists) as get_all_lists:
+            first = self.client.get("/admin/mailchimp-audiences/").json()
+            second = self.client.get("/admin/mailchimp-audiences/", {"q": "audience", "page": 2}).json()
+        self.assertEqual((len(first["results"]), first["count"], first["has_next"]), (20, 25, True))
+        self.assertEqual((len(second["results"]), second["has_next"]), (5, False))
+        self.assertEqual(get_all_lists.call_count, 1)
+
+    def test_search_view_without_default_site(self):
+        Site.objects.update(is_default_site=False)
+        response = self.client.get("/admin/mailchimp-audiences/")
+        self.assertEqual(response.json(), {"results": [], "count": 0, "has_next": False})
+
+    def test_deprecated_audience_lists(self):
+        lists = [{"id": "L2", "name": "Weekly news"}, {"id": "L1", "name": "Newsletter"}]
+        with mock.patch.object(MailchimpTransport, "get_all", return_value=lists), \
+                self.assertWarns(DeprecationWarning):
+            audiences = MailchimpAudienceSelectWidget().get_mailchimp_audience_lists()
+        self.assertEqual([audience["id"] for audience in audiences], ["L1", "L2"])
+
+        Site.objects.update(is_default_site=False)
+        with self.assertWarns(DeprecationWarning):
+            self.assertEqual(MailchimpAudienceSelectWidget().get_mailchimp_audience_lists(), [])
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+from django.test import override_settings
+
+from ..audit import add_to_daily_rollup, get_subscriber_hash, record_subscription_attempt
+from ..models import MailchimpSubscriptionAttempt, MailchimpSubscriptionDailyRollup
+from .utils import MailchimpTestCase
+
+SUBSCRIBED = MailchimpSubscriptionAttempt.OUTCOME_SUBSCRIBED
+DUPLICATE = MailchimpSubscriptionAttempt.OUTCOME_DUPLICATE
+FAILED = MailchimpSubscriptionAttempt.OUTCOME_FAILED
+
+
+class SubscriptionAttemptLogTestCase(MailchimpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.create_subscribe_page()
+
+    def record(self, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_subscription_attempt(*args, **kwargs)
+
+    def test_writes_attempts_and_daily_rollup_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_subscription_attempt(self.page, "L1", "ann@gmail.com", SUBSCRIBED, 10)
+            record_subscription_attempt(self.page, "L1", "bob@gmail.com", FAILED, 30, error_title="Invalid Resource")
+            self.assertFalse(MailchimpSubscriptionAttempt.objects.exists())
+        self.record(self.page, "L1", "ann@gmail.com", DUPLICATE, 20)
+
+        self.assertEqual(MailchimpSubscriptionAttempt.objects.count(), 3)
+        self.assertEqual(MailchimpSubscriptionAttempt.objects.first().subscriber_hash,
+                         get_subscriber_hash("ann@gmail.com"))
+        rollup = MailchimpSubscriptionDailyRollup.objects.get()
+        self.assertEqual((rollup.total, rollup.subscribed, rollup.duplicate, rollup.failed), (3, 1, 1, 1))
+        self.assertEqual((rollup.max_latency_ms, rollup.avg_latency_ms), (30, 20))
+
+    def test_rollup_without_page_is_created_once(self):
+        self.record(None, "L1", "ann@gmail.com", SUBSCRIBED, 10)
+        rollup = MailchimpSubscriptionDailyRollup.objects.get()
+
+        # as if another process created the rollup between the update and the insert
+        with mock.patch("django.db.models.query.QuerySet.update", side_effect=[0, 1]):
+            add_to_daily_rollup(rollup.day, None, {"total": 1, "subscribed": 1, "duplicate": 0, "failed": 0,
+                                                   "latency_total_ms": 10, "max_latency_ms": 10})
+        self.assertEqual(MailchimpSubscriptionDailyRollup.objects.count(), 1)
+
+    def test_failed_write_is_logged(self):
+        with mock.patch("wagtailmailchimp.models.MailchimpSubscriptionAttempt.objects.bulk_create",
+                        side_effect=DatabaseError), self.assertLogs("wagtailmailchimp.audit", "ERROR"):
+            self.record(self.page, "L1", "ann@gmail.com", SUBSCRIBED, 10)
+        self.assertFalse(MailchimpSubscriptionDailyRollup.objects.exists())
+
+    @override_settings(WAGTAILMAILCHIMP_AUDIT_LOG_ENABLED=False)
+    def test_disabled(self):
+        self.record(self.page, "L1", "ann@gmail.com", SUBSCRIBED, 10)
+        self.assertFalse(MailchimpSubscriptionAttempt.objects.exists())
+
+    def test_report(self):
+        self.record(self.page, "L1", "ann@gmail.com", SUBSCRIBED, 10)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        response = self.client.get("/admin/mailchimp-subscriptions/")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Sign up")
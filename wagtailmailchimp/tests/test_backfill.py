@@ -0,0 +1,84 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from wagtail.contrib.forms.models import FormSubmission
+from wagtail.models import Page, Site
+
+from home.models import HomePage
+
+from ..api import MailchimpApi
+from ..models import MailchimpSettings, MailchimpSyncCheckpoint
+from .utils import API_KEY, MailchimpTestCase
+
+
+class BackfillSubmissionsTestCase(MailchimpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.create_integration_page()
+        self.opted_in = self.create_submission(self.page, "ann@gmail.com", True)
+        self.create_submission(self.page, "bob@gmail.com", False)
+        # made before the opt-in was recorded
+        self.legacy = self.create_submission(self.page, "cat@gmail.com", None)
+        self.pushed = []
+
+    def create_submission(self, page, email, opted_in):
+        form_data = {"email": email, "first_name": ""}
+        if opted_in is not None:
+            form_data["mailchimp_subscribe_check"] = opted_in
+        return FormSubmission.objects.create(page=page, form_data=form_data)
+
+    def create_keyless_page(self):
+        home = HomePage(title="Other", slug="other")
+        Page.get_first_root_node().add_child(instance=home)
+        Site.objects.create(hostname="other.example.com", root_page=home)
+        return self.create_integration_page(parent=home)
+
+    def batch_add_users_to_list(self, list_id, members, update_existing=False):
+        self.pushed.extend(member["email_address"] for member in members)
+        return {"total_created": len(members), "total_updated": 0, "errors": []}
+
+    def backfill(self, *args):
+        with mock.patch.object(MailchimpApi, "batch_add_users_to_list", self.batch_add_users_to_list):
+            call_command("mailchimp_backfill_submissions", *args, stdout=StringIO(), stderr=StringIO())
+
+    def get_checkpoint(self, page):
+        return MailchimpSyncCheckpoint.objects.get(name=f"form-submissions-backfill:page-{page.pk}")
+
+    def test_pushes_opted_in_submissions_once(self):
+        self.backfill()
+        self.assertEqual(self.pushed, ["ann@gmail.com"])
+        checkpoint = self.get_checkpoint(self.page)
+        self.assertEqual((checkpoint.last_processed_id, checkpoint.processed_count), (self.legacy.pk, 1))
+
+        self.backfill()
+        self.assertEqual(self.pushed, ["ann@gmail.com"])
+        self.assertEqual(self.get_checkpoint(self.page).processed_count, 1)
+
+    def test_assume_opted_in_pushes_legacy_submissions(self):
+        self.backfill("--assume-opted-in")
+        self.assertEqual(self.pushed, ["ann@gmail.com", "cat@gmail.com"])
+
+    def test_dry_run_saves_no_progress(self):
+        self.backfill("--dry-run")
+        self.assertEqual(self.pushed, [])
+        self.assertFalse(MailchimpSyncCheckpoint.objects.exists())
+
+    def test_pages_without_api_key_do_not_hold_back_the_others(self):
+        keyless_page = self.create_keyless_page()
+        self.create_submission(keyless_page, "dan@gmail.com", True)
+        later = self.create_submission(self.page, "eve@gmail.com", True)
+
+        self.backfill()
+        self.assertEqual(self.pushed, ["ann@gmail.com", "eve@gmail.com"])
+        self.assertEqual(self.get_checkpoint(self.page).last_processed_id, later.pk)
+        self.assertFalse(MailchimpSyncCheckpoint.objects.filter(name__endswith=f"page-{keyless_page.pk}").exists())
+
+        self.backfill()
+        self.assertEqual(self.pushed, ["ann@gmail.com", "eve@gmail.com"])
+
+        other_settings = MailchimpSettings.for_site(keyless_page.get_site())
+        other_settings.api_key = API_KEY
+        other_settings.save()
+        self.backfill()
+        self.assertEqual(self.pushed, ["ann@gmail.com", "eve@gmail.com", "dan@gmail.com"])
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from .. import budgets
+from ..api import MailchimpApi
+from ..errors import MailchimpBudgetError
+from ..subscriptions import subscribe_member
+from ..transport import MailchimpTransport
+from .utils import API_KEY, MailchimpTestCase, get_all
+
+
+BUDGETS = {"enabled": True, "account_limits": {"minute": (2, 3)}}
+
+
+@override_settings(WAGTAILMAILCHIMP_BUDGETS=BUDGETS)
+class BudgetsTestCase(MailchimpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tenant_id = MailchimpApi(API_KEY).tenant_id
+
+    def get_account_calls(self):
+        return budgets.get_usage(self.tenant_id, [budgets.get_account_scope()])[("account", "minute")]
+
+    def test_hard_limit(self):
+        for i in range(3):
+            budgets.charge_call(self.tenant_id, "subscribe")
+        with self.assertRaises(MailchimpBudgetError) as raised, self.assertLogs("wagtailmailchimp.budgets", "WARNING"):
+            budgets.charge_call(self.tenant_id, "subscribe")
+        self.assertEqual(raised.exception.level, budgets.HARD)
+        # refused calls are not counted
+        self.assertEqual(self.get_account_calls(), 3)
+
+    def test_soft_limit_only_stops_reads_served_from_cache(self):
+        budgets.charge_call(self.tenant_id, "lists")
+        budgets.charge_call(self.tenant_id, "lists")
+        with self.assertRaises(MailchimpBudgetError), self.assertLogs("wagtailmailchimp.budgets", "WARNING"):
+            budgets.charge_call(self.tenant_id, "lists", serve_cached=True)
+        budgets.charge_call(self.tenant_id, "subscribe")
+        self.assertEqual(self.get_account_calls(), 3)
+
+    @override_settings(WAGTAILMAILCHIMP_BUDGETS={"enabled": False, "account_limits": {"minute": (0, 0)}})
+    def test_disabled(self):
+        budgets.charge_call(self.tenant_id, "subscribe")
+        self.assertEqual(self.get_account_calls(), 0)
+
+    def test_sign_up_is_queued_at_hard_limit(self):
+        page = self.create_subscribe_page()
+        error = MailchimpBudgetError("Over the limit", level=budgets.HARD, retry_after=30)
+        with mock.patch.object(MailchimpTransport, "get_all", get_all), \
+                mock.patch.object(MailchimpApi, "add_user_to_list", side_effect=error), \
+                mock.patch("wagtailmailchimp.tasks.enqueue_subscribe_member", return_value=True) as enqueue:
+            result = subscribe_member(MailchimpApi(API_KEY), page, "L1", {"email_address": "ann@gmail.com"})
+        self.assertTrue(result.queued)
+        enqueue.assert_called_once_with(page.pk, "L1", {"email_address": "ann@gmail.com"}, 30)
+
+    def test_sign_up_fails_when_it_can_not_be_queued(self):
+        page = self.create_subscribe_page()
+        error = MailchimpBudgetError("Over the limit", level=budgets.HARD, retry_after=30)
+        with mock.patch.object(MailchimpTransport, "get_all", get_all), \
+                mock.patch.object(MailchimpApi, "add_user_to_list", side_effect=error), \
+                mock.patch("wagtailmailchimp.tasks.enqueue_subscribe_member", side_effect=ConnectionError), \
+                self.assertLogs("wagtailmailchimp.subscriptions", "ERROR"):
+            result = subscribe_member(MailchimpApi(API_KEY), page, "L1", {"email_address": "ann@gmail.com"})
+        self.assertIs(result.error, error)
+
+    def test_report(self):
+        budgets.charge_call(self.tenant_id, "subscribe")
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        response = self.client.get("/admin/mailchimp-budgets/")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.tenant_id)
+        self.assertContains(response, "Sites sharing these budgets:")
@@ -0,0 +1,53 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..api import MailchimpApi
+from .utils import API_KEY, fail
+
+
+class CachedFetchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = MailchimpApi(API_KEY)
+
+    def expire(self, name, *parts):
+        cache_key = self.api.make_cache_key(name, *parts)
+        entry = cache.get(cache_key)
+        entry.fresh_until = 0
+        cache.set(cache_key, entry, 100)
+
+    def test_fetches_once(self):
+        fetch = mock.Mock(return_value=["fresh"])
+        self.assertEqual(self.api.get_cached("lists", [], fetch), ["fresh"])
+        self.assertEqual(self.api.get_cached("lists", [], fetch), ["fresh"])
+        fetch.assert_called_once()
+
+    def test_serves_stale_value_while_another_process_fetches(self):
+        self.api.get_cached("lists", [], lambda: ["stale"])
+        self.expire("lists")
+        cache.add(f"{self.api.make_cache_key('lists')}:lock", "other", 10)
+        fetch = mock.Mock(return_value=["fresh"])
+        self.assertEqual(self.api.get_cached("lists", [], fetch), ["stale"])
+        fetch.assert_not_called()
+
+    @override_settings(WAGTAILMAILCHIMP_CACHE_LOCK_WAIT=0.1)
+    def test_fetches_when_lease_holder_is_too_slow(self):
+        cache.add(f"{self.api.make_cache_key('lists')}:lock", "other", 10)
+        self.assertEqual(self.api.get_cached("lists", [], lambda: ["fresh"]), ["fresh"])
+
+    def test_failures_are_cached(self):
+        fetch = mock.Mock(side_effect=ConnectionError)
+        with self.assertLogs("wagtailmailchimp.api", "WARNING"):
+            self.assertEqual(self.api.get_cached_or_fallback("lists", [], fetch, []), [])
+        self.assertEqual(self.api.get_cached_or_fallback("lists", [], fetch, []), [])
+        fetch.assert_called_once()
+        self.assertTrue(self.api.degraded)
+
+    def test_serves_last_known_good_value(self):
+        self.assertEqual(self.api.get_cached_or_fallback("lists", [], lambda: ["good"], []), ["good"])
+        self.expire("lists")
+        with self.assertLogs("wagtailmailchimp.api", "WARNING"):
+            self.assertEqual(self.api.get_cached_or_fallback("lists", [], fail, []), ["good"])
+        self.assertTrue(self.api.degraded)
@@ -0,0 +1,97 @@
+from unittest import mock
+
+from mailchimp3.mailchimpclient import MailChimpError
+
+from home.models import SampleProductPage
+
+from ..api import MailchimpApi
+from ..campaigns import sync_page_campaign
+from ..models import MailchimpPageCampaign, MailchimpSettings
+from .utils import MailchimpTestCase, mailchimp_error
+
+
+class PageCampaignTestCase(MailchimpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = SampleProductPage(title="Product", slug="product", campaign_audience_id="L1",
+                                      campaign_from_name="Shop", campaign_reply_to="shop@example.com")
+        self.site.root_page.add_child(instance=self.page)
+        self.calls = []
+        self.sent = set()
+        self.deleted = set()
+
+        patchers = [
+            mock.patch.object(MailchimpApi, "create_campaign", self.create_campaign),
+            mock.patch.object(MailchimpApi, "update_campaign", self.update_campaign),
+            mock.patch.object(MailchimpApi, "set_campaign_content", self.set_campaign_content),
+            mock.patch.object(MailchimpApi, "get_campaign_status",
+                              lambda api, campaign_id: "sent" if campaign_id in self.sent else "save"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def check_campaign(self, campaign_id):
+        if campaign_id in self.deleted:
+            raise mailchimp_error(404, "Resource Not Found")
+        if campaign_id in self.sent:
+            raise mailchimp_error(400, "Bad Request")
+
+    def create_campaign(self, data):
+        campaign_id = f"C{len([call for call in self.calls if call[0] == 'create']) + 1}"
+        self.calls.append(("create", campaign_id))
+        return {"id": campaign_id}
+
+    def update_campaign(self, campaign_id, data):
+        self.check_campaign(campaign_id)
+        self.calls.append(("update", campaign_id))
+
+    def set_campaign_content(self, campaign_id, data):
+        self.check_campaign(campaign_id)
+        self.calls.append(("content", campaign_id))
+
+    def test_creates_campaign(self):
+        sync_page_campaign(self.page)
+        self.assertEqual(self.calls, [("create", "C1"), ("content", "C1")])
+        self.assertEqual(MailchimpPageCampaign.objects.get(page_id=self.page.pk).campaign_id, "C1")
+
+    def test_creates_new_campaign_once_sent(self):
+        sync_page_campaign(self.page)
+        self.sent.add("C1")
+        self.page.campaign_from_name = "Store"
+        sync_page_campaign(self.page)
+        self.assertEqual(MailchimpPageCampaign.objects.get(page_id=self.page.pk).campaign_id, "C2")
+
+    def test_creates_campaign_and_skips_unchanged_syncs(self):
+        sync_page_campaign(self.page)
+        self.assertEqual(self.calls, [("create", "C1"), ("content", "C1")])
+
+        self.calls.clear()
+        sync_page_campaign(self.page)
+        self.assertEqual(self.calls, [])
+
+        self.page.campaign_from_name = "Store"
+        sync_page_campaign(self.page)
+        self.assertEqual(self.calls, [("update", "C1")])
+
+    def test_recreates_campaign_when_content_upload_404s(self):
+        sync_page_campaign(self.page)
+        self.deleted.add("C1")
+        with mock.patch.object(SampleProductPage, "get_campaign_content", lambda page: {"html": "<p>New</p>"}):
+            sync_page_campaign(self.page)
+        self.assertEqual(self.calls[-2:], [("create", "C2"), ("content", "C2")])
+        self.assertEqual(MailchimpPageCampaign.objects.get(page_id=self.page.pk).campaign_id, "C2")
+
+    def test_raises_other_errors(self):
+        sync_page_campaign(self.page)
+        self.page.campaign_from_name = "Store"
+        with mock.patch.object(MailchimpApi, "update_campaign", side_effect=mailchimp_error(400, "Invalid Resource")):
+            with self.assertRaises(MailChimpError):
+                sync_page_campaign(self.page)
+        self.assertEqual(MailchimpPageCampaign.objects.get(page_id=self.page.pk).campaign_id, "C1")
+
+    def test_no_api_key(self):
+        MailchimpSettings.objects.update(api_key="")
+        with self.assertLogs("wagtailmailchimp.campaigns", "WARNING"):
+            self.assertIsNone(sync_page_campaign(self.page))
+        self.assertEqual(self.calls, [])
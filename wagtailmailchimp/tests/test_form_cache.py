@@ -0,0 +1,31 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from ..forms import MailChimpForm
+from ..transport import MailchimpTransport
+from .utils import SubscribePageTestCase, fail, get_all
+
+
+@mock.patch.object(MailchimpTransport, "get_all", get_all)
+class FormCacheTestCase(SubscribePageTestCase):
+    def test_form_is_built_once(self):
+        with mock.patch("wagtailmailchimp.views.MailChimpForm", wraps=MailChimpForm) as form_class:
+            self.assertContains(self.get(), "FNAME")
+            self.assertContains(self.get(), "FNAME")
+        self.assertEqual(form_class.call_count, 1)
+
+    @override_settings(WAGTAILMAILCHIMP_FORM_CACHE_TIMEOUT=0)
+    def test_cache_disabled(self):
+        with mock.patch("wagtailmailchimp.views.MailChimpForm", wraps=MailChimpForm) as form_class:
+            self.get()
+            self.get()
+        self.assertEqual(form_class.call_count, 2)
+
+    def test_form_built_from_fallback_data_is_not_cached(self):
+        with mock.patch.object(MailchimpTransport, "get_all", fail), \
+                self.assertLogs("wagtailmailchimp.api", "WARNING"), \
+                mock.patch("wagtailmailchimp.views.MailChimpForm", wraps=MailChimpForm) as form_class:
+            self.get()
+            self.get()
+        self.assertEqual(form_class.call_count, 2)
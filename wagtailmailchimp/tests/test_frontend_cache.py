@@ -0,0 +1,51 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from ..api import MailchimpApi
+from ..frontend_cache import purge_audience_pages_from_cache
+from ..signals import audience_schema_changed
+from ..transport import MailchimpTransport
+from .utils import SubscribePageTestCase, fail, get_all
+
+
+@mock.patch.object(MailchimpTransport, "get_all", get_all)
+class FrontendCacheTestCase(SubscribePageTestCase):
+    @override_settings(WAGTAILMAILCHIMP_CDN_CACHEABLE=True)
+    def test_cacheable_page(self):
+        response = self.get()
+        self.assertIn("public", response["Cache-Control"])
+        surrogate_keys = [f"wagtailmailchimp-page-{self.page.pk}", "wagtailmailchimp-audience-L1"]
+        self.assertEqual(response["Surrogate-Key"], " ".join(surrogate_keys))
+        self.assertEqual(response["Cache-Tag"], ",".join(surrogate_keys))
+        self.assertNotIn("csrftoken", response.cookies)
+
+        response = self.client.get("/mailchimp/csrf-token/")
+        self.assertIn("token", response.json())
+
+    @override_settings(WAGTAILMAILCHIMP_CDN_CACHEABLE=True)
+    def test_page_built_while_mailchimp_fails_is_not_cached(self):
+        with mock.patch.object(MailchimpTransport, "get_all", fail), self.assertLogs("wagtailmailchimp.api", "WARNING"):
+            response = self.get()
+        self.assertNotIn("public", response["Cache-Control"])
+        self.assertIn("max-age=0", response["Cache-Control"])
+        self.assertNotIn("Surrogate-Key", response)
+
+    def test_purges_audience_pages(self):
+        with mock.patch("wagtailmailchimp.frontend_cache.apps.is_installed", return_value=True), \
+                mock.patch("wagtail.contrib.frontend_cache.utils.PurgeBatch") as purge_batch:
+            purge_audience_pages_from_cache("L1")
+        purged = [page for call in purge_batch.return_value.add_pages.call_args_list for page in call.args[0]]
+        self.assertEqual([page.pk for page in purged], [self.page.pk])
+        purge_batch.return_value.purge.assert_called_once()
+
+    def test_schema_change_queues_purge(self):
+        with mock.patch("wagtailmailchimp.tasks.purge_audience_pages_task") as task:
+            audience_schema_changed.send(sender=MailchimpApi, list_id="L1")
+        task.enqueue.assert_called_once_with("L1")
+
+    def test_failed_purge_queueing_is_logged(self):
+        with mock.patch("wagtailmailchimp.tasks.purge_audience_pages_task") as task, \
+                self.assertLogs("wagtailmailchimp.signal_handlers", "ERROR"):
+            task.enqueue.side_effect = ConnectionError
+            audience_schema_changed.send(sender=MailchimpApi, list_id="L1")
@@ -0,0 +1,28 @@
+from unittest import mock
+
+from django.test import TestCase
+from mailchimp3.mailchimpclient import MailChimpError
+
+from ..api import MailchimpApi
+from .utils import API_KEY, mailchimp_error
+
+
+class IterMembersTestCase(TestCase):
+    def test_fetches_all_pages(self):
+        requested = []
+
+        def get_members_page(api, list_id, offset, count, **params):
+            requested.append((offset, params))
+            return [{"id": i} for i in range(offset, min(offset + count, 5))]
+
+        with mock.patch.object(MailchimpApi, "get_members_page", get_members_page):
+            members = list(MailchimpApi(API_KEY).iter_members("L1", status="subscribed", page_size=2))
+
+        self.assertEqual([member["id"] for member in members], [0, 1, 2, 3, 4])
+        self.assertEqual(requested, [(0, {"status": "subscribed"}), (2, {"status": "subscribed"}),
+                                     (4, {"status": "subscribed"})])
+
+    def test_errors_are_raised(self):
+        with mock.patch.object(MailchimpApi, "get_members_page", side_effect=mailchimp_error(500)):
+            with self.assertRaises(MailChimpError):
+                list(MailchimpApi(API_KEY).iter_members("L1"))
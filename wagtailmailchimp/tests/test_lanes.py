@@ -0,0 +1,68 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import lanes
+from ..api import MailchimpApi
+from ..errors import MailchimpCapacityError
+from ..transport import MailchimpTransport
+from .utils import API_KEY
+
+
+@override_settings(WAGTAILMAILCHIMP_LANES={"enabled": True, "capacity": 2, "interactive_reserved": 1,
+                                           "interactive_wait": 0, "bulk_wait": 0})
+class LanesTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant_id = MailchimpApi(API_KEY).tenant_id
+
+    def get_taken_slots(self):
+        return sorted(cache.get_many([lanes.get_slot_key(self.tenant_id, index) for index in range(2)]))
+
+    def test_bulk_calls_leave_reserved_slots(self):
+        with lanes.priority(lanes.BULK), lanes.lane_slot(self.tenant_id):
+            self.assertEqual(self.get_taken_slots(), [lanes.get_slot_key(self.tenant_id, 0)])
+            with mock.patch.object(lanes, "_holding_slot") as holding:
+                holding.get.return_value = False
+                with self.assertRaises(MailchimpCapacityError):
+                    with lanes.lane_slot(self.tenant_id):
+                        pass
+        self.assertEqual(self.get_taken_slots(), [])
+
+    def test_interactive_calls_go_over_capacity(self):
+        self.assertIsNotNone(lanes.try_acquire_slot(self.tenant_id, 2, 60))
+        self.assertIsNotNone(lanes.try_acquire_slot(self.tenant_id, 2, 60))
+        self.assertIsNone(lanes.try_acquire_slot(self.tenant_id, 2, 60))
+
+        called = []
+        with lanes.lane_slot(self.tenant_id):
+            called.append(True)
+        self.assertEqual(called, [True])
+        self.assertEqual(len(self.get_taken_slots()), 2)
+
+    def test_slot_of_dead_holder_expires_while_others_call(self):
+        # a process died holding a slot
+        lanes.try_acquire_slot(self.tenant_id, 2, 0.1)
+
+        for _ in range(3):
+            slot = lanes.try_acquire_slot(self.tenant_id, 2, 60)
+            lanes.release_slot(self.tenant_id, slot)
+            time.sleep(0.05)
+        self.assertEqual(self.get_taken_slots(), [])
+
+    def test_expired_slot_taken_by_another_call_is_not_released(self):
+        slot = lanes.try_acquire_slot(self.tenant_id, 1, 60)
+        cache.delete(lanes.get_slot_key(self.tenant_id, 0))
+        other = lanes.try_acquire_slot(self.tenant_id, 1, 60)
+        lanes.release_slot(self.tenant_id, slot)
+        self.assertEqual(cache.get(lanes.get_slot_key(self.tenant_id, 0)), other[1])
+
+    def test_bulk_api_call_raises_without_capacity(self):
+        # the only slot bulk calls can use
+        lanes.try_acquire_slot(self.tenant_id, 1, 60)
+        with mock.patch.object(MailchimpTransport, "post") as post, lanes.priority(lanes.BULK):
+            with self.assertRaises(MailchimpCapacityError):
+                MailchimpApi(API_KEY).add_user_to_list("L1", {})
+        post.assert_not_called()
@@ -0,0 +1,31 @@
+import pickle
+
+from django.test import TestCase
+
+from ..api import ListSchema
+from .utils import MERGE_FIELDS
+
+
+class ListSchemaTestCase(TestCase):
+    def setUp(self):
+        self.schema = ListSchema("L1", MERGE_FIELDS, [
+            {"id": "c1", "title": "Topics", "type": "checkboxes", "interests": [{"id": "i1", "name": "News"}]},
+        ])
+
+    def test_is_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.schema.version = "changed"
+        with self.assertRaises(AttributeError):
+            self.schema.merge_fields.append({})
+        with self.assertRaises(TypeError):
+            self.schema.merge_fields[0]["tag"] = "LNAME"
+
+    def test_interest_groups_are_copies(self):
+        groups = self.schema.get_interest_groups()
+        groups[0]["interests"].append({"id": "i2"})
+        self.assertEqual(len(self.schema.get_interest_groups()[0]["interests"]), 1)
+
+    def test_pickling(self):
+        schema = pickle.loads(pickle.dumps(self.schema))
+        self.assertEqual((schema.version, schema.get_interest_groups()),
+                         (self.schema.version, self.schema.get_interest_groups()))
@@ -0,0 +1,32 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from home.models import SampleEventFormPageWithMailingListIntegration
+
+from ..models import MailchimpMergeFieldIndex
+from .utils import MailchimpTestCase
+
+
+class MergeFieldIndexTestCase(MailchimpTestCase):
+    def test_index_follows_page_mapping(self):
+        page = self.create_integration_page(additional_audiences=[{"list_id": "L2"}])
+        self.assertEqual(sorted(MailchimpMergeFieldIndex.objects.values_list("list_id", "merge_tag")),
+                         [("L1", "EMAIL"), ("L1", "FNAME"), ("L2", "EMAIL"), ("L2", "FNAME")])
+
+        page.merge_fields_mapping = {"EMAIL": "email", "FNAME": ""}
+        page.additional_audiences = []
+        page.save()
+        self.assertEqual(list(MailchimpMergeFieldIndex.objects.values_list("list_id", "merge_tag")), [("L1", "EMAIL")])
+
+    def test_rebuild_command(self):
+        self.create_integration_page()
+        MailchimpMergeFieldIndex.objects.all().delete()
+        call_command("mailchimp_rebuild_merge_field_index", stdout=StringIO())
+        self.assertEqual(MailchimpMergeFieldIndex.objects.count(), 2)
+
+    def test_page_without_audience_is_not_indexed(self):
+        self.create_integration_page().__class__.objects.update(audience_list_id="")
+        page = SampleEventFormPageWithMailingListIntegration.objects.get()
+        page.save()
+        self.assertFalse(MailchimpMergeFieldIndex.objects.exists())
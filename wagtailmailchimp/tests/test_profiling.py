@@ -0,0 +1,48 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from .. import profiling
+from ..models import MailchimpProfilingSettings
+
+
+class ProfilingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        self.request = RequestFactory().get("/sign-up/")
+
+    def enable(self, **kwargs):
+        profiling_settings = MailchimpProfilingSettings.load()
+        profiling_settings.enabled = True
+        for name, value in kwargs.items():
+            setattr(profiling_settings, name, value)
+        profiling_settings.save()
+
+    def test_settings_are_cached(self):
+        self.assertFalse(profiling.get_profiling_settings()["enabled"])
+        with self.assertNumQueries(0):
+            profiling.get_profiling_settings()
+
+        self.enable()
+        self.assertTrue(profiling.get_profiling_settings()["enabled"])
+
+    def test_writes_picked_requests(self):
+        self.enable(sample_rate=1)
+        with override_settings(WAGTAILMAILCHIMP_PROFILE_DIR=self.profile_dir):
+            with self.assertLogs("wagtailmailchimp.profiling", "INFO"), profiling.profile_request(self.request, "view"):
+                time.sleep(0.05)
+        self.assertEqual(len(os.listdir(self.profile_dir)), 1)
+        # the sampler stops once nothing is profiled
+        self.assertEqual(profiling.get_sampler().samples, {})
+
+    def test_disabled(self):
+        with override_settings(WAGTAILMAILCHIMP_PROFILE_DIR=self.profile_dir), \
+                profiling.profile_request(self.request, "view"):
+            time.sleep(0.02)
+        self.assertEqual(os.listdir(self.profile_dir), [])
@@ -0,0 +1,45 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from wagtail.contrib.forms.models import FormSubmission
+
+from ..api import MailchimpApi
+from ..audit import get_subscriber_hash
+from ..sync import remove_existing_members
+from .utils import API_KEY, MailchimpTestCase, mailchimp_error
+
+
+class ReconcileSubmissionsTestCase(MailchimpTestCase):
+    def test_remove_existing_members(self):
+        member, missing, failing = (get_subscriber_hash(email)
+                                    for email in ("a@gmail.com", "b@gmail.com", "c@gmail.com"))
+
+        def get_member(api, list_id, subscriber_hash, fields="id,status"):
+            if subscriber_hash == failing:
+                raise mailchimp_error(500)
+            return {"id": member} if subscriber_hash == member else None
+
+        with mock.patch.object(MailchimpApi, "get_member", get_member), \
+                self.assertLogs("wagtailmailchimp.sync", "WARNING"):
+            pending = remove_existing_members(MailchimpApi(API_KEY), "L1", {member: 1, missing: 2, failing: 3})
+        self.assertEqual(pending, {missing: 2})
+
+    def test_command(self):
+        page = self.create_integration_page()
+        submissions = [
+            FormSubmission.objects.create(page=page, form_data={
+                "email": email, "first_name": "", "mailchimp_subscribe_check": True})
+            for email in ("a@gmail.com", "b@gmail.com")
+        ]
+        member = get_subscriber_hash("a@gmail.com")
+
+        with mock.patch.object(MailchimpApi, "get_member",
+                               lambda api, list_id, subscriber_hash, fields: {"id": member}
+                               if subscriber_hash == member else None), \
+                mock.patch("wagtailmailchimp.management.commands.mailchimp_reconcile_submissions."
+                           "resubscribe_submissions_task") as task:
+            call_command("mailchimp_reconcile_submissions", "--dry-run", stdout=StringIO())
+            task.enqueue.assert_not_called()
+            call_command("mailchimp_reconcile_submissions", stdout=StringIO())
+        task.enqueue.assert_called_once_with(page.pk, [submissions[1].pk], "L1")
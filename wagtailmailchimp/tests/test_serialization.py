@@ -0,0 +1,30 @@
+import pickle
+
+from django.test import TestCase
+
+from .. import serialization
+from ..api import AudienceCatalog, CacheEntry, ListSchema
+from .utils import MERGE_FIELDS
+
+
+class CacheSerializationTestCase(TestCase):
+    def test_round_trip(self):
+        schema = ListSchema("L1", MERGE_FIELDS * 50, [])
+        for value in (schema, AudienceCatalog([{"id": "L1", "name": "News"}]), {"id": "L1"}, None):
+            entry = pickle.loads(pickle.dumps(CacheEntry(value, 123.0)))
+            self.assertEqual(entry.fresh_until, 123.0)
+            if isinstance(value, ListSchema):
+                self.assertEqual(entry.value.version, schema.version)
+            elif isinstance(value, AudienceCatalog):
+                self.assertEqual(entry.value.audiences, value.audiences)
+            else:
+                self.assertEqual(entry.value, value)
+
+    def test_large_entries_are_compressed(self):
+        merge_fields = [{"tag": f"TAG{i}", "name": "Field"} for i in range(100)]
+        payload = serialization.dump_cache_entry(CacheEntry(merge_fields, 0))
+        self.assertTrue(serialization.HEADER.unpack_from(payload)[2] & serialization.FLAG_COMPRESSED)
+
+    def test_unknown_payload_is_a_miss(self):
+        self.assertIsNone(serialization.load_cache_entry(serialization.HEADER.pack(b"MC", 99, 0) + b"[]"))
+        self.assertIsNone(serialization.load_cache_entry(b"garbage"))
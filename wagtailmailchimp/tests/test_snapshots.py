@@ -0,0 +1,42 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..api import MailchimpApi
+from ..models import MailchimpAudienceSchema
+from ..snapshots import update_snapshot_merge_fields
+from ..transport import MailchimpTransport
+from .utils import API_KEY, MERGE_FIELDS, fail, get_all
+
+
+class SchemaSnapshotTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = MailchimpApi(API_KEY)
+
+    def test_skips_unchanged_writes(self):
+        update_snapshot_merge_fields(self.api.tenant_id, "L1", MERGE_FIELDS)
+        snapshot = MailchimpAudienceSchema.objects.get(list_id="L1")
+        self.assertEqual(snapshot.merge_fields, MERGE_FIELDS)
+
+        with self.assertNumQueries(0):
+            update_snapshot_merge_fields(self.api.tenant_id, "L1", MERGE_FIELDS)
+
+        update_snapshot_merge_fields(self.api.tenant_id, "L1", MERGE_FIELDS + [{"tag": "LNAME"}])
+        self.assertEqual(MailchimpAudienceSchema.objects.get(list_id="L1").version, snapshot.version + 1)
+
+    def test_cold_cache_is_served_from_snapshot(self):
+        update_snapshot_merge_fields(self.api.tenant_id, "L1", MERGE_FIELDS)
+        cache.clear()
+        with mock.patch.object(MailchimpTransport, "get_all", fail), \
+                mock.patch("wagtailmailchimp.snapshots.enqueue_audience_schema_refresh") as enqueue:
+            self.assertEqual(MailchimpApi(API_KEY).get_merge_fields_for_list("L1"), MERGE_FIELDS)
+        enqueue.assert_called_once_with(self.api.tenant_id, "L1")
+
+    def test_cold_cache_without_snapshot_fetches(self):
+        with mock.patch.object(MailchimpTransport, "get_all", get_all), \
+                mock.patch("wagtailmailchimp.snapshots.enqueue_audience_schema_refresh") as enqueue:
+            self.assertEqual(self.api.get_merge_fields_for_list("L1"), MERGE_FIELDS)
+        enqueue.assert_not_called()
+        self.assertTrue(MailchimpAudienceSchema.objects.filter(list_id="L1").exists())
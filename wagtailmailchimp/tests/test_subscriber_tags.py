@@ -0,0 +1,39 @@
+from unittest import mock
+
+from django.test import RequestFactory, override_settings
+
+from ..api import MailchimpApi
+from ..models import get_subscriber_tags_query, render_subscriber_tags
+from ..subscriptions import subscribe_member
+from ..transport import MailchimpTransport
+from .utils import API_KEY, MailchimpTestCase, get_all, mailchimp_error
+
+
+class SubscriberTagsTestCase(MailchimpTestCase):
+    def test_render(self):
+        text = "page-{{ page.slug }}\n{{ query.utm_campaign }}\n\npage-{{ page.slug }}\n{{ data.merge_fields.FNAME }}"
+        context = {"page": {"slug": "sign-up"}, "query": {"utm_campaign": "spring"},
+                   "data": {"merge_fields": {"FNAME": "Ann"}}}
+        self.assertEqual(render_subscriber_tags(text, context), ["page-sign-up", "spring", "Ann"])
+
+        with override_settings(WAGTAILMAILCHIMP_MAX_SUBSCRIBER_TAGS=1):
+            self.assertEqual(render_subscriber_tags(text, context), ["page-sign-up"])
+
+    def test_invalid_template(self):
+        with self.assertLogs("wagtailmailchimp.models", "WARNING"):
+            self.assertEqual(render_subscriber_tags("{% if %}", {}), [])
+
+    def test_query_is_allowlisted(self):
+        request = RequestFactory().get("/", {"utm_source": "mail<script>", "secret": "x"})
+        self.assertEqual(get_subscriber_tags_query(request), {"utm_source": "mailscript"})
+
+    def test_existing_member_is_tagged(self):
+        page = self.create_subscribe_page()
+        data = {"email_address": "ann@gmail.com", "merge_fields": {}, "tags": ["spring"]}
+        with mock.patch.object(MailchimpTransport, "get_all", get_all), \
+                mock.patch.object(MailchimpApi, "add_user_to_list",
+                                  side_effect=mailchimp_error(400, "Member Exists")), \
+                mock.patch.object(MailchimpApi, "add_member_tags") as add_member_tags:
+            result = subscribe_member(MailchimpApi(API_KEY), page, "L1", data)
+        self.assertTrue(result.already_subscribed)
+        add_member_tags.assert_called_once_with("L1", "ann@gmail.com", ["spring"])
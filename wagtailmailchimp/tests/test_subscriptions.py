@@ -0,0 +1,47 @@
+import time
+from unittest import mock
+
+from django.test import override_settings
+
+from ..api import ListSchema, MailchimpApi
+from ..errors import MailchimpPayloadError
+from ..subscriptions import subscribe_to_audiences
+from .utils import API_KEY, MailchimpTestCase
+
+
+class AdditionalAudiencesTestCase(MailchimpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.create_subscribe_page(additional_audiences=[{"list_id": "L2"}])
+        self.api = MailchimpApi(API_KEY)
+        self.data = {"email_address": "ann@gmail.com", "merge_fields": {}}
+        patcher = mock.patch.object(MailchimpApi, "get_list_schema", lambda api, list_id: ListSchema(list_id, [], []))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_subscribes_all_audiences(self):
+        with mock.patch.object(MailchimpApi, "add_user_to_list", return_value={"id": "m"}) as add_user_to_list:
+            results = subscribe_to_audiences(self.api, self.page, [("L1", self.data), ("L2", self.data)])
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(sorted(call.kwargs["list_id"] for call in add_user_to_list.call_args_list), ["L1", "L2"])
+
+    def test_invalid_member_is_not_sent_anywhere(self):
+        data = {**self.data, "email_address": "ann@mailinator.com"}
+        with mock.patch.object(MailchimpApi, "add_user_to_list") as add_user_to_list:
+            results = subscribe_to_audiences(self.api, self.page, [("L1", data), ("L2", data)])
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0].error, MailchimpPayloadError)
+        add_user_to_list.assert_not_called()
+
+    @override_settings(WAGTAILMAILCHIMP_SUBSCRIBE_DEADLINE=0.1)
+    def test_slow_additional_audience_is_unknown(self):
+        def add_user_to_list(api, list_id, data):
+            if list_id == "L2":
+                time.sleep(0.5)
+
+        with mock.patch.object(MailchimpApi, "add_user_to_list", add_user_to_list), \
+                self.assertLogs("wagtailmailchimp.subscriptions", "INFO"):
+            results = subscribe_to_audiences(self.api, self.page, [("L1", self.data), ("L2", self.data)])
+        self.assertTrue(results[0].succeeded)
+        self.assertTrue(results[1].unknown)
+        time.sleep(0.5)
@@ -0,0 +1,28 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+
+from ..api import MailchimpApi, get_tenant_cache_version, get_tenant_version_key, invalidate_tenant_cache
+from .utils import API_KEY, MailchimpTestCase
+
+
+class TenantCacheTestCase(MailchimpTestCase):
+    def test_keys_are_namespaced_per_api_key(self):
+        other = MailchimpApi("f123456789abcdef0123456789abcdef-us2")
+        self.assertNotEqual(MailchimpApi(API_KEY).make_cache_key("lists", "a"), other.make_cache_key("lists", "a"))
+
+    def test_invalidate(self):
+        api = MailchimpApi(API_KEY)
+        api.get_cached("lists", [], lambda: ["old"])
+        invalidate_tenant_cache(API_KEY)
+        self.assertEqual(MailchimpApi(API_KEY).get_cached("lists", [], lambda: ["new"]), ["new"])
+
+    def test_version_is_kept_per_process(self):
+        tenant_id = MailchimpApi(API_KEY).tenant_id
+        version = get_tenant_cache_version(tenant_id)
+        cache.set(get_tenant_version_key(tenant_id), version + 10, None)
+        self.assertEqual(get_tenant_cache_version(tenant_id), version)
+
+        with mock.patch("wagtailmailchimp.api.time.monotonic", return_value=time.monotonic() + 10):
+            self.assertEqual(get_tenant_cache_version(tenant_id), version + 10)
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.test import RequestFactory, TestCase, override_settings
+
+from ..api import MailchimpApi
+from ..throttling import get_client_ip
+from ..transport import MailchimpTransport
+from .utils import SubscribePageTestCase, get_all
+
+
+@mock.patch.object(MailchimpTransport, "get_all", get_all)
+class ThrottlingTestCase(SubscribePageTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(MailchimpApi, "add_user_to_list", return_value={})
+        self.add_user_to_list = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_honeypot(self):
+        self.assertContains(self.get(), 'name="website"')
+        response = self.post({"EMAIL": "ann@gmail.com", "website": "https://spam.example.com"})
+        self.assertContains(response, "successfully")
+        self.add_user_to_list.assert_not_called()
+
+    @override_settings(WAGTAILMAILCHIMP_THROTTLE={"ip_limit": 2, "email_limit": None})
+    def test_ip_limit(self):
+        responses = [self.post({"EMAIL": f"user{i}@gmail.com"}) for i in range(3)]
+        self.assertEqual([response.status_code for response in responses], [200, 200, 429])
+        self.assertEqual(self.add_user_to_list.call_count, 2)
+
+    @override_settings(WAGTAILMAILCHIMP_THROTTLE={"ip_limit": None, "email_limit": 1})
+    def test_email_limit_only_counts_valid_forms(self):
+        self.post({"EMAIL": "not an email"})
+        self.assertEqual(self.post({"EMAIL": "ann@gmail.com"}).status_code, 200)
+        self.assertEqual(self.post({"EMAIL": "ANN@gmail.com"}).status_code, 429)
+        self.assertEqual(self.add_user_to_list.call_count, 1)
+
+    def test_no_ip_limit_by_default(self):
+        responses = [self.post({"EMAIL": f"user{i}@gmail.com"}) for i in range(12)]
+        self.assertEqual({response.status_code for response in responses}, {200})
+
+
+class ClientIpTestCase(TestCase):
+    def get_client_ip(self, forwarded_for, trusted_proxies=1):
+        request = RequestFactory().get("/", HTTP_X_FORWARDED_FOR=forwarded_for, REMOTE_ADDR="10.0.0.1")
+        return get_client_ip(request, "HTTP_X_FORWARDED_FOR", trusted_proxies)
+
+    def test_counts_from_the_right(self):
+        # the first address is sent by the client
+        self.assertEqual(self.get_client_ip("1.1.1.1, 2.2.2.2"), "2.2.2.2")
+        self.assertEqual(self.get_client_ip("1.1.1.1, 2.2.2.2, 3.3.3.3", trusted_proxies=2), "2.2.2.2")
+
+    def test_fewer_addresses_than_proxies(self):
+        self.assertEqual(self.get_client_ip("2.2.2.2", trusted_proxies=2), "2.2.2.2")
+
+    def test_falls_back_to_remote_addr(self):
+        self.assertEqual(self.get_client_ip(""), "10.0.0.1")
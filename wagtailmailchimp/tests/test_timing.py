@@ -0,0 +1,18 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from ..transport import MailchimpTransport
+from .utils import SubscribePageTestCase, get_all
+
+
+@mock.patch.object(MailchimpTransport, "get_all", get_all)
+class ServerTimingTestCase(SubscribePageTestCase):
+    @override_settings(WAGTAILMAILCHIMP_SERVER_TIMING=True)
+    def test_header(self):
+        with self.assertLogs("wagtailmailchimp.timing", "INFO"):
+            response = self.get()
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    def test_disabled(self):
+        self.assertNotIn("Server-Timing", self.get())
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from mailchimp3.mailchimpclient import MailChimpError
+
+from ..api import MailchimpApi
+from ..transport import MailchimpTransport
+from .utils import API_KEY
+
+
+class TransportTestCase(TestCase):
+    def setUp(self):
+        patcher = mock.patch("wagtailmailchimp.transport.get_session")
+        self.session = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def respond(self, status_code, data):
+        response = mock.Mock(status_code=status_code, content=b"{}")
+        response.json.return_value = data
+        self.session.request.return_value = response
+
+    def test_get(self):
+        self.respond(200, {"id": "L1"})
+        self.assertEqual(MailchimpTransport(API_KEY).get("lists/L1", fields="id"), {"id": "L1"})
+        args, kwargs = self.session.request.call_args
+        self.assertEqual(args, ("GET", "https://us1.api.mailchimp.com/3.0/lists/L1"))
+        self.assertEqual(kwargs["params"], {"fields": "id"})
+
+    def test_errors_are_raised_as_mailchimp_errors(self):
+        self.respond(400, {"status": 400, "title": "Member Exists"})
+        with self.assertRaises(MailChimpError) as raised:
+            MailchimpTransport(API_KEY).post("lists/L1/members", {"email_address": "ann@gmail.com"})
+        self.assertEqual(raised.exception.args[0]["title"], "Member Exists")
+
+    def test_invalid_api_key(self):
+        with self.assertRaises(ValueError):
+            MailchimpTransport("invalid")
+
+    @override_settings(WAGTAILMAILCHIMP_HTTP_BACKEND="mailchimp3")
+    def test_mailchimp3_backend(self):
+        self.assertIsNone(MailchimpApi(API_KEY).transport)
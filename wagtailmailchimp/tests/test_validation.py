@@ -0,0 +1,38 @@
+from django.test import TestCase, override_settings
+
+from ..api import ListSchema
+from ..errors import MailchimpPayloadError
+from ..validation import get_payload_validator, validate_member_payload
+
+
+class PayloadValidationTestCase(TestCase):
+    def setUp(self):
+        self.schema = ListSchema("L1", [
+            {"tag": "FNAME", "type": "text", "required": True, "options": {"size": 5}},
+            {"tag": "COLOR", "type": "dropdown", "options": {"choices": ["red", "blue"]}},
+        ], [{"id": "c1", "title": "Topics", "type": "checkboxes", "interests": [{"id": "i1", "name": "News"}]}])
+
+    def test_valid_payload(self):
+        validate_member_payload(self.schema, {"email_address": "ann@gmail.com", "merge_fields": {"FNAME": "Ann"},
+                                              "interests": {"i1": True}})
+
+    def test_invalid_payload(self):
+        with self.assertRaises(MailchimpPayloadError) as raised:
+            validate_member_payload(self.schema, {"email_address": "ann@mailinator.com",
+                                                  "merge_fields": {"COLOR": "green"}, "interests": {"i9": True}})
+        self.assertEqual(set(raised.exception.errors), {"EMAIL", "FNAME", "COLOR", "INTERESTS"})
+
+    def test_degraded_schema_only_checks_email(self):
+        data = {"email_address": "ann@gmail.com", "merge_fields": {"COLOR": "green"}}
+        validate_member_payload(self.schema, data, degraded=True)
+        with self.assertRaises(MailchimpPayloadError):
+            validate_member_payload(self.schema, {**data, "email_address": "ann"}, degraded=True)
+
+    def test_interests_are_not_checked_without_any(self):
+        schema = ListSchema("L1", [], [])
+        self.assertEqual(get_payload_validator(schema).get_errors(
+            {"email_address": "ann@gmail.com", "interests": {"i9": True}}), {})
+
+    @override_settings(WAGTAILMAILCHIMP_PREVALIDATION=False)
+    def test_disabled(self):
+        validate_member_payload(self.schema, {"email_address": "ann"})
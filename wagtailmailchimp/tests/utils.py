@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import TestCase
+from mailchimp3.mailchimpclient import MailChimpError
+from wagtail.models import Site
+
+from home.models import FormField, MailingListSubscribePage, SampleEventFormPageWithMailingListIntegration
+
+from ..models import MailchimpSettings
+
+API_KEY = "0123456789abcdef0123456789abcdef-us1"
+
+MERGE_FIELDS = [
+    {"tag": "FNAME", "name": "First name", "type": "text", "required": False, "public": True,
+     "options": {"size": 20}},
+]
+
+
+def get_all(transport, path, key, **params):
+    """
+    Replaces MailchimpTransport.get_all, returning MERGE_FIELDS and no interest categories.
+    """
+    return [dict(merge_field) for merge_field in MERGE_FIELDS] if key == "merge_fields" else []
+
+
+def fail(*args, **kwargs):
+    raise ConnectionError("Mailchimp is down")
+
+
+def mailchimp_error(status, title="Error"):
+    return MailChimpError({"status": status, "title": title})
+
+
+class MailchimpTestCase(TestCase):
+    """
+    Sets the Mailchimp API key of the default site, with an empty cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.site = Site.objects.get(is_default_site=True)
+        mailchimp_settings = MailchimpSettings.for_site(self.site)
+        mailchimp_settings.api_key = API_KEY
+        mailchimp_settings.save()
+
+    def create_subscribe_page(self, **kwargs):
+        page = MailingListSubscribePage(title="Sign up", slug="sign-up", list_id="L1", **kwargs)
+        self.site.root_page.add_child(instance=page)
+        page.save_revision().publish()
+        return page
+
+    def create_integration_page(self, parent=None, **kwargs):
+        page = SampleEventFormPageWithMailingListIntegration(
+            title="Event", slug="event", audience_list_id="L1",
+            merge_fields_mapping={"EMAIL": "email", "FNAME": "first_name"}, **kwargs)
+        (parent or self.site.root_page).add_child(instance=page)
+        FormField.objects.create(page=page, label="Email", field_type="email")
+        FormField.objects.create(page=page, label="First name", field_type="singleline")
+        return page
+
+
+class SubscribePageTestCase(MailchimpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.create_subscribe_page()
+
+    def get(self, **kwargs):
+        return self.client.get(self.page.url, HTTP_HOST="localhost", **kwargs)
+
+    def post(self, data, **kwargs):
+        return self.client.post(self.page.url, data, HTTP_HOST="localhost", **kwargs)
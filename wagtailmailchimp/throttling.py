@@ -0,0 +1,107 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+DEFAULT_THROTTLE_SETTINGS = {
+    # maximum number of sign-up attempts per client IP address in ip_window seconds, None for no limit.
+    # Off by default, behind a proxy all clients would share its limit until ip_header is set
+    "ip_limit": None,
+    "ip_window": 60,
+    # maximum number of sign-up attempts per email address in email_window seconds, None for no limit
+    "email_limit": 3,
+    "email_window": 60 * 60,
+    # request META key of the client IP address, e.g. HTTP_X_FORWARDED_FOR behind a proxy
+    "ip_header": "REMOTE_ADDR",
+    # number of proxies in front of the site adding to ip_header, the client IP address is the one
+    # added by the furthest of them, addresses before it are sent by the client
+    "trusted_proxies": 1,
+    # name of the form field that must be left empty, None to not add it
+    "honeypot_field": "website",
+}
+
+
+def get_throttle_settings():
+    return {**DEFAULT_THROTTLE_SETTINGS, **getattr(settings, "WAGTAILMAILCHIMP_THROTTLE", {})}
+
+
+def get_client_ip(request, ip_header, trusted_proxies=1):
+    """
+    Returns the client IP address of the request. Each proxy adds the address it got the
+    request from to the end of a forwarded for header, so the client address is counted
+    from the right, the first addresses can be anything the client sent.
+    """
+    value = request.META.get(ip_header) or request.META.get("REMOTE_ADDR") or ""
+    addresses = [address.strip() for address in value.split(",") if address.strip()]
+    if not addresses:
+        return ""
+    return addresses[max(len(addresses) - max(trusted_proxies, 1), 0)]
+
+
+def hit_sliding_window(scope, identifier, limit, window):
+    """
+    Counts an attempt for identifier, and returns whether the attempts in the last
+    window seconds are over limit.
+
+    The count is a sliding window estimate, from the counters of the current and
+    previous fixed windows, so that it only takes two cache keys per identifier.
+    """
+    digest = hashlib.sha256(identifier.encode("utf-8")).hexdigest()[:32]
+    now = time.time()
+    current_window = int(now // window)
+    current_key = f"wagtailmailchimp-throttle-{scope}-{digest}-{current_window}"
+    previous_key = f"wagtailmailchimp-throttle-{scope}-{digest}-{current_window - 1}"
+
+    cache.add(current_key, 0, window * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # the counter was evicted in between
+        cache.set(current_key, 1, window * 2)
+        current = 1
+
+    previous = cache.get(previous_key) or 0
+    elapsed = (now % window) / window
+
+    return previous * (1 - elapsed) + current > limit
+
+
+def is_honeypot_filled(request):
+    honeypot_field = get_throttle_settings()["honeypot_field"]
+    if honeypot_field and request.POST.get(honeypot_field):
+        metrics.increment("throttle.honeypot")
+        return True
+    return False
+
+
+def get_throttled_scope(request):
+    """
+    Counts a sign-up attempt of the client IP address of the request, and returns
+    "ip" if it is over its limit, or None. Email addresses are counted by
+    is_email_throttled, once the form is valid.
+    """
+    throttle_settings = get_throttle_settings()
+    client_ip = get_client_ip(request, throttle_settings["ip_header"], throttle_settings["trusted_proxies"])
+    return get_over_limit_scope(throttle_settings, "ip", client_ip)
+
+
+def is_email_throttled(email):
+    """
+    Counts a sign-up attempt of the email address, made with a valid form, and
+    returns whether it is over its limit, so that fixing typos in the form doesn't
+    count against it.
+    """
+    return get_over_limit_scope(get_throttle_settings(), "email", (email or "").strip().lower()) is not None
+
+
+def get_over_limit_scope(throttle_settings, scope, identifier):
+    limit = throttle_settings[f"{scope}_limit"]
+    if limit is None or not identifier:
+        return None
+    if hit_sliding_window(scope, identifier, limit, throttle_settings[f"{scope}_window"]):
+        metrics.increment("throttle.blocked", scope=scope)
+        return scope
+    return None
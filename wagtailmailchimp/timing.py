@@ -0,0 +1,93 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current_timer = ContextVar("wagtailmailchimp_phase_timer", default=None)
+
+
+def server_timing_enabled():
+    return getattr(settings, "WAGTAILMAILCHIMP_SERVER_TIMING", False)
+
+
+class PhaseTimer:
+    """
+    Time spent in each phase of a request. Phases can be nested, the time of a
+    nested phase is only counted in that phase, not in the enclosing one.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.durations = {}
+        # time spent in nested phases, per open phase
+        self.nested = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        self.nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self.nested.pop()
+            if self.nested:
+                self.nested[-1] += elapsed
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed - nested
+
+    def get_timings_ms(self):
+        timings = {name: round(duration * 1000, 2) for name, duration in self.durations.items()}
+        timings["total"] = round((time.perf_counter() - self.started_at) * 1000, 2)
+        return timings
+
+    def get_header_value(self, timings):
+        return ", ".join(f"{name};dur={duration}" for name, duration in timings.items())
+
+
+@contextmanager
+def timed_phase(name):
+    """
+    Times the block as the given phase of the current request, if timing is on.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+    else:
+        with timer.phase(name):
+            yield
+
+
+def timed_response(request, page, get_response):
+    """
+    Returns get_response(), rendered, with the time spent in each phase in its
+    Server-Timing header and logged, if WAGTAILMAILCHIMP_SERVER_TIMING is on.
+    """
+    if not server_timing_enabled() or _current_timer.get() is not None:
+        return get_response()
+
+    timer = PhaseTimer()
+    token = _current_timer.set(timer)
+    try:
+        response = get_response()
+        if hasattr(response, "render") and not response.is_rendered:
+            with timer.phase("render"):
+                response.render()
+    finally:
+        _current_timer.reset(token)
+
+    timings = timer.get_timings_ms()
+    response["Server-Timing"] = timer.get_header_value(timings)
+
+    logger.info(
+        "Mailchimp page timing: page=%s method=%s status=%s %s",
+        getattr(page, "pk", None), request.method, response.status_code,
+        " ".join(f"{name}={duration}ms" for name, duration in timings.items()),
+        extra={"page_id": getattr(page, "pk", None), "method": request.method,
+               "status_code": response.status_code, "timings": timings},
+    )
+
+    return response
@@ -0,0 +1,125 @@
+import threading
+
+import requests
+from django.conf import settings
+from mailchimp3.mailchimpclient import MailChimpError
+from requests.adapters import HTTPAdapter
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+DEFAULT_HTTP_SETTINGS = {
+    # seconds to wait for Mailchimp to respond, as a number or a (connect, read) tuple
+    "timeout": (5, 30),
+    # number of connection pools to cache, one per Mailchimp datacenter host
+    "pool_connections": 4,
+    # maximum number of kept-alive connections per host
+    "pool_maxsize": 10,
+    # wait for a free connection instead of opening extra, not kept-alive, connections
+    "pool_block": False,
+    "max_retries": 0,
+    # number of items to request per page of a collection, Mailchimp allows up to 1000
+    "page_size": 1000,
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_settings():
+    return {**DEFAULT_HTTP_SETTINGS, **getattr(settings, "WAGTAILMAILCHIMP_HTTP", {})}
+
+
+def get_session():
+    """
+    Returns the requests session shared by all transports of the process, so
+    that connections to Mailchimp are kept alive and reused.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                http_settings = get_http_settings()
+                adapter = HTTPAdapter(pool_connections=http_settings["pool_connections"],
+                                      pool_maxsize=http_settings["pool_maxsize"],
+                                      pool_block=http_settings["pool_block"],
+                                      max_retries=http_settings["max_retries"])
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.headers.update({"Accept-Encoding": "gzip", "Accept": "application/json"})
+                _session = session
+
+    return _session
+
+
+class MailchimpTransport:
+    """
+    Minimal Mailchimp API v3 client for the endpoints used on hot paths.
+
+    Errors are raised as mailchimp3's MailChimpError, with the same arguments,
+    so that callers handle errors the same way for both backends.
+    """
+
+    def __init__(self, api_key):
+        if not api_key or "-" not in api_key:
+            raise ValueError("The Mailchimp API key is not valid")
+
+        self.auth = ("wagtailmailchimp", api_key)
+        self.base_url = f"https://{api_key.split('-').pop()}.api.mailchimp.com/3.0/"
+        self.http_settings = get_http_settings()
+
+    def request(self, method, path, params=None, data=None, stream=False):
+        response = get_session().request(method, self.base_url + path, params=params, json=data, auth=self.auth,
+                                         timeout=self.http_settings["timeout"], stream=stream)
+
+        if response.status_code >= 400:
+            try:
+                error_data = response.json()
+            except ValueError:
+                error_data = {"response": response}
+            raise MailChimpError(error_data)
+
+        return response
+
+    def get(self, path, **params):
+        return self.request("GET", path, params=params).json()
+
+    def post(self, path, data):
+        response = self.request("POST", path, data=data)
+        # some endpoints, like member tags, respond with 204 No Content
+        return response.json() if response.content else None
+
+    def iter_collection(self, path, key, **params):
+        """
+        Yields the items of a collection endpoint, requesting it page by page.
+
+        If ijson is installed, items are decoded incrementally from the response
+        stream, instead of decoding each page as a whole.
+        """
+        page_size = params.pop("count", self.http_settings["page_size"])
+        offset = params.pop("offset", 0)
+
+        while True:
+            received = 0
+            for item in self.get_page_items(path, key, count=page_size, offset=offset, **params):
+                received += 1
+                yield item
+
+            if received < page_size:
+                return
+
+            offset += received
+
+    def get_page_items(self, path, key, **params):
+        if ijson is None:
+            return self.get(path, **params).get(key, [])
+
+        response = self.request("GET", path, params=params, stream=True)
+        response.raw.decode_content = True
+        return ijson.items(response.raw, f"{key}.item", use_float=True)
+
+    def get_all(self, path, key, **params):
+        return list(self.iter_collection(path, key, **params))
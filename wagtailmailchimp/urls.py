@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import csrf_token_view
+
+urlpatterns = [
+    path('csrf-token/', csrf_token_view, name="wagtailmailchimp_csrf_token"),
+]
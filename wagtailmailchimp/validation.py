@@ -0,0 +1,250 @@
+"""
+Local validation of member payloads, to reject those Mailchimp would reject
+without a round trip to Mailchimp.
+
+A PayloadValidator is compiled once per audience schema version, into a list of
+checks per merge tag.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import EmailValidator, URLValidator
+from django.utils.translation import gettext as _
+
+from . import metrics
+from .errors import MailchimpPayloadError
+
+DISPOSABLE_DOMAINS_FILE = os.path.join(os.path.dirname(__file__), "data", "disposable_domains.txt")
+
+# domains and top level domains reserved by RFC 2606 and RFC 6761, that never receive email
+RESERVED_DOMAINS = {"example.com", "example.net", "example.org"}
+RESERVED_TLDS = {"test", "example", "invalid", "localhost", "local"}
+
+# merge field types whose options.size limits the length of the value
+SIZED_TYPES = {"text", "zip", "phone", "url", "imageurl"}
+
+validate_email = EmailValidator()
+validate_url = URLValidator()
+
+
+def is_prevalidation_enabled():
+    return getattr(settings, "WAGTAILMAILCHIMP_PREVALIDATION", True)
+
+
+@lru_cache(maxsize=None)
+def load_disposable_domains(path=DISPOSABLE_DOMAINS_FILE):
+    with open(path, encoding="utf-8") as f:
+        return frozenset(line.strip().lower() for line in f if line.strip() and not line.startswith("#"))
+
+
+def get_disposable_domains():
+    extra = getattr(settings, "WAGTAILMAILCHIMP_DISPOSABLE_DOMAINS", ())
+    domains = load_disposable_domains()
+    return domains | {domain.lower() for domain in extra} if extra else domains
+
+
+def get_parent_domains(domain):
+    """
+    Returns the domain and its parent domains, e.g. a.b.com, b.com and com.
+    """
+    labels = domain.split(".")
+    return [".".join(labels[i:]) for i in range(len(labels))]
+
+
+def check_email(value):
+    try:
+        validate_email(value)
+    except ValidationError:
+        return _("Enter a valid email address.")
+
+    domains = get_parent_domains(value.rsplit("@", 1)[1].lower())
+    if domains[-1] in RESERVED_TLDS or RESERVED_DOMAINS.intersection(domains):
+        return _("This email address can't receive email.")
+    if get_disposable_domains().intersection(domains):
+        return _("Disposable email addresses are not accepted.")
+
+
+def get_date_format(mailchimp_format, default):
+    """
+    Returns the strptime format of a Mailchimp date format, such as DD/MM/YYYY.
+    """
+    mailchimp_format = (mailchimp_format or default).upper()
+    return mailchimp_format.replace("YYYY", "%Y").replace("MM", "%m").replace("DD", "%d")
+
+
+def make_size_check(size):
+    def check(value):
+        if len(str(value)) > size:
+            return _("Ensure this value has at most %(size)s characters.") % {"size": size}
+    return check
+
+
+def make_choices_check(choices):
+    choices = set(choices)
+
+    def check(value):
+        if value not in choices:
+            return _("Select a valid choice.")
+    return check
+
+
+def make_date_check(date_format, birthday=False):
+    def check(value):
+        try:
+            if birthday:
+                # parse with a leap year, so that 02/29 is valid
+                datetime.strptime(f"{value}/2000", f"{date_format}/%Y")
+            else:
+                try:
+                    datetime.strptime(str(value), "%Y-%m-%d")
+                except ValueError:
+                    datetime.strptime(str(value), date_format)
+        except ValueError:
+            return _("Enter a valid date.")
+    return check
+
+
+def check_number(value):
+    if isinstance(value, bool):
+        return _("Enter a number.")
+    if isinstance(value, (int, float)):
+        return None
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return _("Enter a number.")
+
+
+def check_url(value):
+    try:
+        validate_url(value)
+    except ValidationError:
+        return _("Enter a valid URL.")
+
+
+def compile_merge_field_checks(merge_field):
+    mc_type = merge_field.get("type")
+    options = merge_field.get("options") or {}
+    checks = []
+
+    if mc_type in SIZED_TYPES and options.get("size"):
+        checks.append(make_size_check(int(options["size"])))
+    if mc_type == "number":
+        checks.append(check_number)
+    if mc_type in ("dropdown", "radio") and options.get("choices"):
+        checks.append(make_choices_check(options["choices"]))
+    if mc_type == "date":
+        checks.append(make_date_check(get_date_format(options.get("date_format"), "MM/DD/YYYY")))
+    if mc_type == "birthday":
+        checks.append(make_date_check(get_date_format(options.get("date_format"), "MM/DD"), birthday=True))
+    if mc_type in ("url", "imageurl"):
+        checks.append(check_url)
+
+    return checks
+
+
+class PayloadValidator:
+    """
+    Checks of the member payloads of an audience, compiled from its ListSchema.
+    """
+
+    def __init__(self, schema):
+        self.required_tags = [merge_field.get("tag") for merge_field in schema.merge_fields
+                              if merge_field.get("required") and merge_field.get("tag") != "EMAIL"]
+        self.checks = {merge_field.get("tag"): compile_merge_field_checks(merge_field)
+                       for merge_field in schema.merge_fields}
+        self.interest_ids = {interest.get("id") for category in schema.interest_categories
+                             for interest in category.get("interests", ())}
+
+    def get_errors(self, data, degraded=False):
+        """
+        Returns the reasons Mailchimp would reject the payload, per field, as a dict
+        of lists of messages, empty if the payload looks valid.
+
+        When degraded, the schema was built from stale or missing data because
+        Mailchimp failed, so only the email address is checked.
+        """
+        errors = {}
+
+        def add_error(field, reason):
+            errors.setdefault(field, []).append(reason)
+
+        email_error = check_email(data.get("email_address") or "")
+        if email_error:
+            add_error("EMAIL", email_error)
+
+        if degraded:
+            return errors
+
+        merge_fields = data.get("merge_fields") or {}
+
+        for tag in self.required_tags:
+            if merge_fields.get(tag) in (None, ""):
+                add_error(tag, _("This field is required."))
+
+        for tag, value in merge_fields.items():
+            if value in (None, ""):
+                continue
+            for check in self.checks.get(tag, ()):
+                reason = check(value)
+                if reason:
+                    add_error(tag, reason)
+
+        # no interests at all means they were not fetched, rather than that all of them are unknown
+        unknown_interests = [interest_id for interest_id in data.get("interests") or {}
+                             if interest_id not in self.interest_ids]
+        if unknown_interests and self.interest_ids:
+            add_error("INTERESTS", _("Select a valid choice."))
+
+        return errors
+
+    def validate(self, data, degraded=False):
+        """
+        Raises MailchimpPayloadError if Mailchimp would reject the payload.
+        """
+        errors = self.get_errors(data, degraded=degraded)
+        if errors:
+            for field in errors:
+                metrics.increment("prevalidation.rejected", field=field)
+            raise MailchimpPayloadError(errors)
+
+
+_validators = OrderedDict()
+_validators_lock = threading.Lock()
+
+
+def get_payload_validator(schema):
+    """
+    Returns the PayloadValidator of a ListSchema, compiled once per schema version.
+    """
+    key = (schema.list_id, schema.version)
+
+    with _validators_lock:
+        validator = _validators.get(key)
+        if validator is not None:
+            _validators.move_to_end(key)
+            return validator
+
+    validator = PayloadValidator(schema)
+
+    with _validators_lock:
+        _validators[key] = validator
+        while len(_validators) > getattr(settings, "WAGTAILMAILCHIMP_PREVALIDATION_CACHE_SIZE", 128):
+            _validators.popitem(last=False)
+
+    return validator
+
+
+def validate_member_payload(schema, data, degraded=False):
+    """
+    Raises MailchimpPayloadError if Mailchimp would reject the member payload, unless
+    WAGTAILMAILCHIMP_PREVALIDATION is off. Set degraded if the schema was built while
+    Mailchimp was failing, to only check the email address.
+    """
+    if is_prevalidation_enabled():
+        get_payload_validator(schema).validate(data, degraded=degraded)
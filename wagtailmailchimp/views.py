@@ -1,21 +1,37 @@
-import json
-from datetime import date
+from datetime import date, timedelta
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
 from django.core.mail import mail_admins
+from django.core.paginator import Paginator
 from django.forms.forms import NON_FIELD_ERRORS
-from django.http import Http404, HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, JsonResponse
 from django.shortcuts import render
 from django.urls import reverse
+from django.utils import timezone, translation
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+from django.utils.safestring import mark_safe
 from django.utils.translation import gettext as _
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import never_cache
 from django.views.generic import FormView
 from mailchimp3.mailchimpclient import MailChimpError
 from modelcluster.models import get_all_child_relations
 from wagtail.contrib.forms.models import AbstractFormField
-from wagtail.models import Page
+from wagtail.models import Page, Site
 
-from .api import MailchimpApi
-from .forms import MailChimpForm, MailchimpIntegrationForm
-from .models import MailchimpSettings
+from .api import MailchimpApi, get_tenant_id
+from .budgets import get_budget_settings, get_known_audience_ids, get_usage_report
+from .forms import MailChimpForm, MailchimpIntegrationForm, SubscriptionReportFilterForm, CachedFormFragment
+from .errors import MailchimpApiError, MailchimpBudgetError, MailchimpPayloadError
+from .models import MailchimpSettings, MailchimpSubscriptionDailyRollup, load_json_field
+from .profiling import profiled_view
+from .subscriptions import subscribe_to_audiences
+from .throttling import get_throttled_scope, is_email_throttled, is_honeypot_filled
+from .timing import timed_phase
+from .validation import get_date_format
+from .widgets import get_default_site_mailchimp_api
 
 
 class MailChimpView(FormView):
@@ -24,14 +40,14 @@ class MailChimpView(FormView):
     """
     form_class = MailChimpForm
     page_instance = None
-    merge_fields = None
-    interest_categories = None
+    schema = None
     api = None
 
     def get_api(self):
         if self.api:
             return self.api
-        mc_settings = MailchimpSettings.for_request(self.request)
+        with timed_phase("settings"):
+            mc_settings = MailchimpSettings.for_request(self.request)
         self.api = MailchimpApi(api_key=mc_settings.api_key)
         return self.api
 
@@ -46,7 +62,7 @@ class MailChimpView(FormView):
         merge_fields = {}
 
         # Add merge variable values.
-        for merge_field in self.get_merge_fields():
+        for merge_field in form.merge_fields:
             mc_type = merge_field.get('type', '')
             name = merge_field.get('tag', '')
             value = form.cleaned_data.get(name, '')
@@ -62,13 +78,14 @@ class MailChimpView(FormView):
                         values.append(val)
                 value = '  '.join(values)
 
-            # Convert date to string.
+            # Convert date to string, in the date format of the merge field.
+            date_format = (merge_field.get('options') or {}).get('date_format')
             if mc_type == 'date' and isinstance(value, date):
-                value = value.strftime('%m/%d/%Y')
+                value = value.strftime(get_date_format(date_format, 'MM/DD/YYYY'))
 
             # Convert birthday to string.
             if mc_type == 'birthday' and isinstance(value, date):
-                value = value.strftime('%m/%d')
+                value = value.strftime(get_date_format(date_format, 'MM/DD'))
 
             if value:
                 merge_fields.update({name: value})
@@ -81,67 +98,101 @@ class MailChimpView(FormView):
 
         :rtype: dict.
         """
+        if "form" not in kwargs and self.request.method == "GET" and self.get_form_cache_timeout():
+            kwargs["form"] = self.get_cached_form()
+
         context = super(MailChimpView, self).get_context_data(**kwargs)
         page = self.page_instance
-        context.update({'self': page, 'page': page, })
+        context.update({'self': page, 'page': page, 'mailchimp_degraded': self.get_api().degraded})
 
-        return context
+        if self.request.method == "GET" and page.is_cdn_cacheable():
+            # keep the CSRF token out of the publicly cached page, it is fetched by
+            # the mailchimp_csrf_token_script template tag instead
+            context["csrf_token"] = "NOTPROVIDED"
 
-    def get_interest_categories(self):
-        """
-        Returns list of MailChimp grouping dictionaries.
+        return context
 
-        :rtype: dict.
-        """
+    def get(self, request, *args, **kwargs):
+        response = super(MailChimpView, self).get(request, *args, **kwargs)
 
-        api = self.get_api()
+        if self.page_instance.is_cdn_cacheable():
+            if self.get_api().degraded:
+                # don't let the CDN keep a page built while Mailchimp was failing
+                add_never_cache_headers(response)
+            else:
+                self.add_cdn_cache_headers(response)
+
+        return response
+
+    def post(self, request, *args, **kwargs):
+        # checked before building the form, so that bots cost neither a form nor a Mailchimp call
+        if is_honeypot_filled(request):
+            # pretend it worked, so that bots don't learn to avoid the honeypot
+            response = self.render_to_response(self.get_context_data(
+                form=self.get_blank_form(), success_message=self.get_success_message()))
+        elif get_throttled_scope(request):
+            response = self.render_throttled()
+        else:
+            response = super(MailChimpView, self).post(request, *args, **kwargs)
 
-        if self.interest_categories is None:
-            list_id = self.page_instance.list_id
+        if self.page_instance.is_cdn_cacheable():
+            add_never_cache_headers(response)
 
-            interest_categories = api.get_interest_categories_for_list(list_id=list_id)
+        return response
 
-            categories = []
+    def render_throttled(self):
+        return self.render_to_response(self.get_context_data(
+            form=self.get_blank_form(),
+            error_message=_("Too many sign-up attempts. Please try again later.")), status=429)
 
-            for category in interest_categories:
-                category_id = category.get('id', '')
+    def add_cdn_cache_headers(self, response):
+        """
+        Marks the response as publicly cacheable, and tags it with the surrogate
+        keys of the page and its audience.
+        """
+        patch_cache_control(response, public=True, max_age=getattr(settings, "WAGTAILMAILCHIMP_CDN_MAX_AGE", 60 * 60))
 
-                interest_category = {
-                    "id": category_id,
-                    "title": category.get('title', ''),
-                    'type': category.get('type', '')
-                }
+        surrogate_keys = self.page_instance.get_surrogate_keys()
+        response["Surrogate-Key"] = " ".join(surrogate_keys)
+        response["Cache-Tag"] = ",".join(surrogate_keys)
 
-                interests = api.get_interests_for_interest_category(list_id=list_id,
-                                                                    interest_category_id=category_id)
+    def get_schema(self):
+        """
+        Returns the ListSchema of the page audience.
 
-                interest_category['interests'] = interests
+        :rtype: ListSchema.
+        """
+        if self.schema is None:
+            self.schema = self.get_api().get_list_schema(self.page_instance.list_id)
 
-                categories.append(interest_category)
+        return self.schema
 
-            self.interest_categories = categories
+    def get_interest_categories(self):
+        """
+        Returns list of MailChimp grouping dictionaries.
 
-        return self.interest_categories
+        :rtype: tuple.
+        """
+        return self.get_schema().interest_categories
 
     def get_merge_fields(self):
 
         """
         Returns list of MailChimp merge fields dictionaries.
 
-        :rtype: dict.
+        :rtype: tuple.
         """
 
-        api = self.get_api()
-
-        if self.merge_fields is None:
-            self.merge_fields = api.get_merge_fields_for_list(self.page_instance.list_id)
+        merge_fields = self.get_schema().merge_fields
 
         # If we don't have any merge variables to build a form from,
-        # raise an HTTP 404 error.
-        if not self.merge_fields:
+        # raise an HTTP 404 error. If Mailchimp is failing, and there is no
+        # last known good copy of the merge fields, the form only asks for
+        # the email address instead.
+        if not merge_fields and not self.get_api().degraded:
             raise Http404
 
-        return self.merge_fields
+        return merge_fields
 
     def get_form(self, form_class=None):
         """
@@ -153,7 +204,63 @@ class MailChimpView(FormView):
 
         merge_fields = self.get_merge_fields()
         interest_categories = self.get_interest_categories()
-        return MailChimpForm(merge_fields, interest_categories, **self.get_form_kwargs())
+        with timed_phase("form"):
+            return MailChimpForm(merge_fields, interest_categories, **self.get_form_kwargs())
+
+    def get_form_cache_timeout(self):
+        """
+        Returns for how long, in seconds, the rendered unbound form is cached.
+        A falsy value disables the cache.
+        """
+        return getattr(settings, "WAGTAILMAILCHIMP_FORM_CACHE_TIMEOUT", 60 * 5)
+
+    def get_form_cache_key(self):
+        page = self.page_instance
+        # raises Http404 if the audience has no merge fields
+        self.get_merge_fields()
+        schema_hash = self.get_schema().version
+        revision_id = getattr(page, "live_revision_id", None) or getattr(page, "latest_revision_id", None)
+
+        return f"wagtailmailchimp-form-{page.pk}-{revision_id}-{schema_hash}-{translation.get_language()}"
+
+    def get_cached_form(self):
+        """
+        Returns the unbound form, with its HTML cached per page revision, audience schema and language.
+
+        The form HTML holds no per-user data, the CSRF token is rendered by the page template.
+        """
+        cache_key = self.get_form_cache_key()
+        with timed_phase("cache"):
+            html = cache.get(cache_key)
+
+        if html is None:
+            form = self.get_unbound_form()
+            with timed_phase("form"):
+                html = str(form)
+            if not self.get_api().degraded:
+                cache.set(cache_key, html, self.get_form_cache_timeout())
+
+        return CachedFormFragment(mark_safe(html), self.get_unbound_form)
+
+    def get_unbound_form(self):
+        """
+        Returns the form without the posted data.
+
+        :rtype: MailChimpForm.
+        """
+        kwargs = self.get_form_kwargs()
+        kwargs.pop("data", None)
+        kwargs.pop("files", None)
+        with timed_phase("form"):
+            return MailChimpForm(self.get_merge_fields(), self.get_interest_categories(), **kwargs)
+
+    def get_blank_form(self):
+        """
+        Returns the unbound form, from the cache if forms are cached.
+        """
+        if self.get_form_cache_timeout():
+            return self.get_cached_form()
+        return self.get_unbound_form()
 
     def get_template_names(self):
         """
@@ -163,6 +270,10 @@ class MailChimpView(FormView):
         """
         return [self.page_instance.get_template(self.request)]
 
+    def get_success_message(self):
+        default_success_message = _("You have been successfully added to our mailing list")
+        return self.page_instance.thank_you_text or default_success_message
+
     def form_valid(self, form):
 
         """
@@ -191,6 +302,7 @@ class MailChimpView(FormView):
             interests_payload[interest] = True
 
         error_traceback = None
+        notify_admins = True
 
         context = {'page': self.page_instance, 'self': self.page_instance}
 
@@ -205,9 +317,29 @@ class MailChimpView(FormView):
             if interests_payload:
                 data['interests'] = interests_payload
 
+            tags = self.page_instance.get_subscriber_tags(self.request, data)
+            if tags:
+                data['tags'] = tags
+
+            if is_email_throttled(data['email_address']):
+                return self.render_throttled()
+
             try:
-                list_id = self.page_instance.list_id
-                api.add_user_to_list(list_id=list_id, data=data)
+                subscriptions = [(self.page_instance.list_id, data)]
+                subscriptions += self.page_instance.get_additional_audiences_member_data(data)
+                with timed_phase("subscribe"):
+                    results = subscribe_to_audiences(api, self.page_instance, subscriptions)
+                # the response is about the main audience, failures of the others are logged
+                results[0].raise_error()
+            except MailchimpPayloadError as e:
+                # rejected before calling Mailchimp, show the reasons on the form
+                for field, reasons in e.errors.items():
+                    form.add_error(field if field in form.fields else None, reasons)
+                return super(MailChimpView, self).form_invalid(form)
+            except MailchimpBudgetError as e:
+                # the limit is logged once per window, don't mail the admins about every sign-up
+                error_traceback = e
+                notify_admins = False
             except MailChimpError as e:
                 error_traceback = e
                 if e.args and e.args[0]:
@@ -229,23 +361,31 @@ class MailChimpView(FormView):
                 error_traceback = "No email in fields"
 
         if error_traceback:
-            mail_admins("Error adding user to mailing list", str(error_traceback), fail_silently=True)
+            if notify_admins:
+                mail_admins("Error adding user to mailing list", str(error_traceback), fail_silently=True)
 
             form.errors[NON_FIELD_ERRORS] = form.error_class(
                 [_("We are having issues adding you to our mailing list. Please try later")]
             )
             return super(MailChimpView, self).form_invalid(form)
 
-        default_success_message = _("You have been successfully added to our mailing list")
-
         context.update({
-            "success_message": self.page_instance.thank_you_text or default_success_message,
+            "success_message": self.get_success_message(),
             "form": self.get_form(),
         })
 
         return self.render_to_response(context)
 
 
+@never_cache
+def csrf_token_view(request):
+    """
+    Returns a CSRF token for sign-up forms served from publicly cached pages.
+    """
+    return JsonResponse({"token": get_token(request)})
+
+
+@profiled_view("mailchimp-integration")
 def mailchimp_integration_view(request, page_id):
     page = Page.objects.get(pk=page_id)
     form_page = page.specific
@@ -276,14 +416,12 @@ def mailchimp_integration_view(request, page_id):
         form_fields = getattr(form_page, form_fields_rel_name).all()
         mc_settings = MailchimpSettings.for_request(request)
         api = MailchimpApi(api_key=mc_settings.api_key)
-        lists = api.get_lists()
-
-        for audience in lists:
-            if audience.get("id") == form_page.audience_list_id:
-                context.update({"audience": audience})
-                break
-        merge_fields = api.get_merge_fields_for_list(form_page.audience_list_id)
-        interest_categories = api.get_interests_for_list(form_page.audience_list_id)
+        audience = api.get_audience(form_page.audience_list_id)
+        if audience:
+            context.update({"audience": audience})
+        schema = api.get_list_schema(form_page.audience_list_id)
+        merge_fields = schema.merge_fields
+        interest_categories = schema.get_interest_groups()
 
     if form_fields is not None:
         has_form_fields = True
@@ -294,10 +432,8 @@ def mailchimp_integration_view(request, page_id):
         form = MailchimpIntegrationForm(merge_fields=merge_fields, form_fields=form_fields, data=request.POST)
 
         if form.is_valid():
-            merge_fields_data = json.dumps(form.cleaned_data)
-            interest_categories_data = json.dumps(interest_categories)
-            form_page.merge_fields_mapping = merge_fields_data
-            form_page.interest_categories = interest_categories_data
+            form_page.merge_fields_mapping = form.cleaned_data
+            form_page.interest_categories = interest_categories
             form_page.save()
 
             return HttpResponseRedirect(explore_url)
@@ -305,14 +441,119 @@ def mailchimp_integration_view(request, page_id):
             context.update({"form": form})
             return render(request, template_name, context=context)
 
-    initial_data = None
-    if form_page.merge_fields_mapping:
-        try:
-            initial_data = json.loads(form_page.merge_fields_mapping)
-        except Exception:
-            pass
+    initial_data = load_json_field(form_page.merge_fields_mapping)
 
     form = MailchimpIntegrationForm(merge_fields=merge_fields, form_fields=form_fields, initial=initial_data)
     context.update({"form": form})
 
     return render(request, template_name, context=context)
+
+
+def audience_search_view(request):
+    """
+    Returns a page of the Mailchimp audiences matching the search query, for the audience select widget.
+    """
+    try:
+        api = get_default_site_mailchimp_api()
+    except Site.DoesNotExist:
+        # no default site yet, so no audiences to choose from
+        return JsonResponse({"results": [], "count": 0, "has_next": False})
+    except MailchimpApiError as e:
+        return JsonResponse({"error": e.message, "results": [], "count": 0, "has_next": False}, status=400)
+
+    try:
+        page_number = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page_number = 1
+
+    per_page = 20
+    audiences, count = api.get_audience_catalog().search(request.GET.get("q", ""),
+                                                          offset=(page_number - 1) * per_page, limit=per_page)
+
+    return JsonResponse({
+        "results": [{"id": audience.get("id"), "name": audience.get("name")} for audience in audiences],
+        "count": count,
+        "has_next": page_number * per_page < count,
+    })
+
+
+def subscription_report_view(request):
+    """
+    Lists Mailchimp subscription attempts aggregated per page and day.
+    """
+    if not request.user.is_superuser:
+        raise PermissionDenied
+
+    today = timezone.localdate()
+    filter_form = SubscriptionReportFilterForm(request.GET or None)
+
+    date_from = today - timedelta(days=29)
+    date_to = today
+    page_id = None
+
+    if filter_form.is_valid():
+        date_from = filter_form.cleaned_data.get("date_from") or date_from
+        date_to = filter_form.cleaned_data.get("date_to") or date_to
+        page_id = filter_form.cleaned_data.get("page_id")
+
+    # read from the daily rollups, the attempts are only written to
+    rows = MailchimpSubscriptionDailyRollup.objects.filter(day__gte=date_from, day__lte=date_to)
+
+    if page_id:
+        rows = rows.filter(page_id=page_id)
+
+    paginator = Paginator(rows.order_by("-day", "page_id"), 50)
+    page_obj = paginator.get_page(request.GET.get("p"))
+
+    # only look up the titles of the pages on the current page of results
+    page_titles = dict(Page.objects.filter(pk__in={row.page_id for row in page_obj}).values_list("pk", "title"))
+    for row in page_obj:
+        row.page_title = page_titles.get(row.page_id)
+
+    query = request.GET.copy()
+    query.pop("p", None)
+
+    context = {
+        "filter_form": filter_form,
+        "page_obj": page_obj,
+        "date_from": date_from,
+        "date_to": date_to,
+        "query_string": query.urlencode(),
+    }
+
+    return render(request, "wagtailmailchimp/subscription_report.html", context=context)
+
+
+def budget_report_view(request):
+    """
+    Shows the Mailchimp API calls of each account in the current minute and day,
+    per audience and operation, with their budget limits.
+    """
+    if not request.user.is_superuser:
+        raise PermissionDenied
+
+    accounts = {}
+    for mc_settings in MailchimpSettings.objects.select_related("site").exclude(api_key="").exclude(api_key=None):
+        tenant_id = get_tenant_id(mc_settings.api_key)
+        if tenant_id not in accounts:
+            accounts[tenant_id] = {"tenant_id": tenant_id, "api_key": mc_settings.api_key, "sites": []}
+        accounts[tenant_id]["sites"].append(mc_settings.site)
+
+    list_ids = get_known_audience_ids()
+
+    for account in accounts.values():
+        account["rows"] = get_usage_report(account["tenant_id"], list_ids)
+
+        # name the audiences from the cached catalog, without calling Mailchimp
+        catalog = MailchimpApi(account.pop("api_key")).get_cached_if_present("audience-catalog")
+        for row in account["rows"]:
+            if row["kind"] == "audience":
+                audience = catalog.get(row["name"]) if catalog is not None else None
+                row["label"] = audience.get("name") if audience else None
+
+    context = {
+        "accounts": list(accounts.values()),
+        "enabled": get_budget_settings()["enabled"],
+    }
+
+    return render(request, "wagtailmailchimp/budget_report.html", context=context)
@@ -1,17 +1,34 @@
 from django.urls import path, reverse
+from django.utils.translation import gettext_lazy as _
 from wagtail import hooks
 from wagtail.admin import widgets as wagtail_admin_widgets
+from wagtail.admin.menu import AdminOnlyMenuItem
 
-from .views import mailchimp_integration_view
+from .views import audience_search_view, budget_report_view, mailchimp_integration_view, subscription_report_view
 
 
 @hooks.register('register_admin_urls')
 def urlconf_wagtail_mailchimp():
     return [
         path('mailchimp-integration/<int:page_id>', mailchimp_integration_view, name="mailchimp_integration_view"),
+        path('mailchimp-audiences/', audience_search_view, name="mailchimp_audience_search"),
+        path('mailchimp-subscriptions/', subscription_report_view, name="mailchimp_subscription_report"),
+        path('mailchimp-budgets/', budget_report_view, name="mailchimp_budget_report"),
     ]
 
 
+@hooks.register('register_reports_menu_item')
+def register_subscription_report_menu_item():
+    return AdminOnlyMenuItem(_("Mailchimp subscriptions"), reverse("mailchimp_subscription_report"),
+                             icon_name="mail", order=900)
+
+
+@hooks.register('register_reports_menu_item')
+def register_budget_report_menu_item():
+    return AdminOnlyMenuItem(_("Mailchimp API budgets"), reverse("mailchimp_budget_report"),
+                             icon_name="time", order=901)
+
+
 @hooks.register('register_page_listing_buttons')
 def page_listing_buttons(page, user, next_url=None):
     if hasattr(page, "is_mailchimp_integration") and hasattr(page, "audience_list_id"):
@@ -1,5 +1,8 @@
+import warnings
+
 from django.db.utils import ProgrammingError
 from django.forms.widgets import Input, Select
+from django.urls import reverse
 from wagtail.models import Site
 from django.utils.translation import gettext as _
 
@@ -34,17 +37,36 @@ class MailchimpSubscriberOptinWidget(Input):
         return ctx
 
 
+def get_default_site_mailchimp_api():
+    """
+    Returns the MailchimpApi for the API key set on the default site.
+    """
+    from .models import MailchimpSettings
+
+    current_site = Site.objects.get(is_default_site=True)
+    mc_settings = MailchimpSettings.for_site(current_site)
+
+    if not mc_settings.api_key:
+        raise MailchimpApiError("Mailchimp API key is not set")
+
+    return MailchimpApi(api_key=mc_settings.api_key)
+
+
 class MailchimpAudienceSelectWidget(Input):
+    """
+    Select widget for a Mailchimp audience. Only the selected audience is rendered,
+    other audiences are searched and loaded page by page from the admin.
+    """
     template_name = 'wagtailmailchimp/widgets/audience_select_widget.html'
 
     def get_context(self, name, value, attrs):
         ctx = super().get_context(name, value, attrs)
         mailchimp_error = None
 
-        audiences = []
+        selected_audience = None
 
         try:
-            audiences = self.get_mailchimp_audience_lists()
+            selected_audience = self.get_selected_audience(value)
         except MailchimpApiError as e:
             mailchimp_error = e.message
         except Exception as e:
@@ -54,27 +76,39 @@ class MailchimpAudienceSelectWidget(Input):
         ctx["widget"].update({
             "value": value,
             "mailchimp_error": mailchimp_error,
-            "audiences": audiences,
+            "selected_audience": selected_audience,
+            "search_url": reverse("mailchimp_audience_search"),
             "no_audiences_message": _("No Mailchimp audiences found. Please create one on Mailchimp and try again.")
         })
 
         return ctx
 
-    def get_mailchimp_audience_lists(self):
-        from .models import MailchimpSettings
-
+    def get_selected_audience(self, value):
         # catch error where 'wagtailcore_site' relation is not migrated to db yet
         try:
-            current_site = Site.objects.get(is_default_site=True)
-        except ProgrammingError:
-            return []
+            mailchimp = get_default_site_mailchimp_api()
+        except (ProgrammingError, Site.DoesNotExist):
+            return None
 
-        mc_settings = MailchimpSettings.for_site(current_site)
+        if not value:
+            return None
 
-        if not mc_settings.api_key:
-            raise MailchimpApiError("Mailchimp API key is not set")
+        return mailchimp.get_audience(value)
+
+    def get_mailchimp_audience_lists(self):
+        """
+        Deprecated, the widget only renders the selected audience, the others are searched
+        with the mailchimp_audience_search admin view. Returns all the audiences of the
+        account of the default site.
+        """
+        warnings.warn("MailchimpAudienceSelectWidget.get_mailchimp_audience_lists() is deprecated, search the "
+                      "audiences with the mailchimp_audience_search admin view instead",
+                      DeprecationWarning, stacklevel=2)
 
-        mailchimp = MailchimpApi(api_key=mc_settings.api_key)
-        lists = mailchimp.get_lists()
+        # catch error where 'wagtailcore_site' relation is not migrated to db yet
+        try:
+            mailchimp = get_default_site_mailchimp_api()
+        except (ProgrammingError, Site.DoesNotExist):
+            return []
 
-        return lists
+        return mailchimp.get_audience_catalog().audiences